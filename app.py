@@ -3,9 +3,9 @@
 核心功能：剧本输入 → 分镜划分 → 编辑 → 导出
 """
 
+import io
 import streamlit as st
 import pandas as pd
-import copy
 from typing import List, Dict, Any
 from pathlib import Path
 
@@ -14,9 +14,16 @@ from config.llm_config import get_available_brands, get_models_by_brand
 from config.prompts import get_scene_division_prompt
 from services.llm_service import LLMService
 from utils.scene_parser import SceneParser
+from utils.script_splitter import ScriptSplitter
+from utils.scene_schema import to_scene_records
 from utils.export_utils import ExportUtils
 from utils.prompt_generator import ImagePromptGenerator
 from utils.project_manager import ProjectManager
+from utils.prompt_schema import (
+    NanoBananaPrompt, json_default, restore_prompt_objects, prompt_variant, update_prompt_variant
+)
+from utils.visual_registry import VisualRegistry
+from utils.translation_memory import TranslationMemory
 
 # 页面配置
 st.set_page_config(
@@ -56,6 +63,12 @@ st.set_page_config(
 #                 st.error("❌ 密码错误，请重试")
 #         st.stop()
 
+# 生成提示词时，每完成多少个分镜自动保存一次到当前项目
+PROMPT_AUTOSAVE_INTERVAL = 20
+
+# 划分分镜时每次请求的剧本片段最大字数（长剧本按场景标题 / 台词块切分后逐段划分，单次请求不易超时）
+SCRIPT_DIVISION_SEGMENT_CHARS = 3000
+
 # 初始化服务
 @st.cache_resource
 def init_services():
@@ -89,6 +102,10 @@ def init_session_state():
             "include_characters": True,
             "use_llm": False  # 默认不启用 LLM，用户可选择启用
         }
+    if "visual_registry" not in st.session_state:
+        st.session_state.visual_registry = None  # 项目级人物 / 地点登记表
+    if "translation_memory" not in st.session_state:
+        st.session_state.translation_memory = None  # 本项目的翻译记忆库（关联全局术语库）
     if "current_project" not in st.session_state:
         st.session_state.current_project = None  # 当前打开的项目文件路径
     if "project_name" not in st.session_state:
@@ -161,6 +178,23 @@ def render_sidebar():
         "api_key": api_key
     }
 
+def load_project_into_session(project_data, project_manager):
+    """把项目数据（项目文件或历史版本）载入 session_state"""
+    st.session_state.script = project_data.get("script", "")
+    st.session_state.scenes = to_scene_records(project_data.get("scenes", []))
+    st.session_state.image_prompts = restore_prompt_objects(project_data.get("image_prompts", []))
+    st.session_state.visual_registry = VisualRegistry.from_json(project_data.get("registry"))
+    st.session_state.translation_memory = TranslationMemory.from_json(
+        project_data.get("translation_memory"), glossary=project_manager.load_glossary()
+    )
+    
+    # 恢复元数据
+    metadata = project_data.get("metadata", {})
+    if "current_step" in metadata:
+        st.session_state.current_step = metadata["current_step"]
+    if "prompt_config" in metadata:
+        st.session_state.prompt_config.update(metadata["prompt_config"])
+
 def render_project_manager(services):
     """渲染项目管理界面"""
     project_manager = services["project_manager"]
@@ -198,20 +232,35 @@ def render_project_manager(services):
                     st.sidebar.warning("请先生成分镜")
                 else:
                     try:
-                        filepath = project_manager.save_project(
-                            project_name=project_name_input.strip(),
-                            script=st.session_state.script,
-                            scenes=st.session_state.scenes,
-                            image_prompts=st.session_state.image_prompts,
-                            metadata={
+                        project_fields = {
+                            "script": st.session_state.script,
+                            "scenes": st.session_state.scenes,
+                            "image_prompts": st.session_state.image_prompts,
+                            "registry": st.session_state.visual_registry,
+                            "translation_memory": st.session_state.translation_memory,
+                            "metadata": {
                                 "current_step": st.session_state.current_step,
                                 "prompt_config": st.session_state.prompt_config
                             }
-                        )
-                        st.session_state.current_project = filepath
-                        st.session_state.project_name = project_name_input.strip()
-                        st.sidebar.success(f"✅ 保存成功！\n{Path(filepath).name}")
-                        st.rerun()
+                        }
+                        if (st.session_state.current_project
+                                and project_name_input.strip() == st.session_state.project_name):
+                            # 同名的当前项目：保存为新版本（只记录增量，不再复制整个项目文件）
+                            version = project_manager.save_version(st.session_state.current_project, **project_fields)
+                            if version:
+                                st.sidebar.success(f"✅ 保存成功！版本 v{version['version']}")
+                                st.rerun()
+                            else:
+                                st.sidebar.error("保存失败")
+                        else:
+                            filepath = project_manager.save_project(
+                                project_name=project_name_input.strip(),
+                                **project_fields
+                            )
+                            st.session_state.current_project = filepath
+                            st.session_state.project_name = project_name_input.strip()
+                            st.sidebar.success(f"✅ 保存成功！\n{Path(filepath).name}")
+                            st.rerun()
                     except Exception as e:
                         st.sidebar.error(f"保存失败：{str(e)}")
         
@@ -224,6 +273,8 @@ def render_project_manager(services):
                             script=st.session_state.script,
                             scenes=st.session_state.scenes,
                             image_prompts=st.session_state.image_prompts,
+                            registry=st.session_state.visual_registry,
+                            translation_memory=st.session_state.translation_memory,
                             metadata={
                                 "current_step": st.session_state.current_step,
                                 "prompt_config": st.session_state.prompt_config
@@ -237,6 +288,31 @@ def render_project_manager(services):
                     except Exception as e:
                         st.sidebar.error(f"更新失败：{str(e)}")
         
+        # 版本历史
+        if st.session_state.current_project:
+            versions = project_manager.list_versions(st.session_state.current_project)
+            if versions:
+                with st.expander(f"🕘 版本历史（{len(versions)}）", expanded=False):
+                    versions = versions[::-1]  # 最新的在前
+                    selected_version = st.selectbox(
+                        "选择版本",
+                        options=range(len(versions)),
+                        format_func=lambda x: (
+                            f"v{versions[x]['version']}  {versions[x]['saved_at'][:19]}  "
+                            f"{versions[x]['scene_count']}个分镜（改动{versions[x]['changed_scenes']}）"
+                        ),
+                        key="project_version_select"
+                    )
+                    if st.button("↩️ 恢复此版本", key="restore_version_btn", use_container_width=True):
+                        try:
+                            version = versions[selected_version]["version"]
+                            project_data = project_manager.load_version(st.session_state.current_project, version)
+                            load_project_into_session(project_data, project_manager)
+                            st.sidebar.success(f"✅ 已恢复到版本 v{version}（保存后成为新版本）")
+                            st.rerun()
+                        except Exception as e:
+                            st.sidebar.error(f"恢复失败：{str(e)}")
+        
         st.markdown("---")
         
         # 加载项目
@@ -261,16 +337,7 @@ def render_project_manager(services):
                         project_data = project_manager.load_project(selected_project["filepath"])
                         
                         # 加载数据到 session_state
-                        st.session_state.script = project_data.get("script", "")
-                        st.session_state.scenes = project_data.get("scenes", [])
-                        st.session_state.image_prompts = project_data.get("image_prompts", [])
-                        
-                        # 恢复元数据
-                        metadata = project_data.get("metadata", {})
-                        if "current_step" in metadata:
-                            st.session_state.current_step = metadata["current_step"]
-                        if "prompt_config" in metadata:
-                            st.session_state.prompt_config.update(metadata["prompt_config"])
+                        load_project_into_session(project_data, project_manager)
                         
                         # 更新当前项目信息
                         st.session_state.current_project = selected_project["filepath"]
@@ -303,14 +370,7 @@ def render_project_manager(services):
                         if st.button("📂 加载", key=f"quick_load_{i}", use_container_width=True):
                             try:
                                 project_data = project_manager.load_project(project["filepath"])
-                                st.session_state.script = project_data.get("script", "")
-                                st.session_state.scenes = project_data.get("scenes", [])
-                                st.session_state.image_prompts = project_data.get("image_prompts", [])
-                                metadata = project_data.get("metadata", {})
-                                if "current_step" in metadata:
-                                    st.session_state.current_step = metadata["current_step"]
-                                if "prompt_config" in metadata:
-                                    st.session_state.prompt_config.update(metadata["prompt_config"])
+                                load_project_into_session(project_data, project_manager)
                                 st.session_state.current_project = project["filepath"]
                                 st.session_state.project_name = project_data.get("project_name", project["project_name"])
                                 st.sidebar.success("✅ 加载成功！")
@@ -725,20 +785,20 @@ JSON_PROMPT_DROPDOWN_OPTIONS = {
     "performance_style": ["", "内敛表演", "外放表演", "反差表演", "细节表演"]
 }
 
-def render_json_prompt_editor(prompt_json: Dict, scene_num: int, key_prefix: str) -> Dict:
+def render_json_prompt_editor(prompt_json: NanoBananaPrompt, scene_num: int, key_prefix: str) -> NanoBananaPrompt:
     """
     渲染JSON提示词的可视化编辑器
     
     Args:
-        prompt_json: 当前的JSON提示词字典
+        prompt_json: 当前的结构化提示词（NanoBananaPrompt 对象，兼容旧版字典）
         scene_num: 分镜编号
         key_prefix: Streamlit key的前缀
         
     Returns:
-        编辑后的JSON字典
+        编辑后的 NanoBananaPrompt 对象
     """
-    # 深拷贝原始JSON，确保所有字段都被保留
-    edited_json = copy.deepcopy(prompt_json)
+    # 复制原始提示词，确保所有字段都被保留
+    edited_json = NanoBananaPrompt.from_json(prompt_json)
     
     # 使用tabs按JSON的顶层键分组
     tabs = st.tabs(["主体 (Subject)", "场景 (Scene)", "构图 (Composition)", "光照 (Lighting)", "技术参数 (Camera)", "视觉风格 (Style)", "其他 (Others)"])
@@ -1223,7 +1283,9 @@ def render_step3_prompt_generation(services):
                 "详细程度",
                 ["simple", "standard", "detailed"],
                 index=1 if st.session_state.prompt_config["detail_level"] == "standard" else (0 if st.session_state.prompt_config["detail_level"] == "simple" else 2),
-                key="prompt_detail"
+                key="prompt_detail",
+                help="simple：快速预览，只生成构图、技术参数和质量标签（不提取、不翻译）；"
+                     "standard：规则处理；detailed：使用 LLM 提取视觉元素和翻译（需要 API Key）"
             )
         
         with col2:
@@ -1238,6 +1300,13 @@ def render_step3_prompt_generation(services):
                 value=st.session_state.prompt_config["include_mood"],
                 key="prompt_mood"
             )
+            
+            multilingual = st.checkbox(
+                "同时生成中文 / 英文 / 双语三个版本",
+                value=st.session_state.prompt_config.get("multilingual", False),
+                key="prompt_multilingual",
+                help="每个分镜只提取、翻译一次，同时生成三种语言的提示词；预览和导出时可以直接切换语言，无需重新生成。"
+            )
         
         # LLM 辅助选项
         st.markdown("---")
@@ -1248,8 +1317,26 @@ def render_step3_prompt_generation(services):
             help="启用后，将使用 LLM 模型来更准确地提取视觉元素和翻译文本，生成更准确的 JSON 提示词。需要配置 API Key。"
         )
         
+        llm_batch_size = st.session_state.prompt_config.get("llm_batch_size", 1)
+        llm_mode = st.session_state.prompt_config.get("llm_mode", "full")
         if use_llm:
             st.info("💡 LLM 辅助模式：将使用已配置的 LLM 模型来提升提示词生成的准确性。")
+            llm_mode = st.radio(
+                "LLM 提取范围",
+                ["full", "hybrid"],
+                index=1 if llm_mode == "hybrid" else 0,
+                format_func=lambda x: "全部分镜" if x == "full" else "混合模式（规则优先，仅信息不完整的分镜调用 LLM）",
+                horizontal=True,
+                key="prompt_llm_mode"
+            )
+            llm_batch_size = st.number_input(
+                "每次请求分析的分镜数",
+                min_value=1,
+                max_value=10,
+                value=llm_batch_size,
+                key="prompt_llm_batch_size",
+                help="大于 1 时，一次 LLM 请求分析连续的多个分镜，减少请求次数和重复的系统提示词开销；个别分镜解析失败时会单独重试。"
+            )
         
         # 更新配置
         st.session_state.prompt_config = {
@@ -1258,8 +1345,26 @@ def render_step3_prompt_generation(services):
             "include_technical": include_technical,
             "include_mood": include_mood,
             "include_characters": True,
-            "use_llm": use_llm
+            "use_llm": use_llm,
+            "llm_batch_size": llm_batch_size,
+            "llm_mode": llm_mode,
+            "multilingual": multilingual
         }
+        
+        # 人物 / 地点登记表（生成时自动建立，修改了人物服装或地点描述后可以重新建立）
+        registry = st.session_state.visual_registry
+        if registry:
+            st.markdown("---")
+            col_a, col_b = st.columns([3, 1])
+            with col_a:
+                st.caption(
+                    f"👥 人物 / 地点设定：{len(registry.characters)} 个人物，{len(registry.locations)} 个地点"
+                    "（各分镜共享人物服装和地点环境，保持画面一致）"
+                )
+            with col_b:
+                if st.button("🔄 重新建立", key="reset_visual_registry", use_container_width=True):
+                    st.session_state.visual_registry = None
+                    st.rerun()
     
     # 批量生成区域
     st.markdown("---")
@@ -1294,7 +1399,12 @@ def render_step3_prompt_generation(services):
             # 生成提示词
             try:
                 # 检查是否需要 LLM 服务
-                use_llm = st.session_state.prompt_config.get("use_llm", False)
+                # detailed 详细程度自动启用 LLM 辅助，simple 不需要 LLM
+                detail_level = st.session_state.prompt_config.get("detail_level", "standard")
+                use_llm = (
+                    (st.session_state.prompt_config.get("use_llm", False) or detail_level == "detailed")
+                    and detail_level != "simple"
+                )
                 llm_service = None
                 
                 if use_llm:
@@ -1314,17 +1424,82 @@ def render_step3_prompt_generation(services):
                         )
                 
                 spinner_text = "正在使用 LLM 生成提示词（可能需要一些时间）..." if use_llm else "正在生成提示词..."
-                with st.spinner(spinner_text):
-                    generator = ImagePromptGenerator(
-                        st.session_state.prompt_config,
-                        llm_service=llm_service if use_llm else None
+                project_manager = services["project_manager"]
+                if st.session_state.translation_memory is None:
+                    st.session_state.translation_memory = TranslationMemory(glossary=project_manager.load_glossary())
+                generator = ImagePromptGenerator(
+                    st.session_state.prompt_config,
+                    llm_service=llm_service if use_llm else None,
+                    translation_memory=st.session_state.translation_memory
+                )
+                # 遍历全部分镜建立（或补充）人物 / 地点登记表，各分镜共享人物服装和地点环境
+                st.session_state.visual_registry = VisualRegistry.build(
+                    st.session_state.scenes,
+                    generator,
+                    existing=st.session_state.visual_registry
+                )
+                generator.registry = st.session_state.visual_registry
+                progress_bar = st.progress(0.0, text=spinner_text)
+                live_preview = st.empty()
+                
+                def update_progress(progress):
+                    eta = progress["eta"]
+                    eta_text = f"{int(eta // 60)} 分 {int(eta % 60)} 秒" if eta >= 60 else f"{eta:.0f} 秒"
+                    error_text = f"，失败 {progress['errors']} 个" if progress["errors"] else ""
+                    progress_bar.progress(
+                        progress["done"] / progress["total"],
+                        text=f"已完成 {progress['done']}/{progress['total']}{error_text}，预计剩余 {eta_text}"
                     )
-                    prompts = generator.generate_batch(selected_scenes)
+                
+                # 内容未变化的分镜直接复用已有提示词，只重新生成改动过的分镜
+                previous_prompts = st.session_state.image_prompts
+                prompts = []
+                for prompt_data in generator.generate_iter(
+                    selected_scenes,
+                    previous_prompts=previous_prompts,
+                    progress_callback=update_progress
+                ):
+                    prompts.append(prompt_data)
+                    # 每完成一个分镜就写回会话状态，页面重跑或中断时已生成的结果不会丢失
                     st.session_state.image_prompts = prompts
-                    
-                    mode_text = "（LLM 辅助）" if use_llm else "（规则处理）"
-                    st.success(f"✅ 成功生成 {len(prompts)} 个提示词{mode_text}！")
-                    st.rerun()
+                    if prompt_data.get("error"):
+                        live_preview.warning(f"分镜 {prompt_data.get('scene_number')} 生成失败: {prompt_data['error']}")
+                    else:
+                        live_preview.caption(
+                            f"分镜 {prompt_data.get('scene_number')}: {prompt_data.get('prompt_text', '')[:200]}"
+                        )
+                    # 已打开项目时定期自动保存到项目文件
+                    if st.session_state.current_project and len(prompts) % PROMPT_AUTOSAVE_INTERVAL == 0:
+                        project_manager.update_project(
+                            filepath=st.session_state.current_project,
+                            image_prompts=prompts,
+                            registry=st.session_state.visual_registry,
+                            translation_memory=st.session_state.translation_memory
+                        )
+                
+                if st.session_state.current_project:
+                    project_manager.update_project(
+                        filepath=st.session_state.current_project,
+                        image_prompts=prompts,
+                        registry=st.session_state.visual_registry,
+                        translation_memory=st.session_state.translation_memory
+                    )
+                
+                # 本次新增的翻译同时记入全局术语库，供其他项目复用
+                if use_llm and st.session_state.translation_memory.glossary is not None:
+                    project_manager.save_glossary(st.session_state.translation_memory.glossary)
+                
+                mode_text = "（LLM 辅助）" if use_llm else "（规则处理）"
+                reused = generator.last_batch_stats["reused"]
+                reused_text = f"，其中 {reused} 个未变化的分镜直接复用" if reused else ""
+                deduplicated = generator.last_batch_stats["deduplicated"]
+                if deduplicated:
+                    reused_text += f"，{deduplicated} 个近似重复分镜沿用相似分镜的分析结果"
+                avoided = generator.last_batch_stats["llm_requests_avoided"]
+                if avoided:
+                    reused_text += f"，混合模式省去 {avoided} 次 LLM 调用"
+                st.success(f"✅ 成功生成 {len(prompts)} 个提示词{mode_text}{reused_text}！")
+                st.rerun()
             except Exception as e:
                 st.error(f"❌ 生成失败: {str(e)}")
                 with st.expander("🔍 查看详细错误"):
@@ -1334,26 +1509,41 @@ def render_step3_prompt_generation(services):
     st.markdown("---")
     st.subheader("📋 提示词预览")
     
+    # 多语言输出的提示词可以直接切换显示 / 导出的语言（None 表示使用生成时的语言）
+    view_language = None
+    if any(p.get("variants") for p in st.session_state.image_prompts):
+        language_options = ["bilingual", "chinese", "english"]
+        current_language = st.session_state.prompt_config.get("language", "bilingual")
+        view_language = st.radio(
+            "显示 / 导出语言",
+            language_options,
+            index=language_options.index(current_language) if current_language in language_options else 0,
+            format_func=lambda x: {"bilingual": "双语", "chinese": "中文", "english": "英文"}[x],
+            horizontal=True,
+            key="prompt_view_language"
+        )
+    view_prompts = [prompt_variant(p, view_language) for p in st.session_state.image_prompts]
+    
     if st.session_state.image_prompts:
         # 显示统计信息
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("已生成提示词", len(st.session_state.image_prompts))
+            st.metric("已生成提示词", len(view_prompts))
         with col2:
-            avg_length = sum(len(p.get("prompt_text", "")) for p in st.session_state.image_prompts) / len(st.session_state.image_prompts) if st.session_state.image_prompts else 0
+            avg_length = sum(len(p.get("prompt_text", "")) for p in view_prompts) / len(view_prompts) if view_prompts else 0
             st.metric("平均长度", f"{avg_length:.0f} 字符")
         with col3:
             if st.button("📋 复制全部提示词", key="copy_all"):
                 all_prompts = "\n\n".join([
                     f"分镜 {p['scene_number']}:\n{p['prompt_text']}" 
-                    for p in st.session_state.image_prompts 
+                    for p in view_prompts 
                     if p.get("prompt_text")
                 ])
                 st.code(all_prompts, language="text")
                 st.success("✅ 提示词已显示，请手动复制")
         
         # 显示每个分镜的提示词
-        for idx, prompt_data in enumerate(st.session_state.image_prompts):
+        for idx, prompt_data in enumerate(view_prompts):
             if "error" in prompt_data:
                 st.error(f"❌ 分镜 {prompt_data['scene_number']} 生成失败: {prompt_data['error']}")
                 continue
@@ -1362,8 +1552,10 @@ def render_step3_prompt_generation(services):
             scene_desc = prompt_data.get("scene_description", "")
             
             with st.expander(f"分镜 {scene_num}: {scene_desc[:50]}..." if len(scene_desc) > 50 else f"分镜 {scene_num}: {scene_desc}"):
-                # 初始化编辑状态
+                # 初始化编辑状态（每种语言版本分别编辑）
                 edit_key_prefix = f"edit_prompt_{scene_num}"
+                if view_language:
+                    edit_key_prefix = f"{edit_key_prefix}_{view_language}"
                 
                 # 使用session_state存储编辑后的内容
                 if f"{edit_key_prefix}_text" not in st.session_state:
@@ -1411,10 +1603,14 @@ def render_step3_prompt_generation(services):
                             # 获取编辑后的JSON（从session_state）
                             edited_json_obj = st.session_state.get(f"{edit_key_prefix}_json_edited", edited_json)
                             
-                            # 更新session_state中的提示词数据
-                            st.session_state.image_prompts[idx]["prompt_text"] = edited_text
-                            st.session_state.image_prompts[idx]["negative_prompt"] = edited_negative
-                            st.session_state.image_prompts[idx]["prompt_json"] = edited_json_obj
+                            # 更新session_state中的提示词数据（多语言输出时只修改当前显示的语言版本）
+                            update_prompt_variant(
+                                st.session_state.image_prompts[idx],
+                                view_language,
+                                prompt_text=edited_text,
+                                negative_prompt=edited_negative,
+                                prompt_json=edited_json_obj
+                            )
                             
                             st.success(f"✅ 分镜 {scene_num} 的提示词已保存！")
                             st.rerun()
@@ -1447,7 +1643,7 @@ def render_step3_prompt_generation(services):
                 with col4:
                     if st.button(f"📋 复制JSON", key=f"copy_json_{scene_num}"):
                         import json
-                        json_str = json.dumps(edited_json, ensure_ascii=False, indent=2)
+                        json_str = json.dumps(edited_json.to_json(), ensure_ascii=False, indent=2)
                         st.code(json_str, language="json")
                         st.success("✅ JSON已显示，请手动复制")
     else:
@@ -1471,7 +1667,7 @@ def render_step3_prompt_generation(services):
                     filepath = os.path.join(desktop, filename)
                     
                     with open(filepath, "w", encoding="utf-8") as f:
-                        for prompt_data in st.session_state.image_prompts:
+                        for prompt_data in view_prompts:
                             if prompt_data.get("prompt_text"):
                                 f.write(f"=== 分镜 {prompt_data['scene_number']} ===\n")
                                 f.write(f"描述: {prompt_data.get('scene_description', '')}\n")
@@ -1498,7 +1694,7 @@ def render_step3_prompt_generation(services):
                     filepath = os.path.join(desktop, filename)
                     
                     with open(filepath, "w", encoding="utf-8") as f:
-                        json.dump(st.session_state.image_prompts, f, ensure_ascii=False, indent=2)
+                        json.dump(st.session_state.image_prompts, f, ensure_ascii=False, indent=2, default=json_default)
                     
                     st.success(f"✅ 已保存到: {filepath}")
                 except Exception as e:
@@ -1514,7 +1710,8 @@ def render_step3_prompt_generation(services):
                     filepath = services["export_utils"].export_to_excel_with_prompts(
                         st.session_state.scenes,
                         st.session_state.image_prompts,
-                        st.session_state.script
+                        st.session_state.script,
+                        language=view_language
                     )
                     st.success(f"✅ 已保存到: {filepath}")
                 except Exception as e:
@@ -1569,6 +1766,8 @@ def main():
                 if script_length > 2000:
                     estimated_time = "约3-10分钟（长剧本需要更长时间）"
                 
+                # 逐段划分、逐个校验的分镜（后面的片段划分失败时保留已完成的部分）
+                divided_scenes = []
                 try:
                     # 显示提示信息
                     st.info(f"⏳ 正在使用AI划分分镜头，预计需要{estimated_time}，请耐心等待...\n\n提示：由于需要精细划分（每个动作、每次对话切换），响应时间可能较长。")
@@ -1580,20 +1779,35 @@ def main():
                             config["api_key"]
                         )
                         
-                        scenes = services["llm_service"].divide_script(
-                            st.session_state.script,
+                        # 剧本不超过片段长度时只有一个片段（与整体划分相同）；
+                        # 更长的剧本按场景切分后逐段请求，片段在划分过程中才逐个切出
+                        splitter = ScriptSplitter(max_chars=SCRIPT_DIVISION_SEGMENT_CHARS, structure_aware=True)
+                        segments = splitter.iter_split(io.StringIO(st.session_state.script))
+                        scenes = services["llm_service"].divide_script_segments(
+                            segments,
                             get_scene_division_prompt()
                         )
                         
-                        validated_scenes = services["scene_parser"].validate_scenes(scenes)
-                        st.session_state.scenes = validated_scenes
+                        # 每个片段划分完成后立即校验，分镜按到达顺序连续编号（各片段的编号都从 1 开始）
+                        progress_text = st.empty()
+                        validator = services["scene_parser"].validator()
+                        for scene in validator.stream(scenes):
+                            divided_scenes.append(scene)
+                            progress_text.caption(f"已划分 {len(divided_scenes)} 个分镜头...")
+                        
+                        st.session_state.scenes = divided_scenes
                         st.session_state.current_step = 2
-                        st.success(f"✅ 成功划分出 {len(validated_scenes)} 个分镜头！")
+                        st.success(f"✅ 成功划分出 {len(divided_scenes)} 个分镜头！")
                         st.rerun()
                 
                 except Exception as e:
                     error_msg = str(e)
                     st.error(f"❌ 分镜划分失败: {error_msg}")
+                    if divided_scenes:
+                        # 已完成的片段不必重新划分：保留结果，可以直接进入下一步编辑
+                        st.session_state.scenes = divided_scenes
+                        st.warning(f"已保留失败前划分出的 {len(divided_scenes)} 个分镜头，"
+                                   f"可点击「➡️ 下一步」编辑，剩余剧本可稍后重新划分")
                     
                     # 针对不同错误类型给出特别提示
                     if "超时" in error_msg or "timeout" in error_msg.lower():
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+性能基准测试程序
+使用合成分镜数据测量各模块的耗时
+
+使用方法:
+    python3 benchmark.py            # 运行全部基准
+    python3 benchmark.py rule_mode  # 只运行指定基准
+"""
+
+import os
+import sys
+import json
+import time
+import random
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.prompt_generator import ImagePromptGenerator
+
+CHARACTERS = ["小明", "小红", "老王", "李队长"]
+LOCATIONS = ["咖啡馆", "街道", "办公室", "森林", "屋顶", "仓库"]
+DESCRIPTION_TEMPLATES = [
+    "{c}坐在窗边，焦虑地看着手机，眉头紧锁",
+    "{c}站在门口，穿着黑色风衣，手里拿着钥匙",
+    "空镜，城市天空，乌云密布",
+    "{c}转身离开，留下一个背影，阳光洒在街道上",
+    "{c}快速跑过狭窄的街道，追逐前方的车",
+    "{c}和{d}握手，面带微笑，气氛轻松",
+    "{c}低头翻开文件夹，神情专注",
+    "昏暗的房间里，{c}靠在沙发上，疲惫不堪",
+    "雨天，{c}撑着伞走在街道上，灯光昏暗",
+    "{c}愤怒地拍桌子，怒目而视",
+    "风景优美的山谷，远处有雪山",
+    "{c}蹲下捡起地上的笔，抬头环顾四周",
+]
+SHOT_SIZES = ["大远景", "远景", "全景", "中景", "中近景", "近景", "特写", "大特写"]
+CAMERA_ANGLES = ["视平", "高位俯拍", "低位仰拍", "斜拍", "越肩", "鸟瞰"]
+TIMES = ["白天", "夜晚", "黄昏", "黎明", "中午", "下午"]
+MOODS = ["焦虑", "紧张", "悲伤", "愤怒", "中性", "温馨"]
+CAMERAS = ["ARRI Alexa", "Sony Venice", "RED Monstro 8K", "IMAX 70mm"]
+LENSES = ["ARRI Master Primes", "Cooke Anamorphic", "Canon K35"]
+APERTURES = ["f/1.4", "f/2.8", "f/5.6"]
+
+
+def make_scenes(count: int, seed: int = 42) -> list:
+    """生成合成分镜数据"""
+    rng = random.Random(seed)
+    scenes = []
+    for i in range(count):
+        character = rng.choice(CHARACTERS)
+        other = rng.choice(CHARACTERS)
+        scenes.append({
+            "scene_number": i + 1,
+            "scene_description": rng.choice(DESCRIPTION_TEMPLATES).format(c=character, d=other),
+            "shot_size": rng.choice(SHOT_SIZES),
+            "camera_angle": rng.choice(CAMERA_ANGLES),
+            "camera_movement": "固定",
+            "camera_equipment": "固定",
+            "lens_focal_length": "标准(35-50mm)",
+            "camera": rng.choice(CAMERAS),
+            "lens": rng.choice(LENSES),
+            "aperture": rng.choice(APERTURES),
+            "characters": [character],
+            "location": rng.choice(LOCATIONS),
+            "time": rng.choice(TIMES),
+            "mood": rng.choice(MOODS),
+            "dialogue_text": "",
+            "voiceover_text": "",
+            "sound_effects": "",
+            "composition_tension": "引导"
+        })
+    return scenes
+
+
+class CountingLLMService:
+    """模拟 LLM 服务：不发网络请求，立即返回固定格式的结果，只统计调用次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _call_llm(self, messages, temperature=0.3):
+        self.calls += 1
+        user_prompt = messages[-1]["content"]
+        if "请翻译" in user_prompt:
+            return "translated text"
+        return json.dumps({
+            "subject": {"pose": "站立 / standing", "expression": "平静 / calm"},
+            "scene": {"environment": "室内 / indoor"}
+        }, ensure_ascii=False)
+
+
+def timed(func, repeat: int = 10) -> float:
+    """运行多次，返回最短耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_rule_mode():
+    """规则模式：每个分镜的提示词生成耗时"""
+    print("\n【规则模式提示词生成】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    for language in ["bilingual", "chinese", "english"]:
+        generator = ImagePromptGenerator({"language": language})
+        elapsed = timed(lambda: generator.generate_batch(scenes))
+        print(f"  {language:10s}: {elapsed * 1000:8.1f} ms / {len(scenes)} 分镜"
+              f"  ({elapsed / len(scenes) * 1e6:7.1f} µs/分镜)")
+    stats = ImagePromptGenerator.section_cache_stats()
+    print(f"  分区缓存命中率: {stats['hit_rate']:.1%}（{stats['size']} 条）")
+
+
+def bench_keyword_extraction():
+    """规则模式关键词提取：每个分镜运行全部提取函数的耗时（冷缓存）"""
+    from utils.prompt_generator import RULE_KEYWORD_MATCHER
+
+    print("\n【规则模式关键词提取】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    # 每个描述都不相同，避免扫描缓存命中
+    for scene in scenes:
+        scene["scene_description"] += f"，第{scene['scene_number']}号"
+    generator = ImagePromptGenerator({"language": "chinese"})
+
+    def run():
+        RULE_KEYWORD_MATCHER.scan.cache_clear()
+        for scene in scenes:
+            description = scene["scene_description"]
+            action = generator._extract_action(description)
+            generator._is_empty_scene(description, [])
+            generator._extract_pose(description)
+            generator._extract_expression(description)
+            generator._extract_clothing(description)
+            generator._extract_props(description)
+            generator._extract_weather(description)
+            generator._extract_scene_details(description, scene["location"])
+            generator._infer_pose_from_context(description, action, scene)
+
+    elapsed = timed(run)
+    print(f"  全部提取函数: {elapsed / len(scenes) * 1e6:7.1f} µs/分镜")
+
+
+def bench_dict_translation():
+    """字典翻译：耗时、词典覆盖率，以及译文中仍未翻译的汉字比例（冷缓存）"""
+    from utils.prompt_generator import DICT_TRANSLATION_MEMO, TRANSLATION_SEGMENTER
+
+    print("\n【字典翻译（双向最大匹配逐词翻译）】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    for scene in scenes:
+        scene["scene_description"] += f"，第{scene['scene_number']}号"
+    descriptions = [scene["scene_description"] for scene in scenes]
+    generator = ImagePromptGenerator({"language": "english"})
+
+    def run():
+        DICT_TRANSLATION_MEMO.clear()
+        return [generator._translate_with_dict(description) for description in descriptions]
+
+    elapsed = timed(run)
+    translations = run()
+
+    def count_han(text):
+        return sum(1 for char in text if "\u4e00" <= char <= "\u9fff")
+
+    source_chars = sum(count_han(description) for description in descriptions)
+    remaining_chars = sum(count_han(translation) for translation in translations)
+    coverages = [TRANSLATION_SEGMENTER.coverage(description) for description in descriptions]
+    complete = sum(coverage == 1 for coverage in coverages)
+    print(f"  分镜描述: {elapsed / len(descriptions) * 1e6:7.1f} µs/条，平均词典覆盖率 "
+          f"{sum(coverages) / len(coverages):.1%}，完整翻译 {complete}/{len(descriptions)}，"
+          f"未翻译汉字 {remaining_chars}/{source_chars}（{remaining_chars / source_chars:.1%}）")
+    print(f"  示例: {descriptions[0]} -> {translations[0]}")
+
+
+def bench_scene_validation():
+    """分镜校验：预编译查找表 vs 逐个选项子串匹配（10000 个分镜，部分字段带多余文字）"""
+    from utils.scene_parser import SceneParser
+
+    class LinearSceneParser(SceneParser):
+        """原有的规范化方式：每次调用都线性扫描选项列表"""
+
+        def _normalize_field(self, field, value):
+            options, default = self._field_specs[field]
+            return self._normalize_value(value, options, default)
+
+    print("\n【分镜校验（10000 个分镜）】")
+    print("-" * 60)
+    scenes = make_scenes(10000)
+    rng = random.Random(7)
+    for scene in scenes:
+        # 模拟 LLM 输出中常见的不规范写法
+        if rng.random() < 0.3:
+            scene["shot_size"] += "镜头"
+        if rng.random() < 0.1:
+            scene["camera_angle"] = "/".join([scene["shot_size"], scene["camera_angle"], "固定", "手持", "标准(35-50mm)"])
+        if rng.random() < 0.2:
+            scene["mood"] = "有些" + scene["mood"]
+            scene["time"] = "傍晚" if rng.random() < 0.5 else scene["time"] + "时分"
+
+    for name, parser in [("逐个匹配", LinearSceneParser()), ("预编译查找表", SceneParser())]:
+        elapsed = timed(lambda: parser.validate_scenes(scenes), repeat=3)
+        print(f"  {name:8s}: {elapsed * 1000:8.1f} ms（{elapsed / len(scenes) * 1e6:6.1f} µs/分镜）")
+
+
+def bench_scene_records():
+    """分镜记录：10000 个分镜的内存占用（普通字典 vs __slots__ 记录）"""
+    import tracemalloc
+    from utils.scene_schema import Scene
+
+    print("\n【分镜记录内存占用（10000 个分镜）】")
+    print("-" * 60)
+    # 模拟从 JSON 加载：每个分镜的字符串都是独立对象
+    serialized = json.dumps(make_scenes(10000), ensure_ascii=False)
+    for name, convert in [("普通字典", lambda scene: scene), ("Scene 记录", Scene)]:
+        tracemalloc.start()
+        scenes = [convert(scene) for scene in json.loads(serialized)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:10s}: {current / 1024 / 1024:6.2f} MB（{current / len(scenes):6.0f} 字节/分镜）")
+        del scenes
+
+
+def make_script(min_chars: int, seed: int = 42, scene_headings: bool = False) -> str:
+    """生成合成长篇剧本（叙述段落 + 人物对白；scene_headings 时每 1-4 段前加「第X场」标题和地点时间行）"""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    scene_number = 0
+    while total < min_chars:
+        if scene_headings and (not paragraphs or rng.random() < 0.4):
+            scene_number += 1
+            heading = f"第{scene_number}场\n{rng.choice(LOCATIONS)} {rng.choice(['日', '夜'])} 内"
+            paragraphs.append(heading)
+            total += len(heading) + 2
+        character = rng.choice(CHARACTERS)
+        lines = [rng.choice(DESCRIPTION_TEMPLATES).format(c=character, d=rng.choice(CHARACTERS)) + "。"
+                 for _ in range(rng.randint(2, 6))]
+        if rng.random() < 0.5:
+            lines.append(f"{character}：\n“{rng.choice(DESCRIPTION_TEMPLATES).format(c='你', d='他')}！”")
+        paragraph = "\n".join(lines)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def bench_script_split():
+    """剧本分割：预计算分割点 + 二分查找 vs 逐窗口正则扫描（长篇剧本）"""
+    from utils.script_splitter import ScriptSplitter
+
+    print("\n【剧本分割（长篇剧本）】")
+    print("-" * 60)
+    splitter = ScriptSplitter(max_chars=500)
+
+    def split_per_window(script):
+        """原有方式：每个窗口单独扫描候选分割点"""
+        segments = []
+        current_pos = 0
+        while current_pos < len(script):
+            end_pos = min(current_pos + splitter.max_chars, len(script))
+            if end_pos < len(script):
+                end_pos = splitter._find_best_split_point(script[current_pos:end_pos], current_pos)
+            segments.append((script[current_pos:end_pos], current_pos, end_pos))
+            current_pos = end_pos
+        return segments
+
+    for size in [500_000, 2_000_000]:
+        script = make_script(size)
+        per_window = timed(lambda: split_per_window(script), repeat=3)
+        precomputed = timed(lambda: splitter.split_script(script), repeat=3)
+        count = len(splitter.split_script(script))
+        print(f"  {len(script):>9,} 字符 / {count:5d} 段: 逐窗口扫描 {per_window * 1000:8.1f} ms，"
+              f"预计算分割点 {precomputed * 1000:8.1f} ms")
+
+
+def bench_structured_split():
+    """结构感知分割：片段在场景中间被切开的比例（标点规则 vs 场景标题 / 台词块优先）"""
+    from utils.script_splitter import ScriptSplitter
+
+    print("\n【结构感知剧本分割】")
+    print("-" * 60)
+    script = make_script(500_000, scene_headings=True)
+    for name, splitter in [("标点规则", ScriptSplitter(max_chars=500)),
+                           ("结构感知", ScriptSplitter(max_chars=500, structure_aware=True))]:
+        elapsed = timed(lambda: splitter.split_script(script), repeat=3)
+        info = splitter.get_split_info(script)
+        segments = info["segments"]
+        mid_scene = sum(1 for segment in segments[1:] if not script.startswith("第", segment["start_pos"]))
+        print(f"  {name}: {elapsed * 1000:7.1f} ms，{len(segments):5d} 段，"
+              f"场景中间切开 {mid_scene:5d} 段（{mid_scene / max(1, len(segments) - 1):6.1%}）")
+
+
+def bench_stream_split():
+    """流式分割剧本文件：整体读入后分割 vs 按块流式分割（耗时和峰值内存）"""
+    import tempfile
+    import tracemalloc
+    from utils.script_splitter import ScriptSplitter
+
+    print("\n【流式分割剧本文件】")
+    print("-" * 60)
+    splitter = ScriptSplitter(max_chars=500, structure_aware=True)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "script.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(make_script(3_000_000, scene_headings=True))
+
+        def split_whole():
+            with open(path, "r", encoding="utf-8") as file:
+                return sum(1 for _ in splitter.split_script(file.read()))
+
+        def split_stream():
+            return sum(1 for _ in splitter.iter_split(path))
+
+        for name, run in [("整体读入", split_whole), ("流式分割", split_stream)]:
+            elapsed = timed(run, repeat=3)
+            tracemalloc.start()
+            count = run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {name}: {elapsed * 1000:7.1f} ms，{count} 段，峰值内存 {peak / 1024 / 1024:6.2f} MB")
+
+
+def bench_project_catalog():
+    """列出项目：逐个读取项目文件 vs 目录索引（200 个项目，每个 300 个分镜）"""
+    import tempfile
+    from utils.project_manager import ProjectManager
+
+    print("\n【项目列表（200 个项目）】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    script = make_script(20_000)
+    with tempfile.TemporaryDirectory() as directory:
+        manager = ProjectManager(directory)
+        for index in range(200):
+            path = manager.save_project(f"项目{index}", script, scenes)
+            os.rename(path, os.path.join(directory, f"项目{index}.json"))
+
+        def list_by_loading():
+            """原有方式：每个项目文件完整 json.load"""
+            return [len(manager.load_project(str(path)).get("scenes", []))
+                    for path in manager.projects_dir.glob("*.json")]
+
+        full = timed(list_by_loading, repeat=3)
+        cold = timed(lambda: ProjectManager(directory).list_projects(), repeat=1)
+        warm = timed(manager.list_projects, repeat=10)
+        print(f"  逐个读取      : {full * 1000:8.1f} ms")
+        print(f"  目录索引（重建）: {cold * 1000:8.1f} ms")
+        print(f"  目录索引（命中）: {warm * 1000:8.1f} ms")
+
+
+def bench_project_store():
+    """保存单个分镜的修改：JSON 文件整体重写 vs SQLite 逐行比较 / 单行更新（2000 个分镜）"""
+    import tempfile
+    from utils.project_manager import ProjectManager
+
+    print("\n【项目保存（2000 个分镜，修改 1 个）】")
+    print("-" * 60)
+    scenes = make_scenes(2000)
+    prompts = [{"scene_number": scene["scene_number"], "prompt_text": scene["scene_description"] * 4}
+               for scene in scenes]
+    script = make_script(100_000)
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ["json", "sqlite"]:
+            manager = ProjectManager(os.path.join(directory, backend), backend=backend)
+            filepath = manager.save_project("项目", script, scenes, prompts)
+            edits = iter(range(10_000))
+
+            def edit_one():
+                index = next(edits) % len(scenes)
+                scenes[index] = dict(scenes[index], scene_description=f"修改 {index}")
+                manager.update_project(filepath, scenes=scenes, image_prompts=prompts)
+
+            print(f"  {backend:6s} update_project: {timed(edit_one, repeat=5) * 1000:8.1f} ms")
+            if manager.store is not None:
+                project_id = int(filepath.split(":")[1])
+                elapsed = timed(lambda: manager.store.update_scene(project_id, 7, scenes[7]), repeat=20)
+                print(f"  {backend:6s} update_scene  : {elapsed * 1000:8.1f} ms")
+
+
+def bench_project_container():
+    """项目文件格式：格式化 JSON vs 分段压缩容器（文件大小、加载分镜的耗时）"""
+    import tempfile
+    from utils.project_manager import ProjectManager
+
+    print("\n【项目文件格式（2000 个分镜 + 提示词）】")
+    print("-" * 60)
+    generator = ImagePromptGenerator({"language": "bilingual"})
+    scenes = make_scenes(2000)
+    prompts = generator.generate_batch(scenes)
+    script = make_script(300_000)
+    with tempfile.TemporaryDirectory() as directory:
+        for file_format in ["json", "container"]:
+            manager = ProjectManager(directory, file_format=file_format)
+            filepath = manager.save_project("项目", script, scenes, prompts)
+            size = os.path.getsize(filepath)
+            load_scenes = timed(lambda: len(manager.load_project(filepath)["scenes"]), repeat=5)
+            load_all = timed(lambda: len(manager.load_project(filepath).get("image_prompts")), repeat=5)
+            print(f"  {file_format:9s}: {size / 1024 / 1024:6.2f} MB，加载分镜 {load_scenes * 1000:7.1f} ms，"
+                  f"加载全部 {load_all * 1000:7.1f} ms")
+
+
+def bench_project_versions():
+    """版本历史：每次保存一份完整项目文件 vs 增量版本历史（2000 个分镜，保存 100 次，每次修改 5 个分镜）"""
+    import tempfile
+    from utils.project_manager import ProjectManager
+
+    print("\n【项目版本历史（2000 个分镜，保存 100 次）】")
+    print("-" * 60)
+    generator = ImagePromptGenerator({"language": "bilingual"})
+    scenes = make_scenes(2000)
+    prompts = generator.generate_batch(scenes)
+    script = make_script(300_000)
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as directory:
+        manager = ProjectManager(directory)
+        filepath = manager.save_project("项目", script, scenes, prompts)
+        full_copy_size = os.path.getsize(filepath)
+
+        start = time.perf_counter()
+        for _ in range(99):
+            for index in rng.sample(range(len(scenes)), 5):
+                scenes[index] = dict(scenes[index], scene_description=scenes[index]["scene_description"] + "（修改）")
+                prompts[index] = dict(prompts[index], prompt_text=prompts[index]["prompt_text"] + " (edited)")
+            manager.save_version(filepath, scenes=scenes, image_prompts=prompts)
+        per_save = (time.perf_counter() - start) / 99
+
+        history_size = os.path.getsize(manager._history_path(filepath))
+        print(f"  每次完整复制: {full_copy_size * 100 / 1024 / 1024:8.1f} MB（100 × {full_copy_size / 1024 / 1024:.1f} MB）")
+        print(f"  增量版本历史: {history_size / 1024 / 1024:8.1f} MB，保存一个版本 {per_save * 1000:6.1f} ms")
+        for version in [1, 50, 100]:
+            elapsed = timed(lambda: manager.load_version(filepath, version), repeat=3)
+            print(f"  恢复 v{version:<3d}     : {elapsed * 1000:8.1f} ms")
+
+
+def bench_parallel():
+    """规则模式多进程批量生成：不同进程数下的总耗时"""
+    print("\n【规则模式多进程批量生成】")
+    print("-" * 60)
+    scenes = make_scenes(5000)
+    generator = ImagePromptGenerator({"language": "bilingual"})
+    cpu_count = os.cpu_count() or 1
+    serial = timed(lambda: generator.generate_batch(scenes), repeat=3)
+    print(f"  串行      : {serial * 1000:8.1f} ms / {len(scenes)} 分镜")
+    for workers in sorted({2, 4, cpu_count} - {1}):
+        elapsed = timed(lambda: generator.generate_batch(scenes, workers=workers), repeat=3)
+        print(f"  {workers:2d} 进程   : {elapsed * 1000:8.1f} ms  (加速 {serial / elapsed:4.2f}x)")
+    print(f"  （本机 CPU 核心数: {cpu_count}）")
+
+
+def bench_detail_levels():
+    """不同详细程度的耗时和 API 调用次数（LLM 使用不联网的模拟服务，只反映调用次数和本地开销）"""
+    print("\n【详细程度对比】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    print(f"  {'详细程度':10s} {'耗时(ms)':>10s} {'µs/分镜':>10s} {'API 调用':>10s}")
+    for detail_level in ["simple", "standard", "detailed"]:
+        llm_service = CountingLLMService()
+        generator = ImagePromptGenerator(
+            {"language": "bilingual", "detail_level": detail_level},
+            llm_service=llm_service
+        )
+        elapsed = timed(lambda: generator.generate_batch(scenes), repeat=3)
+        calls_per_run = llm_service.calls // 3
+        print(f"  {detail_level:10s} {elapsed * 1000:10.1f} {elapsed / len(scenes) * 1e6:10.1f} {calls_per_run:10d}")
+
+
+def bench_near_duplicates():
+    """近似重复分镜检测：LLM 模式下节省的 API 调用次数和聚类开销"""
+    print("\n【近似重复分镜检测（LLM 模式）】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    # 同一场戏通常由连续多个镜头组成：每 6 个镜头共用地点、时间和情绪
+    for index, scene in enumerate(scenes):
+        first = scenes[index - index % 6]
+        scene.update(location=first["location"], time=first["time"], mood=first["mood"])
+    for threshold in [0, 0.85]:
+        llm_service = CountingLLMService()
+        generator = ImagePromptGenerator(
+            {"language": "chinese", "use_llm": True, "near_duplicate_threshold": threshold},
+            llm_service=llm_service
+        )
+        start = time.perf_counter()
+        generator.generate_batch(scenes)
+        elapsed = time.perf_counter() - start
+        stats = generator.last_batch_stats
+        print(f"  阈值 {threshold:4.2f}: API 调用 {llm_service.calls:4d}，修补 {stats['deduplicated']:4d} 个分镜，"
+              f"本地耗时 {elapsed * 1000:7.1f} ms")
+
+
+def bench_hybrid():
+    """混合模式：规则提取足够可信的分镜不调用 LLM"""
+    print("\n【LLM 全量模式 vs 混合模式】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    for llm_mode in ["full", "hybrid"]:
+        llm_service = CountingLLMService()
+        generator = ImagePromptGenerator(
+            {"language": "chinese", "use_llm": True, "llm_mode": llm_mode, "near_duplicate_threshold": 0},
+            llm_service=llm_service
+        )
+        generator.generate_batch(scenes)
+        stats = generator.last_batch_stats
+        print(f"  {llm_mode:6s}: API 调用 {llm_service.calls:4d}，省去 {stats['llm_requests_avoided']:4d} 次")
+
+
+def bench_multilingual():
+    """多语言输出：一次生成三种语言 vs 分别生成三次（LLM 使用不联网的模拟服务）"""
+    print("\n【多语言输出 vs 分别生成三种语言】")
+    print("-" * 60)
+    scenes = make_scenes(300)
+    for use_llm in [False, True]:
+        mode = "LLM 模式" if use_llm else "规则模式"
+        llm_service = CountingLLMService()
+        start = time.perf_counter()
+        for language in ["chinese", "english", "bilingual"]:
+            ImagePromptGenerator(
+                {"language": language, "use_llm": use_llm}, llm_service=llm_service
+            ).generate_batch(scenes)
+        separate = time.perf_counter() - start
+        separate_calls = llm_service.calls
+
+        llm_service = CountingLLMService()
+        start = time.perf_counter()
+        ImagePromptGenerator(
+            {"language": "bilingual", "use_llm": use_llm, "multilingual": True}, llm_service=llm_service
+        ).generate_batch(scenes)
+        combined = time.perf_counter() - start
+        print(f"  {mode}: 分别生成 {separate * 1000:7.1f} ms / API 调用 {separate_calls:4d}，"
+              f"多语言输出 {combined * 1000:7.1f} ms / API 调用 {llm_service.calls:4d}")
+
+
+BENCHMARKS = {
+    "rule_mode": bench_rule_mode,
+    "keyword_extraction": bench_keyword_extraction,
+    "dict_translation": bench_dict_translation,
+    "scene_validation": bench_scene_validation,
+    "scene_records": bench_scene_records,
+    "script_split": bench_script_split,
+    "structured_split": bench_structured_split,
+    "stream_split": bench_stream_split,
+    "project_catalog": bench_project_catalog,
+    "project_store": bench_project_store,
+    "project_container": bench_project_container,
+    "project_versions": bench_project_versions,
+    "parallel": bench_parallel,
+    "detail_levels": bench_detail_levels,
+    "near_duplicates": bench_near_duplicates,
+    "hybrid": bench_hybrid,
+    "multilingual": bench_multilingual,
+}
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("性能基准测试")
+    print("=" * 60)
+    selected = sys.argv[1:] or list(BENCHMARKS.keys())
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"❌ 未知的基准: {name}（可选: {', '.join(BENCHMARKS)}）")
+            sys.exit(1)
+        BENCHMARKS[name]()
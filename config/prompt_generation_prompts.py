@@ -159,21 +159,29 @@ def get_visual_elements_extraction_prompt(
     
     return prompt
 
-def get_translation_prompt(text: str, target_language: str = "english") -> str:
+def get_translation_prompt(text: str, target_language: str = "english", reference: tuple = None) -> str:
     """
     生成翻译提示词
     
     Args:
         text: 要翻译的文本
         target_language: 目标语言
+        reference: 翻译记忆库中相似原文及其译文 (原文, 译文)（可选，只作为用词参考）
     
     Returns:
         str: 用户提示词
     """
+    reference_text = ""
+    if reference:
+        reference_text = f"""
+**参考译文**（相似原文的已有译文，仅供统一用词；与本次原文不同的人名、否定、数字等必须按本次原文翻译）：
+{reference[0]} → {reference[1]}
+"""
+    
     prompt = f"""请将以下中文文本准确翻译成{target_language}，保持专业术语的准确性。
 
 **原文**：{text}
-
+{reference_text}
 **要求**：
 1. 准确翻译，不要遗漏信息
 2. 保持专业术语的准确性（如镜头语言、摄影术语）
@@ -183,3 +191,73 @@ def get_translation_prompt(text: str, target_language: str = "english") -> str:
 请翻译："""
     
     return prompt
+
+def get_batch_visual_elements_extraction_prompt(
+    scenes: list,
+    language: str = "bilingual",
+    previous_scene: str = None,
+    next_scene: str = None
+) -> str:
+    """
+    生成多分镜批量视觉元素提取的提示词（一次请求分析连续的多个分镜）
+    
+    Args:
+        scenes: 连续分镜列表，每项包含 index（批次内序号，从 1 开始）、description、characters
+        language: 语言模式（bilingual/chinese/english）
+        previous_scene: 本批第一个分镜之前的分镜描述（用于上下文分析）
+        next_scene: 本批最后一个分镜之后的分镜描述（用于上下文分析）
+    
+    Returns:
+        str: 用户提示词
+    """
+    scene_parts = []
+    for item in scenes:
+        characters = item.get("characters") or []
+        chars_text = "、".join(characters) if characters else "人物"
+        scene_parts.append(
+            f"### 分镜 {item['index']}\n"
+            f"**人物**：{chars_text}\n"
+            f"**描述**：{item.get('description', '')}"
+        )
+    scenes_text = "\n\n".join(scene_parts)
+    
+    # 构建上下文信息
+    context_parts = []
+    if previous_scene:
+        context_parts.append(f"**本组之前的分镜**：{previous_scene}")
+    if next_scene:
+        context_parts.append(f"**本组之后的分镜**：{next_scene}")
+    context_text = "\n".join(context_parts) if context_parts else "无"
+    
+    prompt = f"""请依次分析以下 {len(scenes)} 个连续分镜，结合前后剧情，为每个分镜提取视觉元素并生成结构化的 JSON 提示词。
+
+## 分镜列表（按剧情顺序）
+
+{scenes_text}
+
+## 上下文信息（用于分析第一个和最后一个分镜的姿势和表情）
+
+{context_text}
+
+## 分析要求
+
+1. 这些分镜是连续的，分析某个分镜的姿势和表情时，要参考组内前后分镜的剧情发展
+2. **姿势字段是必填项**（除非是纯空镜），姿势描述要具体
+3. 根据剧情上下文推断人物的表情
+4. 准确翻译为英文（如果是双语模式，当前模式：{language}）
+5. 每个分镜的 JSON 对象格式与单个分镜时完全相同，并额外包含 "index" 字段（对应上面的分镜序号）
+
+## 输出格式
+
+输出一个 JSON 数组，按分镜序号顺序，每个分镜一个对象，不要添加任何说明文字：
+
+```json
+[
+  {{"index": 1, "subject": {{...}}, "scene": {{...}}, "character_background_relation": "..."}},
+  {{"index": 2, "subject": {{...}}, "scene": {{...}}, "character_background_relation": "..."}}
+]
+```
+
+请开始分析并输出 JSON 数组："""
+    
+    return prompt
@@ -8,7 +8,7 @@ import os
 import platform
 import requests
 import urllib3
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 from config.llm_config import get_llm_config
 
 # 禁用SSL警告（当使用verify=False时）
@@ -73,6 +73,25 @@ class LLMService:
         except Exception as e:
             raise Exception(f"LLM服务调用失败: {str(e)}")
     
+    def divide_script_segments(self, segments: Iterable[Tuple[str, int, int]],
+                               system_prompt: str) -> Iterator[Dict[str, Any]]:
+        """
+        逐个片段划分分镜头（生成器）
+        
+        与 ScriptSplitter.iter_split 配合，长篇剧本无需整体读入内存；
+        返回的分镜编号按片段各自从 1 开始，需要连续编号时交给 SceneValidator.stream 重新编号
+        
+        Args:
+            segments: (片段文本, 起始位置, 结束位置) 的可迭代对象
+            system_prompt: 系统提示词
+        
+        Yields:
+            Dict: 分镜头
+        """
+        for text, _, _ in segments:
+            if text.strip():
+                yield from self.divide_script(text, system_prompt)
+    
     def _call_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
         """
         调用LLM API
@@ -0,0 +1,162 @@
+"""
+LLM 视觉元素提取测试（混合模式的置信度门控、按窗口批量提取）
+"""
+
+import json
+import re
+
+import pytest
+
+from utils.prompt_generator import ImagePromptGenerator
+
+# 规则提取置信度为 1（动作、姿势、表情都直接命中关键词；纯空镜）
+CONFIDENT = [
+    {"scene_number": 1, "scene_description": "小明握拳站立，愤怒地大喊", "characters": ["小明"], "mood": "愤怒"},
+    {"scene_number": 2, "scene_description": "空旷的街道，路灯闪烁", "characters": []},
+]
+# 规则提取置信度为 0（只能使用默认值）
+UNCERTAIN = [
+    {"scene_number": 3, "scene_description": "小明和小红", "characters": ["小明", "小红"]},
+    {"scene_number": 4, "scene_description": "老王与小红", "characters": ["老王", "小红"]},
+]
+
+
+class ExtractionLLMService:
+    """模拟 LLM 服务：记录单个分镜提取请求的描述，返回以描述为动作的 JSON"""
+
+    def __init__(self):
+        self.extracted = []
+
+    def _call_llm(self, messages, temperature=0.3):
+        description = re.search(r"\*\*描述\*\*：(.*)", messages[-1]["content"]).group(1)
+        self.extracted.append(description)
+        return json.dumps({"subject": {"action": f"LLM:{description}"}}, ensure_ascii=False)
+
+
+def hybrid_generator(llm_service, **config):
+    return ImagePromptGenerator(
+        dict({"language": "chinese", "use_llm": True, "llm_mode": "hybrid", "near_duplicate_threshold": 0}, **config),
+        llm_service=llm_service
+    )
+
+
+def test_confidence_scores():
+    generator = ImagePromptGenerator({"language": "chinese"})
+    assert [generator._rule_extraction_confidence(scene) for scene in CONFIDENT] == [1.0, 1.0]
+    assert [generator._rule_extraction_confidence(scene) for scene in UNCERTAIN] == [0.0, 0.0]
+
+
+def test_only_uncertain_scenes_reach_the_llm():
+    llm_service = ExtractionLLMService()
+    generator = hybrid_generator(llm_service)
+    scenes = CONFIDENT + UNCERTAIN
+
+    for scene in scenes:
+        elements = generator._extract_visual_elements(scene, scenes)
+        assert ("llm_extracted" in elements) == (scene in UNCERTAIN)
+    assert llm_service.extracted == [scene["scene_description"] for scene in UNCERTAIN]
+    assert generator.last_batch_stats["llm_requests_avoided"] == len(CONFIDENT)
+
+    generator.generate_batch(scenes)
+    assert generator.last_batch_stats["llm_requests"] == len(UNCERTAIN)
+    assert generator.last_batch_stats["llm_requests_avoided"] == len(CONFIDENT)
+
+
+@pytest.mark.parametrize("threshold, expected", [
+    (0, []),
+    (1, [scene["scene_description"] for scene in CONFIDENT + UNCERTAIN]),
+])
+def test_threshold_extremes_degrade_to_rule_or_full_mode(threshold, expected):
+    llm_service = ExtractionLLMService()
+    generator = hybrid_generator(llm_service, llm_confidence_threshold=threshold)
+    generator.generate_batch(CONFIDENT + UNCERTAIN)
+    assert llm_service.extracted == expected
+
+
+def test_full_mode_ignores_confidence():
+    llm_service = ExtractionLLMService()
+    generator = hybrid_generator(llm_service, llm_mode="full")
+    generator.generate_batch(CONFIDENT + UNCERTAIN)
+    assert len(llm_service.extracted) == len(CONFIDENT + UNCERTAIN)
+    assert generator.last_batch_stats["llm_requests_avoided"] == 0
+
+
+class BatchLLMService(ExtractionLLMService):
+    """模拟 LLM 服务：批量请求按倒序返回各分镜的结果（检查按 index 对应），也可以返回格式错误的响应"""
+
+    def __init__(self, response=None):
+        super().__init__()
+        self.batches = []
+        self.response = response
+
+    def _call_llm(self, messages, temperature=0.3):
+        content = messages[-1]["content"]
+        if "### 分镜" not in content:
+            return super()._call_llm(messages, temperature)
+        items = re.findall(r"### 分镜 (\d+)\n\*\*人物\*\*：.*\n\*\*描述\*\*：(.*)", content)
+        self.batches.append([description for _, description in items])
+        if self.response is not None:
+            return self.response
+        entries = [{"index": int(index), "subject": {"action": f"LLM:{description}"}} for index, description in items]
+        return json.dumps(entries[::-1], ensure_ascii=False)
+
+
+def numbered_scenes(count):
+    return [
+        {"scene_number": index + 1, "scene_description": f"第{index + 1}个人物出场", "characters": ["小明"]}
+        for index in range(count)
+    ]
+
+
+def extracted_actions(generator, scenes):
+    """各分镜使用的 LLM 提取结果中的动作（None 表示没有 LLM 结果）"""
+    actions = []
+    original = generator._extract_visual_elements
+
+    def recording(scene, context_scenes=None):
+        elements = original(scene, context_scenes)
+        actions.append(elements.get("llm_extracted", {}).get("subject", {}).get("action"))
+        return elements
+
+    generator._extract_visual_elements = recording
+    generator.generate_batch(scenes)
+    return actions
+
+
+def test_one_request_per_window():
+    llm_service = BatchLLMService()
+    generator = hybrid_generator(llm_service, llm_mode="full", llm_batch_size=2)
+    scenes = numbered_scenes(5)
+
+    actions = extracted_actions(generator, scenes)
+    descriptions = [scene["scene_description"] for scene in scenes]
+    assert llm_service.batches == [descriptions[0:2], descriptions[2:4]]
+    # 最后只剩一个分镜的窗口不发批量请求，单独提取
+    assert llm_service.extracted == [descriptions[4]]
+    assert generator.last_batch_stats["llm_requests"] == 3
+    # 倒序返回的批量结果按 index 对应回各自的分镜
+    assert actions == [f"LLM:{description}" for description in descriptions]
+
+
+def test_malformed_batch_falls_back_to_single_requests():
+    llm_service = BatchLLMService(response="抱歉，无法完成")
+    generator = hybrid_generator(llm_service, llm_mode="full", llm_batch_size=3)
+    scenes = numbered_scenes(3)
+
+    with pytest.warns(UserWarning):
+        actions = extracted_actions(generator, scenes)
+    descriptions = [scene["scene_description"] for scene in scenes]
+    assert llm_service.batches == [descriptions]
+    assert llm_service.extracted == descriptions
+    assert actions == [f"LLM:{description}" for description in descriptions]
+
+
+def test_missing_batch_entries_are_retried_individually():
+    scenes = numbered_scenes(3)
+    response = json.dumps([{"index": 2, "subject": {"action": "batch"}}, {"index": 3, "scene": {}}])
+    llm_service = BatchLLMService(response=response)
+    generator = hybrid_generator(llm_service, llm_mode="full", llm_batch_size=3)
+
+    actions = extracted_actions(generator, scenes)
+    assert actions == [f"LLM:{scenes[0]['scene_description']}", "batch", f"LLM:{scenes[2]['scene_description']}"]
+    assert llm_service.extracted == [scenes[0]["scene_description"], scenes[2]["scene_description"]]
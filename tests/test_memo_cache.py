@@ -0,0 +1,84 @@
+"""
+有界记忆化缓存和提示词分区缓存测试
+"""
+
+import itertools
+
+import pytest
+
+from utils.memo_cache import MemoCache
+from utils.prompt_generator import MEMOIZED_SECTION_FIELDS, SECTION_MEMO, ImagePromptGenerator
+
+
+def test_get_or_build_caches_and_counts():
+    cache = MemoCache(maxsize=4)
+    calls = []
+    build = lambda value: (lambda: calls.append(value) or value * 2)
+    assert cache.get_or_build("a", build(1)) == 2
+    assert cache.get_or_build("a", build(100)) == 2
+    assert calls == [1]
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 4, "hit_rate": 0.5}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MemoCache(maxsize=2)
+    cache.get_or_build("a", lambda: 1)
+    cache.get_or_build("b", lambda: 2)
+    cache.get_or_build("a", lambda: 0)  # a 变为最近使用
+    cache.get_or_build("c", lambda: 3)  # 淘汰 b
+    assert cache.get_or_build("a", lambda: "rebuilt") == 1
+    assert cache.get_or_build("b", lambda: "rebuilt") == "rebuilt"
+    assert cache.stats()["size"] == 2
+
+
+def test_unhashable_key_is_built_without_caching():
+    cache = MemoCache()
+    assert cache.get_or_build(["unhashable"], lambda: 1) == 1
+    assert cache.get_or_build(["unhashable"], lambda: 2) == 2
+    assert cache.stats()["size"] == 0
+    cache.clear()
+    assert cache.stats()["misses"] == 0
+
+
+SECTION_BUILDERS = {
+    "composition": "_build_composition",
+    "lighting": "_build_lighting",
+    "camera_technical": "_build_camera_technical",
+    "visual_style": "_build_visual_style",
+}
+
+
+@pytest.mark.parametrize("language", ["chinese", "english", "bilingual"])
+def test_memoized_sections_equal_fresh_builds(language):
+    """缓存键覆盖了构建函数读取的所有字段：任何字段组合下缓存结果都与直接构建相同"""
+    SECTION_MEMO.clear()
+    generator = ImagePromptGenerator({"language": language})
+    variations = itertools.product(
+        ["特写", "中景", "大远景"], ["视平", "低位仰拍"], ["引导", ""], ["白天", "夜晚", "黄昏"],
+        ["焦虑", "温馨", ""], ["ARRI Alexa", "IMAX 70mm"], ["f/1.4", "f/5.6"]
+    )
+    for shot_size, angle, tension, time, mood, camera, aperture in variations:
+        scene = {"shot_size": shot_size, "camera_angle": angle, "composition_tension": tension,
+                 "time": time, "mood": mood, "camera": camera, "aperture": aperture,
+                 "lens": "Cooke Anamorphic", "lens_focal_length": "广角(24-35mm)"}
+        for name, builder_name in SECTION_BUILDERS.items():
+            builder = getattr(generator, builder_name)
+            cached = generator._memoized_section(name, builder, scene)
+            assert cached.frozen
+            assert cached == builder(scene), (name, scene)
+    stats = ImagePromptGenerator.section_cache_stats()
+    assert stats["hits"] > 0
+    assert set(MEMOIZED_SECTION_FIELDS) == set(SECTION_BUILDERS)
+
+
+def test_shared_section_is_read_only_in_results():
+    generator = ImagePromptGenerator({"language": "chinese"})
+    scene = {"scene_description": "小明看着窗外", "shot_size": "特写", "camera_angle": "视平", "characters": ["小明"]}
+    first = generator.generate_prompt(dict(scene, scene_number=1))
+    second = generator.generate_prompt(dict(scene, scene_number=2))
+    assert first["prompt_json"]["composition"] is second["prompt_json"]["composition"]
+    with pytest.raises(TypeError):
+        first["prompt_json"]["composition"]["shot_size"] = "远景"
+    edited = first["prompt_json"].copy()
+    edited["composition"]["shot_size"] = "远景"
+    assert second["prompt_json"]["composition"]["shot_size"] != "远景"
@@ -0,0 +1,107 @@
+"""
+紧凑项目文件格式（分段压缩容器）测试
+"""
+
+import json
+
+import pytest
+
+from utils.project_container import (
+    CONTAINER_SUFFIX, LAZY_SECTIONS, LazyProject, encode_container, is_container, read_container
+)
+from utils.project_journal import atomic_write
+from utils.project_manager import ProjectManager
+
+PROJECT = {
+    "project_name": "容器项目",
+    "created_at": "2025-01-01T00:00:00",
+    "updated_at": "2025-01-02T00:00:00",
+    "script": "第一场 夜 街道\n" * 50,
+    "scenes": [{"scene_number": 1, "scene_description": "街道"}],
+    "image_prompts": [{"scene_number": 1, "prompt": "a street at night"}],
+    "registry": None,
+    "translation_memory": {"entries": {}},
+    "metadata": {"style": "写实"}
+}
+
+
+@pytest.fixture
+def container_file(tmp_path):
+    filepath = tmp_path / f"项目{CONTAINER_SUFFIX}"
+    atomic_write(filepath, encode_container(PROJECT))
+    return filepath
+
+
+def test_round_trip_decompresses_lazily(container_file):
+    assert is_container(container_file)
+    project = read_container(container_file)
+    assert isinstance(project, LazyProject)
+
+    # 字段检查和迭代不会解压延迟分段
+    assert set(project) == set(PROJECT)
+    assert "script" in project and project.raw_section("script") is not None
+    assert project["scenes"] == PROJECT["scenes"]
+
+    assert project["script"] == PROJECT["script"]
+    assert project.raw_section("script") is None
+    assert project.raw_section("image_prompts") is not None
+
+    assert project == PROJECT
+    assert project.to_json() == PROJECT
+    assert all(project.raw_section(key) is None for key in LAZY_SECTIONS)
+
+
+def test_rewrite_copies_untouched_sections(container_file):
+    project = read_container(container_file)
+    raw_prompts = project.raw_section("image_prompts")
+    project["scenes"] = project["scenes"] + [{"scene_number": 2, "scene_description": "屋内"}]
+    project["metadata"]["status"] = "draft"
+
+    data = encode_container(project)
+    assert raw_prompts in data
+    assert project.raw_section("image_prompts") == raw_prompts
+
+    atomic_write(container_file, data)
+    reloaded = read_container(container_file).to_json()
+    assert len(reloaded["scenes"]) == 2
+    assert reloaded["metadata"] == {"style": "写实", "status": "draft"}
+    assert reloaded["image_prompts"] == PROJECT["image_prompts"]
+
+
+def test_mutations_drop_pending_sections(container_file):
+    project = read_container(container_file)
+    project["script"] = "新剧本"
+    del project["translation_memory"]
+    project.update(registry={"characters": {}})
+
+    assert "translation_memory" not in project
+    assert project.pop("image_prompts") == PROJECT["image_prompts"]
+    expected = dict(PROJECT, script="新剧本", registry={"characters": {}})
+    del expected["translation_memory"], expected["image_prompts"]
+    assert project.to_json() == expected
+
+
+def test_json_files_are_not_containers(tmp_path):
+    filepath = tmp_path / "项目.json"
+    filepath.write_text(json.dumps(PROJECT, ensure_ascii=False), encoding="utf-8")
+    assert not is_container(filepath)
+    with pytest.raises(ValueError):
+        read_container(filepath)
+
+
+def test_manager_keeps_container_format(tmp_path):
+    manager = ProjectManager(str(tmp_path), file_format="container")
+    filepath = manager.save_project("容器项目", PROJECT["script"], PROJECT["scenes"],
+                                    image_prompts=PROJECT["image_prompts"])
+    assert filepath.endswith(CONTAINER_SUFFIX)
+    assert is_container(filepath)
+
+    scenes = PROJECT["scenes"] + [{"scene_number": 2, "scene_description": "屋内"}]
+    assert manager.update_project(filepath, scenes=scenes)
+    assert manager.compact_project(filepath)
+    assert is_container(filepath)
+
+    # 默认格式的管理器同样可以加载容器文件
+    project = ProjectManager(str(tmp_path)).load_project(filepath)
+    assert project["scenes"] == scenes
+    assert project["image_prompts"] == PROJECT["image_prompts"]
@@ -0,0 +1,98 @@
+"""
+项目版本历史（增量压缩）测试
+"""
+
+import copy
+
+import pytest
+
+from utils.project_history import VERSION_CHECKPOINT_INTERVAL, ProjectHistory
+from utils.project_manager import ProjectManager
+
+
+def revision(number):
+    """第 number 个版本的项目数据：每个版本改写一个分镜，偶尔增删分镜、修改剧本"""
+    scene_count = 5 + number % 3
+    return {
+        "project_name": "项目",
+        "script": f"剧本第{number // 4}稿",
+        "scenes": [
+            {"scene_number": index + 1, "scene_description": f"分镜{index}-{number if index == number % 5 else 0}"}
+            for index in range(scene_count)
+        ],
+        "image_prompts": [{"scene_number": 1, "prompt": f"prompt {number // 10}"}],
+        "metadata": {"revision": number}
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ProjectHistory(tmp_path / "项目.json.versions")
+    for number in range(1, 2 * VERSION_CHECKPOINT_INTERVAL + 3):
+        history.save_version(revision(number), label=f"v{number}")
+    return history
+
+
+def test_every_version_rebuilds_exactly(history):
+    versions = history.list_versions()
+    assert [version["version"] for version in versions] == list(range(1, 2 * VERSION_CHECKPOINT_INTERVAL + 3))
+    for version in versions:
+        assert history.load_version(version["version"]) == revision(version["version"])
+    assert history.load_version() == revision(versions[-1]["version"])
+    # 新的实例（不使用缓存的最新状态）恢复的结果相同
+    assert ProjectHistory(history.path).load_version(VERSION_CHECKPOINT_INTERVAL + 7) == \
+        revision(VERSION_CHECKPOINT_INTERVAL + 7)
+
+
+def test_checkpoints_and_headers(history):
+    versions = history.list_versions()
+    checkpoints = [version["version"] for version in versions if version["checkpoint"]]
+    assert checkpoints == [1, VERSION_CHECKPOINT_INTERVAL + 1, 2 * VERSION_CHECKPOINT_INTERVAL + 1]
+
+    second = versions[1]
+    assert second["label"] == "v2"
+    assert second["scene_count"] == len(revision(2)["scenes"])
+    assert second["prompt_count"] == 1
+    # 版本 2 还原了版本 1 改写的分镜、改写了另一个分镜，并新增了一个分镜
+    assert second["changed_scenes"] == 3
+    assert second["changed_prompts"] == 0
+    assert all(not key.startswith("_") for key in second)
+
+    with pytest.raises(KeyError):
+        history.load_version(999)
+
+
+def test_deltas_are_smaller_than_checkpoints(history):
+    headers, _ = history._read_headers()
+    checkpoint_size = headers[0]["_length"]
+    assert all(header["_length"] < checkpoint_size for header in headers if not header["checkpoint"])
+
+
+def test_torn_tail_is_truncated_on_next_save(tmp_path):
+    path = tmp_path / "项目.json.versions"
+    history = ProjectHistory(path)
+    history.save_version(revision(1))
+    history.save_version(revision(2))
+    size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00\xff\x00\x00\x00{\"version\"")
+
+    assert [version["version"] for version in history.list_versions()] == [1, 2]
+    history.save_version(revision(3))
+    assert [version["version"] for version in history.list_versions()] == [1, 2, 3]
+    assert path.stat().st_size > size
+    assert ProjectHistory(path).load_version(3) == revision(3)
+
+
+def test_manager_versions_follow_updates(tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    first = revision(1)
+    filepath = manager.save_project("项目", first["script"], first["scenes"])
+    original = copy.deepcopy(manager.load_project(filepath))
+
+    second = revision(2)
+    info = manager.save_version(filepath, label="改写", scenes=second["scenes"])
+    assert info["version"] == 2
+    assert [version["label"] for version in manager.list_versions(filepath)] == ["", "改写"]
+    assert manager.load_version(filepath, 1) == original
+    assert manager.load_version(filepath)["scenes"] == second["scenes"]
@@ -0,0 +1,128 @@
+"""
+原子写入和追加式修改日志测试
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from utils.project_journal import (
+    JOURNAL_COMPACT_ENTRIES, append_journal, apply_journal_entry, atomic_write, diff_rows, dumps_row,
+    journal_path, load_project_file, read_journal
+)
+from utils.project_manager import ProjectManager
+
+
+def scenes(*descriptions):
+    return [{"scene_number": index + 1, "scene_description": text} for index, text in enumerate(descriptions)]
+
+
+def test_atomic_write_replaces_whole_file(tmp_path):
+    filepath = tmp_path / "项目.json"
+    atomic_write(filepath, b"old")
+    atomic_write(filepath, "新内容".encode("utf-8"))
+    assert filepath.read_text(encoding="utf-8") == "新内容"
+    assert [path.name for path in tmp_path.iterdir()] == ["项目.json"]
+
+
+def test_atomic_write_keeps_old_file_on_failure(tmp_path, monkeypatch):
+    filepath = tmp_path / "项目.json"
+    atomic_write(filepath, b"old")
+
+    def interrupted(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("utils.project_journal.os.replace", interrupted)
+    with pytest.raises(OSError):
+        atomic_write(filepath, b"new")
+    assert filepath.read_bytes() == b"old"
+    assert not journal_path(filepath).exists()
+    assert [path.name for path in tmp_path.iterdir()] == ["项目.json"]
+
+
+def test_diff_rows_records_changed_and_truncated_rows():
+    old = scenes("甲", "乙", "丙")
+    rows, change = diff_rows([dumps_row(item) for item in old], scenes("甲", "丁"))
+    assert change == {"length": 2, "rows": {"1": {"scene_number": 2, "scene_description": "丁"}}}
+    assert rows == [dumps_row(item) for item in scenes("甲", "丁")]
+
+
+def test_replay_is_idempotent():
+    project = {"scenes": scenes("甲", "乙", "丙"), "metadata": {"style": "写实"}}
+    _, change = diff_rows([dumps_row(item) for item in project["scenes"]], scenes("甲", "丁"))
+    entry = {"set": {"script": "新剧本"}, "rows": {"scenes": change},
+             "metadata": {"status": "draft"}, "updated_at": "2025-01-02T00:00:00"}
+
+    apply_journal_entry(project, entry)
+    once = json.loads(dumps_row(project))
+    apply_journal_entry(project, entry)
+    assert project == once
+    assert project["scenes"] == scenes("甲", "丁")
+    assert project["metadata"] == {"style": "写实", "status": "draft"}
+
+
+def test_torn_line_is_skipped_and_next_append_starts_a_new_line(tmp_path):
+    path = tmp_path / "项目.json.journal"
+    append_journal(path, {"set": {"script": "一"}})
+    with open(path, "ab") as f:
+        f.write(b'{"set":{"script":"\xe4\xba')
+    assert read_journal(path) == [{"set": {"script": "一"}}]
+
+    append_journal(path, {"set": {"script": "三"}})
+    assert read_journal(path) == [{"set": {"script": "一"}}, {"set": {"script": "三"}}]
+    assert read_journal(tmp_path / "不存在.journal") == []
+
+
+def test_updates_are_journaled_and_replayed(tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    filepath = manager.save_project("项目", "剧本", scenes("甲", "乙"))
+    snapshot = open(filepath, "rb").read()
+
+    assert manager.update_project(filepath, scenes=scenes("甲", "乙改"))
+    assert manager.update_project(filepath, script="新剧本", metadata={"status": "draft"})
+    # 更新只追加日志，快照不变；未变化的行不写入日志
+    assert open(filepath, "rb").read() == snapshot
+    entries = read_journal(journal_path(filepath))
+    assert list(entries[0]["rows"]["scenes"]["rows"]) == ["1"]
+
+    project, count = load_project_file(filepath)
+    assert count == 2
+    assert project["scenes"] == scenes("甲", "乙改")
+    assert project["script"] == "新剧本"
+    # 另一个进程（新的管理器）看到相同的内容
+    assert ProjectManager(str(tmp_path)).load_project(filepath) == project
+
+
+def test_compaction_merges_journal_into_snapshot(tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    filepath = manager.save_project("项目", "剧本", scenes("甲"))
+    for index in range(JOURNAL_COMPACT_ENTRIES - 1):
+        assert manager.update_project(filepath, script=f"第{index}稿")
+    assert len(read_journal(journal_path(filepath))) == JOURNAL_COMPACT_ENTRIES - 1
+
+    # 达到 JOURNAL_COMPACT_ENTRIES 条时自动合并
+    assert manager.update_project(filepath, scenes=scenes("甲", "乙"))
+    assert not journal_path(filepath).exists()
+    with open(filepath, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["script"] == f"第{JOURNAL_COMPACT_ENTRIES - 2}稿"
+    assert snapshot["scenes"] == scenes("甲", "乙")
+
+
+def test_journaled_update_moves_project_to_top(tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    older = manager.save_project("甲", "剧本", scenes("甲"))
+    newer = manager.save_project("乙", "剧本", scenes("乙"))
+    now = time.time()
+    os.utime(older, (now - 200, now - 200))
+    os.utime(newer, (now - 100, now - 100))
+    assert [project["filepath"] for project in manager.list_projects()] == [newer, older]
+
+    # 更新只追加日志（不合并），快照的修改时间不变
+    assert manager.update_project(older, scenes=scenes("甲改"))
+    assert journal_path(older).exists()
+    projects = manager.list_projects()
+    assert [project["filepath"] for project in projects] == [older, newer]
+    assert projects[0]["modified_time"] > projects[1]["modified_time"]
@@ -0,0 +1,96 @@
+"""
+SQLite 项目存储测试
+"""
+
+from utils.project_manager import ProjectManager
+from utils.project_store import SQLiteProjectStore
+
+
+def scene(number, description):
+    return {"scene_number": number, "scene_description": description, "location": "街道"}
+
+
+def test_import_replays_unmerged_journal(tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    filepath = manager.save_project("旧项目", "剧本", [scene(1, "开场"), scene(2, "对话")])
+    edited = [scene(1, "开场"), scene(2, "争吵"), scene(3, "离开")]
+    assert manager.update_project(filepath, scenes=edited, metadata={"status": "draft"})
+
+    store = SQLiteProjectStore(str(tmp_path / "shared" / "projects.db"))
+    (project_id,) = store.import_json_dir(str(tmp_path))
+    project = store.load_project(project_id)
+    assert project["scenes"] == edited
+    assert project["metadata"] == {"status": "draft"}
+    # 已导入的文件不再导入
+    assert store.import_json_dir(str(tmp_path)) == []
+
+
+def test_import_container_files(tmp_path):
+    manager = ProjectManager(str(tmp_path), file_format="container")
+    filepath = manager.save_project("容器项目", "很长的剧本", [scene(1, "开场")],
+                                    image_prompts=[{"scene_number": 1, "prompt": "street"}])
+    assert filepath.endswith(".sbproj")
+    assert manager.update_project(filepath, script="改过的剧本")
+
+    sqlite_manager = ProjectManager(str(tmp_path), backend="sqlite")
+    (project,) = sqlite_manager.list_projects()
+    data = sqlite_manager.load_project(project["filepath"])
+    assert data["project_name"] == "容器项目"
+    assert data["script"] == "改过的剧本"
+    assert data["image_prompts"] == [{"scene_number": 1, "prompt": "street"}]
+
+
+def test_round_trip_and_row_updates(tmp_path):
+    store = SQLiteProjectStore(str(tmp_path / "projects.db"))
+    scenes = [scene(index + 1, f"分镜{index}") for index in range(4)]
+    prompts = [{"scene_number": 1, "prompt": "a street at night"}]
+    project_id = store.save_project("项目", "剧本", scenes, image_prompts=prompts,
+                                    metadata={"style": "写实"}, registry={"characters": {}},
+                                    created_at="2025-01-01T00:00:00")
+
+    project = store.load_project(project_id)
+    assert project["scenes"] == scenes
+    assert project["image_prompts"] == prompts
+    assert project["registry"] == {"characters": {}}
+    assert project["translation_memory"] is None
+    assert project["created_at"] == "2025-01-01T00:00:00"
+
+    # 缩短列表时多余的行被删除；元数据合并
+    shorter = scenes[:2] + [scene(3, "改写")]
+    assert store.update_project(project_id, scenes=shorter, metadata={"status": "done"})
+    assert store.update_scene(project_id, 0, scene(1, "新开场"))
+    assert not store.update_scene(project_id, 5, scene(6, "不存在"))
+
+    project = store.load_project(project_id)
+    assert [item["scene_description"] for item in project["scenes"]] == ["新开场", "分镜1", "改写"]
+    assert project["metadata"] == {"style": "写实", "status": "done"}
+    assert project["script"] == "剧本"
+
+
+def test_list_rename_and_delete(tmp_path):
+    store = SQLiteProjectStore(str(tmp_path / "projects.db"))
+    first = store.save_project("甲", "一二三", [scene(1, "开场")], updated_at="2025-01-01T00:00:00")
+    second = store.save_project("乙", "", [], image_prompts=[{"prompt": "x"}], updated_at="2025-02-01T00:00:00")
+
+    listed = store.list_projects()
+    assert [project["id"] for project in listed] == [second, first]
+    assert listed[1]["script_length"] == 3
+    assert listed[1]["scene_count"] == 1
+    assert listed[0]["prompt_count"] == 1
+
+    assert store.rename_project(first, "甲2")
+    assert store.load_project(first)["project_name"] == "甲2"
+    assert store.delete_project(second)
+    assert not store.delete_project(second)
+    assert not store.update_project(second, script="x")
+    assert [project["id"] for project in store.list_projects()] == [first]
+
+
+def test_deleted_imports_are_not_imported_again(tmp_path):
+    ProjectManager(str(tmp_path)).save_project("旧项目", "剧本", [scene(1, "开场")])
+    manager = ProjectManager(str(tmp_path), backend="sqlite")
+    (project,) = manager.list_projects()
+    assert project["filepath"].startswith("sqlite:")
+    assert manager.delete_project(project["filepath"])
+
+    assert ProjectManager(str(tmp_path), backend="sqlite").list_projects() == []
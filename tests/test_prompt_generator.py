@@ -0,0 +1,221 @@
+"""
+规则模式提示词生成测试（增量生成、并行生成、分区缓存、逐个生成、近似重复分镜）
+"""
+
+import pytest
+
+from utils.prompt_generator import ImagePromptGenerator
+
+
+def make_scene(number: int, description: str, **fields) -> dict:
+    scene = {
+        "scene_number": number,
+        "scene_description": description,
+        "characters": ["小明"],
+        "location": "咖啡馆",
+        "time": "白天",
+        "mood": "焦虑",
+        "shot_size": "中景",
+        "camera_angle": "视平",
+        "lens_focal_length": "标准(35-50mm)",
+        "camera": "ARRI Alexa",
+        "lens": "ARRI Master Primes",
+        "aperture": "f/2.8",
+        "composition_tension": "引导",
+    }
+    scene.update(fields)
+    return scene
+
+
+DESCRIPTIONS = [
+    "小明坐在窗边，焦虑地看着手机，眉头紧锁",
+    "小明站在门口，穿着黑色风衣，手里拿着钥匙",
+    "空镜，城市天空，乌云密布",
+    "小明转身离开，留下一个背影，阳光洒在街道上",
+    "雨天，小明撑着伞走在街道上，灯光昏暗",
+    "小明愤怒地拍桌子，怒目而视",
+]
+
+
+@pytest.fixture
+def scenes():
+    shot_sizes = ["中景", "特写", "远景", "近景"]
+    times = ["白天", "夜晚", "黄昏"]
+    return [
+        make_scene(i + 1, DESCRIPTIONS[i % len(DESCRIPTIONS)],
+                   shot_size=shot_sizes[i % len(shot_sizes)], time=times[i % len(times)])
+        for i in range(24)
+    ]
+
+
+def plain(results):
+    """去掉对象差异，便于逐字段比较"""
+    return [
+        {**result, "prompt_json": result["prompt_json"].to_json() if result.get("prompt_json") else None}
+        for result in results
+    ]
+
+
+# ---------- 增量生成（内容哈希） ----------
+
+def test_unchanged_scenes_are_reused(scenes):
+    generator = ImagePromptGenerator({"language": "chinese"})
+    first = generator.generate_batch(scenes)
+    assert generator.last_batch_stats["generated"] == len(scenes)
+
+    edited = [dict(scene) for scene in scenes]
+    edited[3]["scene_description"] = "小明推开门，走进昏暗的房间"
+    second = generator.generate_batch(edited, previous_prompts=first)
+
+    assert generator.last_batch_stats["reused"] == len(scenes) - 1
+    assert generator.last_batch_stats["generated"] == 1
+    assert all(second[i] is first[i] for i in range(len(scenes)) if i != 3)
+    assert second[3]["scene_description"] == "小明推开门，走进昏暗的房间"
+    assert plain([second[3]]) == plain([ImagePromptGenerator({"language": "chinese"}).generate_prompt(edited[3])])
+
+
+def test_content_hash_tracks_relevant_fields_and_config(scenes):
+    generator = ImagePromptGenerator({"language": "chinese"})
+    scene = scenes[0]
+    content_hash = generator.scene_content_hash(scene)
+    assert generator.scene_content_hash(dict(scene)) == content_hash
+    # 不影响提示词的字段不改变哈希
+    assert generator.scene_content_hash({**scene, "sound_effects": "雷声"}) == content_hash
+    assert generator.scene_content_hash({**scene, "mood": "温馨"}) != content_hash
+    assert ImagePromptGenerator({"language": "english"}).scene_content_hash(scene) != content_hash
+
+
+def test_config_change_and_errors_are_not_reused(scenes):
+    first = ImagePromptGenerator({"language": "chinese"}).generate_batch(scenes)
+    english = ImagePromptGenerator({"language": "english"})
+    english.generate_batch(scenes, previous_prompts=first)
+    assert english.last_batch_stats["reused"] == 0
+
+    generator = ImagePromptGenerator({"language": "chinese"})
+    failed = [dict(result, error="超时") for result in first]
+    generator.generate_batch(scenes, previous_prompts=failed)
+    assert generator.last_batch_stats["reused"] == 0
+
+
+# ---------- 多进程并行生成 ----------
+
+def _long_batch(count: int = 120) -> list:
+    """足够多的分镜（并行生成每个进程至少 PARALLEL_MIN_CHUNK_SIZE 个），每隔几个分镜有一个只差标点的近似重复"""
+    scenes = []
+    for i in range(count):
+        description = DESCRIPTIONS[(i // 3) % len(DESCRIPTIONS)] + "，桌上放着咖啡杯和笔记本" + "。" * (i % 3)
+        scenes.append(make_scene(i + 1, description, shot_size=["中景", "特写"][(i // 3) % 2]))
+    return scenes
+
+
+@pytest.mark.parametrize("config", [
+    {"language": "bilingual"},
+    {"language": "english", "near_duplicate_threshold": 0.8},
+    {"language": "chinese", "multilingual": True, "near_duplicate_threshold": 0.8},
+])
+def test_parallel_matches_serial(config):
+    scenes = _long_batch()
+    serial = ImagePromptGenerator(config)
+    expected = serial.generate_batch(scenes)
+    parallel = ImagePromptGenerator(config)
+    results = parallel.generate_batch(scenes, workers=2)
+    assert plain(results) == plain(expected)
+    assert parallel.last_batch_stats == serial.last_batch_stats
+    if config.get("near_duplicate_threshold"):
+        assert serial.last_batch_stats["deduplicated"] > 0
+
+
+def test_parallel_incremental_reuse():
+    scenes = _long_batch()
+    generator = ImagePromptGenerator({"language": "chinese"})
+    first = generator.generate_batch(scenes, workers=2)
+    edited = [dict(scene) for scene in scenes]
+    edited[7]["mood"] = "温馨"
+    second = generator.generate_batch(edited, previous_prompts=first, workers=2)
+    assert generator.last_batch_stats["reused"] == len(scenes) - 1
+    assert plain(second) == plain(ImagePromptGenerator({"language": "chinese"}).generate_batch(edited))
+
+
+# ---------- 逐个生成（generate_iter） ----------
+
+def test_generate_iter_matches_batch_and_reports_progress(scenes):
+    expected = ImagePromptGenerator({"language": "bilingual"}).generate_batch(scenes)
+    previous = expected[:5]
+    progress = []
+    generator = ImagePromptGenerator({"language": "bilingual"})
+    results = list(generator.generate_iter(scenes, previous_prompts=previous, progress_callback=progress.append))
+
+    assert plain(results) == plain(expected)
+    assert [item["done"] for item in progress] == list(range(1, len(scenes) + 1))
+    assert all(item["total"] == len(scenes) for item in progress)
+    assert [item["scene_number"] for item in progress] == [scene["scene_number"] for scene in scenes]
+    assert progress[-1]["reused"] == 5 and progress[-1]["errors"] == 0
+    assert progress[-1]["eta"] == 0
+    assert generator.last_batch_stats["generated"] == len(scenes) - 5
+
+
+def test_generate_iter_is_lazy(scenes):
+    generator = ImagePromptGenerator({"language": "chinese"})
+    calls = []
+    original = generator._generate_one
+    generator._generate_one = lambda scene, context=None: calls.append(scene["scene_number"]) or original(scene, context)
+
+    iterator = generator.generate_iter(scenes)
+    first = next(iterator)
+    assert first["scene_number"] == 1
+    assert calls == [1]
+    iterator.close()
+    assert calls == [1]
+
+
+def test_generate_iter_reports_errors_without_stopping(scenes):
+    generator = ImagePromptGenerator({"language": "chinese"})
+    broken = [dict(scene) for scene in scenes[:4]]
+    broken[1]["scene_description"] = object()  # 无法处理的描述
+    progress = []
+    results = list(generator.generate_iter(broken, progress_callback=progress.append))
+    assert len(results) == 4
+    assert "error" in results[1] and results[1]["prompt_json"] is None
+    assert all("error" not in results[i] for i in (0, 2, 3))
+    assert progress[-1]["errors"] == 1
+
+
+# ---------- 近似重复分镜 ----------
+
+def test_near_duplicate_index_clusters_within_block_only():
+    from utils.near_duplicate import NearDuplicateIndex
+
+    index = NearDuplicateIndex(threshold=0.8)
+    text = "小明坐在窗边，焦虑地看着手机，眉头紧锁，桌上放着咖啡杯和笔记本"
+    assert index.find_or_add(0, "a", text) is None
+    assert index.find_or_add(1, "a", text + "。") == 0
+    assert index.find_or_add(2, "b", text) is None
+    assert index.find_or_add(3, "a", "风景优美的山谷，远处有雪山，山脚下是一片金黄的麦田") is None
+
+
+def test_near_duplicates_must_share_time_mood_and_weather():
+    description = "小明坐在窗边，焦虑地看着手机，眉头紧锁，桌上放着咖啡杯和笔记本"
+    scenes = [
+        make_scene(1, description),
+        make_scene(2, description + "。"),
+        make_scene(3, description + "。", time="夜晚"),
+        make_scene(4, description + "。", mood="温馨"),
+        make_scene(5, "雨天，" + description),
+        make_scene(6, "雨天，" + description + "。"),
+    ]
+    config = {"language": "bilingual", "near_duplicate_threshold": 0.8}
+    generator = ImagePromptGenerator(config)
+    results = generator.generate_batch(scenes)
+    # 2 修补自 1，6 修补自 5；3、4 的时间 / 情绪不同，单独生成
+    assert generator.last_batch_stats["deduplicated"] == 2
+    assert generator.last_batch_stats["generated"] == 4
+
+    fresh = ImagePromptGenerator({"language": "bilingual"})
+    for scene, result in zip(scenes, results):
+        expected = fresh.generate_prompt(scene)["prompt_json"]
+        prompt = result["prompt_json"]
+        assert prompt["scene"]["time_of_day"] == expected["scene"]["time_of_day"]
+        assert prompt["scene"].get("weather") == expected["scene"].get("weather")
+        assert prompt["subject"]["pose"] == expected["subject"]["pose"]
+        assert prompt["lighting"] == expected["lighting"]
+        assert result["scene_description"] == scene["scene_description"]
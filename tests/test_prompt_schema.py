@@ -0,0 +1,102 @@
+"""
+提示词紧凑对象（NanoBananaPrompt / PromptSection）测试
+"""
+
+import json
+import pickle
+
+import pytest
+
+from utils.prompt_schema import (
+    CompositionSection, NanoBananaPrompt, SubjectSection, json_default, restore_prompt_objects
+)
+
+
+def _sample_prompt() -> NanoBananaPrompt:
+    prompt = NanoBananaPrompt()
+    prompt["subject"] = SubjectSection(main_character="小明", action="奔跑", props="雨伞")
+    prompt["composition"] = {"shot_size": "中景", "custom_note": "保留"}
+    prompt["negative_constraints"] = ["模糊", "变形"]
+    prompt["extra_field"] = {"any": 1}
+    return prompt
+
+
+def test_to_json_keeps_template_order_and_omits_unset_fields():
+    data = _sample_prompt().to_json()
+    assert list(data) == ["subject", "composition", "spatial_anchors", "negative_constraints", "extra_field"]
+    assert data["subject"] == {"main_character": "小明", "action": "奔跑", "props": "雨伞"}
+    # 未知字段保存在 extras 中，序列化时不丢失
+    assert data["composition"] == {"shot_size": "中景", "custom_note": "保留"}
+
+
+def test_json_round_trip():
+    data = _sample_prompt().to_json()
+    restored = NanoBananaPrompt.from_json(json.loads(json.dumps(data)))
+    assert isinstance(restored["composition"], CompositionSection)
+    assert restored.to_json() == data
+    assert restored == data
+
+
+def test_json_default_serializes_nested_objects():
+    prompt = _sample_prompt()
+    encoded = json.dumps({"prompt_json": prompt}, ensure_ascii=False, default=json_default)
+    assert json.loads(encoded) == {"prompt_json": prompt.to_json()}
+    with pytest.raises(TypeError):
+        json.dumps({"value": object()}, default=json_default)
+
+
+def test_copy_is_independent():
+    prompt = _sample_prompt()
+    copied = prompt.copy()
+    copied["subject"]["action"] = "停下"
+    copied["negative_constraints"].append("水印")
+    copied["composition"]["custom_note"] = "修改"
+    assert prompt["subject"]["action"] == "奔跑"
+    assert prompt["negative_constraints"] == ["模糊", "变形"]
+    assert prompt["composition"]["custom_note"] == "保留"
+
+
+def test_frozen_section_is_read_only_until_copied():
+    section = CompositionSection(shot_size="特写").freeze()
+    with pytest.raises(TypeError):
+        section["shot_size"] = "远景"
+    with pytest.raises(TypeError):
+        section["custom"] = "x"
+    copied = section.copy()
+    copied["shot_size"] = "远景"
+    assert not copied.frozen
+    assert section["shot_size"] == "特写"
+
+
+def test_pickle_keeps_values_and_frozen_state():
+    section = CompositionSection(shot_size="特写", framing="居中").freeze()
+    restored = pickle.loads(pickle.dumps(section))
+    assert restored == section
+    assert restored.frozen
+
+
+def test_dict_style_access():
+    section = SubjectSection(main_character="小红")
+    assert section.get("pose", "默认") == "默认"
+    assert "main_character" in section and "pose" not in section
+    with pytest.raises(KeyError):
+        section["pose"]
+    assert not SubjectSection()
+    prompt = _sample_prompt()
+    assert prompt.pop("extra_field") == {"any": 1}
+    assert "extra_field" not in prompt
+
+
+def test_restore_prompt_objects_converts_top_level_and_variants():
+    data = _sample_prompt().to_json()
+    prompts = [{
+        "scene_number": 1,
+        "prompt_json": data,
+        "variants": {"english": {"prompt_json": data, "prompt_text": ""}}
+    }, {"scene_number": 2, "prompt_json": None}]
+    restored = restore_prompt_objects(prompts)
+    assert restored is prompts
+    assert isinstance(prompts[0]["prompt_json"], NanoBananaPrompt)
+    assert isinstance(prompts[0]["variants"]["english"]["prompt_json"], NanoBananaPrompt)
+    assert prompts[0]["prompt_json"] == data
+    assert prompts[1]["prompt_json"] is None
@@ -0,0 +1,55 @@
+"""
+分镜校验测试（批量校验与增量 SceneValidator）
+"""
+
+import pytest
+
+from utils.scene_parser import SceneParser
+
+
+def divided(count, prefix="片段"):
+    """模拟一段剧本的划分结果（各片段的编号都从 1 开始）"""
+    return [
+        {"scene_number": index + 1, "scene_description": f"{prefix}{index}", "shot_size": "特写镜头"}
+        for index in range(count)
+    ]
+
+
+def test_validator_numbers_continuously_across_chunks():
+    validator = SceneParser().validator()
+    first = validator.extend(divided(2, "甲"))
+    single = validator.add({"scene_description": "乙"})
+    rest = list(validator.stream(iter(divided(3, "丙"))))
+
+    numbers = [scene["scene_number"] for scene in first + [single] + rest]
+    assert numbers == [1, 2, 3, 4, 5, 6]
+    assert validator.count == 6
+    assert validator.next_number == 7
+    # 字段按批量校验的规则规范化
+    assert first[0]["shot_size"] == "特写"
+
+
+def test_validator_matches_batch_validation():
+    parser = SceneParser()
+    chunks = [divided(3, "甲"), divided(4, "乙")]
+    streamed = list(parser.validator().stream(scene for chunk in chunks for scene in chunk))
+    assert streamed == parser.validate_scenes(chunks[0] + chunks[1])
+
+
+def test_stream_is_lazy():
+    consumed = []
+
+    def source():
+        for scene in divided(3):
+            consumed.append(scene["scene_description"])
+            yield scene
+
+    stream = SceneParser().validator(start_number=10).stream(source())
+    assert consumed == []
+    assert next(stream)["scene_number"] == 10
+    assert consumed == ["片段0"]
+
+
+def test_extend_rejects_non_list():
+    with pytest.raises(ValueError):
+        SceneParser().validator().extend({"scene_description": "甲"})
@@ -0,0 +1,98 @@
+"""
+剧本分割测试（整体分割、结构感知分割、流式分割）
+"""
+
+import io
+import mmap
+import random
+
+import pytest
+
+from utils.script_splitter import ScriptSplitter
+
+
+def make_script(scene_count: int, seed: int = 7) -> str:
+    """合成剧本：场景标题 + 动作描写 + 人物台词"""
+    rng = random.Random(seed)
+    lines = []
+    for number in range(1, scene_count + 1):
+        lines.append(f"第{number}场 {rng.choice(['客厅', '街道', '办公室'])} {rng.choice(['日', '夜'])} 内")
+        lines.append("")
+        for _ in range(rng.randint(2, 6)):
+            lines.append(rng.choice([
+                "小明推开门，走进昏暗的房间。窗外下着雨，雨点打在玻璃上。",
+                "小红站在窗边，没有回头，手里的咖啡已经凉了。",
+                "远处传来汽笛声，两人都沉默了很久，谁也没有先开口说话。",
+            ]))
+            lines.append(rng.choice(["小明：", "小红（低声）："]))
+            lines.append(rng.choice(["你怎么来了？", "我等你很久了。", "走吧，再不走就来不及了！"]))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def assert_covers(script: str, segments, max_chars: int):
+    assert "".join(text for text, _, _ in segments) == script
+    position = 0
+    for text, start, end in segments:
+        assert start == position and end == start + len(text)
+        assert 0 < len(text) <= max_chars
+        position = end
+
+
+@pytest.mark.parametrize("structure_aware", [False, True])
+def test_split_covers_script_within_limit(structure_aware):
+    script = make_script(40)
+    segments = ScriptSplitter(max_chars=300, structure_aware=structure_aware).split_script(script)
+    assert len(segments) > 1
+    assert_covers(script, segments, 300)
+
+
+def test_short_and_blank_scripts():
+    splitter = ScriptSplitter(max_chars=500)
+    assert splitter.split_script("短剧本") == [("短剧本", 0, 3)]
+    assert splitter.split_script(" \n\t ") == []
+    assert list(splitter.iter_split(io.StringIO(" \n\t "))) == []
+
+
+def test_structure_aware_cuts_before_scene_headings():
+    script = make_script(40)
+    plain = ScriptSplitter(max_chars=400).get_split_info(script)["segments"]
+    info = ScriptSplitter(max_chars=400, structure_aware=True).get_split_info(script)
+    starts_scene = [segment["starts_scene"] for segment in info["segments"]]
+    assert all(segment["text"].startswith("第") for segment, flag in zip(info["segments"], starts_scene) if flag)
+    # 大部分片段从场景标题开始；标点规则分割几乎从不在场景开头切分
+    assert sum(starts_scene) / len(starts_scene) > 0.6
+    assert sum(segment["text"].startswith("第") for segment in plain) / len(plain) < 0.3
+
+
+@pytest.mark.parametrize("structure_aware", [False, True])
+@pytest.mark.parametrize("block_size", [7, 64, 4096])
+def test_iter_split_matches_split_script(tmp_path, structure_aware, block_size):
+    script = make_script(30)
+    splitter = ScriptSplitter(max_chars=250, structure_aware=structure_aware)
+    expected = splitter.split_script(script)
+
+    path = tmp_path / "script.txt"
+    path.write_bytes(script.encode("utf-8"))
+    assert list(splitter.iter_split(path, block_size=block_size)) == expected
+    assert list(splitter.iter_split(io.StringIO(script), block_size=block_size)) == expected
+    # 二进制输入按字节读取，多字节字符跨块时不能被截断
+    assert list(splitter.iter_split(io.BytesIO(script.encode("utf-8")), block_size=block_size)) == expected
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        assert list(splitter.iter_split(mapped, block_size=block_size)) == expected
+
+
+def test_iter_split_is_lazy():
+    script = make_script(200)
+
+    class CountingReader(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            CountingReader.reads += 1
+            return super().read(size)
+
+    reader = CountingReader(script)
+    segments = ScriptSplitter(max_chars=300, structure_aware=True).iter_split(reader, block_size=1024)
+    next(segments)
+    assert CountingReader.reads < len(script) // 1024
@@ -0,0 +1,93 @@
+"""
+双向最大匹配分词和规则模式字典翻译测试
+"""
+
+import re
+
+from utils.prompt_generator import ImagePromptGenerator
+from utils.segmenter import MaxMatchSegmenter, PUNCTUATION_TRANSLATIONS
+
+LEXICON = dict(PUNCTUATION_TRANSLATIONS, **{
+    "研究": "study", "研究生": "graduate student", "生命": "life", "命": "fate",
+    "起源": "origin", "的": "of", "夜晚": "night"
+})
+
+HAN = re.compile(r"[一-鿿]")
+
+
+def test_forward_and_backward_maximum_matching():
+    segmenter = MaxMatchSegmenter(LEXICON)
+    text = "研究生命起源"
+    assert [word for word, _ in segmenter.forward(text)] == ["研究生", "命", "起源"]
+    assert [word for word, _ in segmenter.backward(text)] == ["研究", "生命", "起源"]
+    # 词数相同时单字词少的逆向结果更好
+    assert segmenter.segment(text) == [("研究", "study"), ("生命", "life"), ("起源", "origin")]
+
+
+def test_unknown_runs_are_merged():
+    segmenter = MaxMatchSegmenter(LEXICON)
+    assert segmenter.segment("夜晚小明和小红") == [("夜晚", "night"), ("小明和小红", None)]
+    assert segmenter.segment("") == []
+
+
+def test_translate_complete_refuses_partial_translations():
+    segmenter = MaxMatchSegmenter(LEXICON)
+    assert segmenter.translate_complete("生命的起源。") == "life of origin."
+    # 数字、拉丁字母等未登录片段不算未翻译
+    assert segmenter.translate_complete("夜晚 f/2.8") == "night f/2.8"
+    assert segmenter.translate_complete("夜晚，小明") is None
+    # translate 保留未登录片段，没有任何词条命中时返回原文
+    assert segmenter.translate("夜晚，小明") == "night, 小明"
+    assert segmenter.translate("小明，小红") == "小明，小红"
+
+
+def test_terms_are_translated_completely_or_kept():
+    generator = ImagePromptGenerator({"language": "english"})
+    assert generator._translate_to_english("夜晚") == "night"
+    assert generator._translate_to_english("握拳、挺胸、身体前倾") == "clenched fists, chest out, leaning forward"
+    for term in ["身体前倾、双腿交替、手臂摆动", "她推开门走进昏暗的房间，雨天"]:
+        translation = generator._translate_to_english(term)
+        # 不输出中英混杂的结果：要么完整翻译，要么保留原文
+        assert translation == term or not HAN.search(translation)
+
+
+def test_descriptions_keep_unknown_runs_as_whole_tokens():
+    generator = ImagePromptGenerator({"language": "english"})
+    assert generator._translate_with_dict("小明蹲下捡起地上的笔，抬头环顾四周") == \
+        "小明 squatting 捡起地上的笔, looking up looking around 四周"
+    assert generator._translate_with_dict("夜晚特写") == "night close-up"
+    assert generator._translate_with_dict("完全陌生的词") == "完全陌生的词"
+    # 英文译文不会拼接在中文词中间
+    translation = generator._translate_with_dict("她推开门走进昏暗的房间，雨天")
+    assert not re.search(r"[a-z][一-鿿]|[一-鿿][a-z]", translation)
+
+
+def test_coverage():
+    segmenter = MaxMatchSegmenter(LEXICON)
+    assert segmenter.coverage("生命的起源。") == 1
+    assert segmenter.coverage("夜晚小明") == 0.5
+    assert segmenter.coverage("f/2.8") == 1
+
+
+class RecordingLLMService:
+    """模拟 LLM 服务：记录翻译请求"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def _call_llm(self, messages, temperature=0.3):
+        self.prompts.append(messages[-1]["content"])
+        return "LLM translation"
+
+
+def test_hybrid_mode_translates_covered_descriptions_with_dict():
+    llm_service = RecordingLLMService()
+    generator = ImagePromptGenerator({"language": "english", "use_llm": True, "llm_mode": "hybrid"},
+                                     llm_service=llm_service)
+    assert generator._translate_description_uncached("夜晚，特写") == "night, close-up"
+    assert llm_service.prompts == []
+    assert generator._translate_description_uncached("小明推开门") == "LLM translation"
+    assert len(llm_service.prompts) == 1
+
+    full = ImagePromptGenerator({"language": "english", "use_llm": True}, llm_service=llm_service)
+    assert full._translate_description_uncached("夜晚，特写") == "LLM translation"
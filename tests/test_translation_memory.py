@@ -0,0 +1,77 @@
+"""
+翻译记忆库测试（精确复用、近似匹配只作参考、全局术语库、序列化）
+"""
+
+from utils.prompt_generator import ImagePromptGenerator
+from utils.translation_memory import TranslationMemory
+
+LONG_SOURCE = "小明坐在咖啡馆靠窗的位置，一边喝着咖啡一边翻看桌上厚厚的一叠旧照片，窗外下着小雨"
+LONG_TARGET = "Xiao Ming sits by the cafe window, sipping coffee while leafing through old photos; light rain outside"
+
+
+class RecordingLLMService:
+    """模拟 LLM 服务：记录翻译请求，返回按请求编号区分的译文"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def _call_llm(self, messages, temperature=0.3):
+        self.prompts.append(messages[-1]["content"])
+        return f"translation #{len(self.prompts)}"
+
+
+def test_exact_lookup_and_stats():
+    memory = TranslationMemory({"咖啡馆": "cafe"})
+    assert memory.lookup(" 咖啡馆 ") == "cafe"
+    assert memory.lookup("咖啡") is None
+    assert memory.stats["exact"] == 1 and memory.stats["miss"] == 1
+    assert "咖啡馆" in memory and len(memory) == 1
+
+
+def test_near_identical_description_is_not_reused():
+    """只差一个人名 / 否定词的长描述相似度超过阈值，但不能直接复用译文"""
+    memory = TranslationMemory({LONG_SOURCE: LONG_TARGET})
+    for variant in [LONG_SOURCE.replace("小明", "小红"), LONG_SOURCE.replace("喝着", "没喝")]:
+        assert memory.lookup(variant) is None
+        assert memory.suggest(variant) == (LONG_SOURCE, LONG_TARGET)
+    assert memory.suggest("完全不同的一句话，没有任何共同的内容") is None
+    assert memory.stats["fuzzy"] == 2
+
+
+def test_glossary_fallback_records_exact_hits_locally():
+    glossary = TranslationMemory({"黄昏": "dusk"})
+    memory = TranslationMemory(glossary=glossary)
+    assert memory.lookup("黄昏") == "dusk"
+    assert memory.stats["glossary"] == 1
+    assert "黄昏" in memory
+    memory.add("屋顶", "rooftop")
+    assert glossary.lookup("屋顶") == "rooftop"
+    assert memory.suggest(LONG_SOURCE) is None
+    glossary.add(LONG_SOURCE, LONG_TARGET)
+    assert memory.suggest(LONG_SOURCE.replace("小明", "小红")) == (LONG_SOURCE, LONG_TARGET)
+
+
+def test_json_round_trip_excludes_glossary():
+    glossary = TranslationMemory({"黄昏": "dusk"})
+    memory = TranslationMemory({"屋顶": "rooftop"}, glossary=glossary)
+    restored = TranslationMemory.from_json(memory.to_json(), glossary=glossary)
+    assert restored.entries == {"屋顶": "rooftop"}
+    assert restored.lookup("黄昏") == "dusk"
+
+
+def test_llm_translation_reuses_exact_and_sends_fuzzy_as_reference():
+    llm = RecordingLLMService()
+    memory = TranslationMemory({LONG_SOURCE: LONG_TARGET})
+    generator = ImagePromptGenerator({"language": "english", "use_llm": True},
+                                     llm_service=llm, translation_memory=memory)
+
+    assert generator._translate_with_llm(LONG_SOURCE) == LONG_TARGET
+    assert llm.prompts == []
+
+    variant = LONG_SOURCE.replace("小明", "小红")
+    assert generator._translate_with_llm(variant) == "translation #1"
+    assert LONG_TARGET in llm.prompts[0] and variant in llm.prompts[0]
+    # 新译文记入记忆库，再次出现时精确命中
+    assert memory.lookup(variant) == "translation #1"
+    assert generator._translate_with_llm(variant) == "translation #1"
+    assert len(llm.prompts) == 1
@@ -3,9 +3,13 @@
 """
 
 import os
+import json
 from datetime import datetime
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.prompt_schema import prompt_variant
+from utils.scene_schema import Scene, SCENE_DEFAULTS
 
 class ExportUtils:
     """导出工具类"""
@@ -24,83 +28,7 @@ class ExportUtils:
         # 准备数据
         data = []
         for i, scene in enumerate(scenes):
-            # 优先使用独立字段（新格式）
-            shot_size = scene.get("shot_size", "")
-            camera_angle = scene.get("camera_angle", "")
-            camera_movement = scene.get("camera_movement", "")
-            camera_equipment = scene.get("camera_equipment", "")
-            lens_focal = scene.get("lens_focal_length", "")
-            
-            # 兼容旧格式：如果字段为空，尝试从组合格式解析
-            if not shot_size:
-                camera_angle_full = scene.get("camera_angle", "")
-                if "/" in str(camera_angle_full) and len(str(camera_angle_full).split("/")) == 5:
-                    angle_parts = str(camera_angle_full).split("/")
-                    shot_size = angle_parts[0]
-                    camera_angle = angle_parts[1]
-                    camera_movement = angle_parts[2]
-                    camera_equipment = angle_parts[3]
-                    lens_focal = angle_parts[4]
-                else:
-                    # 默认值
-                    shot_size = "中景"
-                    camera_angle = "视平"
-                    camera_movement = "固定"
-                    camera_equipment = "固定"
-                    lens_focal = "标准(35-50mm)"
-            
-            # 获取相机、镜头、光圈参数，如果为空则使用默认值
-            camera = scene.get("camera", "")
-            if not camera:
-                camera = "ARRI Alexa"  # 默认值
-            
-            lens = scene.get("lens", "")
-            if not lens:
-                lens = "ARRI Master Primes"  # 默认值
-            
-            aperture = scene.get("aperture", "")
-            if not aperture:
-                aperture = "f/2.8"  # 默认值
-            
-            # 获取新增的特殊场景字段
-            scene_type = scene.get("scene_type", "普通")
-            composition_tension = scene.get("composition_tension", "")
-            axis_crossing = scene.get("axis_crossing", "")
-            shot_transition = scene.get("shot_transition", "")
-            aesthetics_technique = scene.get("aesthetics_technique", "")
-            # 获取新增的创作维度字段
-            protagonist_type = scene.get("protagonist_type", "")
-            emotion_design = scene.get("emotion_design", "")
-            performance_style = scene.get("performance_style", "")
-            
-            row = {
-                "序号": scene.get("scene_number", i + 1),
-                "分镜描述": scene.get("scene_description", ""),
-                "景别": shot_size,
-                "摄影机角度": camera_angle,
-                "运镜": camera_movement,
-                "摄影机装备": camera_equipment,
-                "镜头焦段": lens_focal,
-                "相机": camera,
-                "镜头": lens,
-                "光圈": aperture,
-                "场景类型": scene_type,
-                "构图张力": composition_tension,
-                "轴线处理": axis_crossing,
-                "镜头衔接": shot_transition,
-                "审美技法": aesthetics_technique,
-                "主角核心表达": protagonist_type,
-                "情绪设计": emotion_design,
-                "表演风格": performance_style,
-                "人物": ", ".join(scene.get("characters", [])),
-                "地点": scene.get("location", ""),
-                "时间": scene.get("time", ""),
-                "情绪": scene.get("mood", ""),
-                "台词": scene.get("dialogue_text", ""),
-                "旁白": scene.get("voiceover_text", ""),
-                "音效": scene.get("sound_effects", "")
-            }
-            data.append(row)
+            data.append(self._scene_row(scene, i))
         
         # 创建DataFrame
         df = pd.DataFrame(data)
@@ -136,7 +64,61 @@ class ExportUtils:
         
         return filepath
     
-    def export_to_excel_with_prompts(self, scenes: List[Dict[str, Any]], prompts: List[Dict[str, Any]], script: str) -> str:
+    @staticmethod
+    def _scene_row(scene: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """
+        分镜的导出列（两种 Excel 导出共用，空字段按 SCENE_DEFAULTS 补默认值）
+        
+        Args:
+            scene: 分镜记录（或旧版分镜字典）
+            index: 分镜在列表中的下标（没有分镜编号时使用）
+        """
+        scene = Scene.coerce(scene)
+        shot_size = scene.get("shot_size", "")
+        camera_angle = scene.get("camera_angle", "")
+        camera_movement = scene.get("camera_movement", "")
+        camera_equipment = scene.get("camera_equipment", "")
+        lens_focal = scene.get("lens_focal_length", "")
+        
+        # 兼容旧格式：如果景别为空，尝试从组合格式（景别/角度/运镜/装备/焦段）解析，否则全部使用默认值
+        if not shot_size:
+            angle_parts = str(camera_angle).split("/")
+            if len(angle_parts) != 5:
+                angle_parts = [SCENE_DEFAULTS[field] for field in (
+                    "shot_size", "camera_angle", "camera_movement", "camera_equipment", "lens_focal_length"
+                )]
+            shot_size, camera_angle, camera_movement, camera_equipment, lens_focal = angle_parts
+        
+        return {
+            "序号": scene.get("scene_number", index + 1),
+            "分镜描述": scene.get("scene_description", ""),
+            "景别": shot_size,
+            "摄影机角度": camera_angle,
+            "运镜": camera_movement,
+            "摄影机装备": camera_equipment,
+            "镜头焦段": lens_focal,
+            "相机": scene.get_or_default("camera"),
+            "镜头": scene.get_or_default("lens"),
+            "光圈": scene.get_or_default("aperture"),
+            "场景类型": scene.get("scene_type", "普通"),
+            "构图张力": scene.get("composition_tension", ""),
+            "轴线处理": scene.get("axis_crossing", ""),
+            "镜头衔接": scene.get("shot_transition", ""),
+            "审美技法": scene.get("aesthetics_technique", ""),
+            "主角核心表达": scene.get("protagonist_type", ""),
+            "情绪设计": scene.get("emotion_design", ""),
+            "表演风格": scene.get("performance_style", ""),
+            "人物": ", ".join(scene.get("characters", [])),
+            "地点": scene.get("location", ""),
+            "时间": scene.get("time", ""),
+            "情绪": scene.get("mood", ""),
+            "台词": scene.get("dialogue_text", ""),
+            "旁白": scene.get("voiceover_text", ""),
+            "音效": scene.get("sound_effects", "")
+        }
+    
+    def export_to_excel_with_prompts(self, scenes: List[Dict[str, Any]], prompts: List[Dict[str, Any]], script: str,
+                                     language: Optional[str] = None) -> str:
         """
         导出分镜头到Excel文件（包含提示词）
         
@@ -144,98 +126,33 @@ class ExportUtils:
             scenes: 分镜头列表
             prompts: 提示词列表
             script: 原始剧本
+            language: 导出的提示词语言（可选，多语言输出的提示词按此取对应版本）
         
         Returns:
             str: 导出文件路径
         """
         # 创建提示词映射（按scene_number）
-        prompt_map = {p.get("scene_number", 0): p for p in prompts}
+        prompt_map = {p.get("scene_number", 0): prompt_variant(p, language) for p in prompts}
         
         # 准备数据
         data = []
         for i, scene in enumerate(scenes):
-            scene_num = scene.get("scene_number", i + 1)
-            
-            # 优先使用独立字段（新格式）
-            shot_size = scene.get("shot_size", "")
-            camera_angle = scene.get("camera_angle", "")
-            camera_movement = scene.get("camera_movement", "")
-            camera_equipment = scene.get("camera_equipment", "")
-            lens_focal = scene.get("lens_focal_length", "")
-            
-            # 兼容旧格式
-            if not shot_size:
-                camera_angle_full = scene.get("camera_angle", "")
-                if "/" in str(camera_angle_full) and len(str(camera_angle_full).split("/")) == 5:
-                    angle_parts = str(camera_angle_full).split("/")
-                    shot_size = angle_parts[0]
-                    camera_angle = angle_parts[1]
-                    camera_movement = angle_parts[2]
-                    camera_equipment = angle_parts[3]
-                    lens_focal = angle_parts[4]
-                else:
-                    shot_size = "中景"
-                    camera_angle = "视平"
-                    camera_movement = "固定"
-                    camera_equipment = "固定"
-                    lens_focal = "标准(35-50mm)"
-            
-            # 获取相机、镜头、光圈参数
-            camera = scene.get("camera", "ARRI Alexa")
-            lens = scene.get("lens", "ARRI Master Primes")
-            aperture = scene.get("aperture", "f/2.8")
-            
-            # 获取新增的特殊场景字段
-            scene_type = scene.get("scene_type", "普通")
-            composition_tension = scene.get("composition_tension", "")
-            axis_crossing = scene.get("axis_crossing", "")
-            shot_transition = scene.get("shot_transition", "")
-            aesthetics_technique = scene.get("aesthetics_technique", "")
-            # 获取新增的创作维度字段
-            protagonist_type = scene.get("protagonist_type", "")
-            emotion_design = scene.get("emotion_design", "")
-            performance_style = scene.get("performance_style", "")
+            row = self._scene_row(scene, i)
             
             # 获取对应的提示词
-            prompt_data = prompt_map.get(scene_num, {})
+            prompt_data = prompt_map.get(row["序号"], {})
             prompt_text = prompt_data.get("prompt_text", "")
             negative_prompt = prompt_data.get("negative_prompt", "")
             prompt_json = prompt_data.get("prompt_json", {})
             
-            # 格式化JSON为字符串
-            import json
+            # 格式化JSON为字符串（NanoBananaPrompt 对象通过 to_json 序列化）
+            if hasattr(prompt_json, "to_json"):
+                prompt_json = prompt_json.to_json()
             prompt_json_str = json.dumps(prompt_json, ensure_ascii=False, indent=2) if prompt_json else ""
             
-            row = {
-                "序号": scene_num,
-                "分镜描述": scene.get("scene_description", ""),
-                "景别": shot_size,
-                "摄影机角度": camera_angle,
-                "运镜": camera_movement,
-                "摄影机装备": camera_equipment,
-                "镜头焦段": lens_focal,
-                "相机": camera,
-                "镜头": lens,
-                "光圈": aperture,
-                "场景类型": scene_type,
-                "构图张力": composition_tension,
-                "轴线处理": axis_crossing,
-                "镜头衔接": shot_transition,
-                "审美技法": aesthetics_technique,
-                "主角核心表达": protagonist_type,
-                "情绪设计": emotion_design,
-                "表演风格": performance_style,
-                "人物": ", ".join(scene.get("characters", [])),
-                "地点": scene.get("location", ""),
-                "时间": scene.get("time", ""),
-                "情绪": scene.get("mood", ""),
-                "台词": scene.get("dialogue_text", ""),
-                "旁白": scene.get("voiceover_text", ""),
-                "音效": scene.get("sound_effects", ""),
-                "提示词（文本）": prompt_text,
-                "负面提示词": negative_prompt,
-                "提示词（JSON）": prompt_json_str
-            }
+            row["提示词（文本）"] = prompt_text
+            row["负面提示词"] = negative_prompt
+            row["提示词（JSON）"] = prompt_json_str
             data.append(row)
         
         # 创建DataFrame
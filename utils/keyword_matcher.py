@@ -0,0 +1,103 @@
+"""
+多模式关键词匹配工具
+将多组关键词预编译为一个按首字索引的匹配表，每段文本只扫描一次即可得到所有类别的命中结果
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence
+
+
+class KeywordMatcher:
+    """预编译的多类别关键词匹配器"""
+
+    def __init__(self, categories: Dict[str, Sequence[str]], cache_size: int = 4096):
+        """
+        初始化匹配器
+
+        Args:
+            categories: 类别名 -> 关键词列表（列表顺序即该类别的优先级，越靠前优先级越高）
+            cache_size: 扫描结果的缓存条数（同一段文本会被多个提取函数重复扫描）
+        """
+        # 去重但保留顺序
+        self.categories = {name: tuple(dict.fromkeys(keywords)) for name, keywords in categories.items()}
+        self._ranks = {
+            name: {keyword: rank for rank, keyword in enumerate(keywords)}
+            for name, keywords in self.categories.items()
+        }
+
+        keyword_categories: Dict[str, List[str]] = {}
+        for name, keywords in self.categories.items():
+            for keyword in keywords:
+                keyword_categories.setdefault(keyword, []).append(name)
+
+        # 扫描时每个位置只记录最长的关键词；被它包含的其他关键词（子串）同样出现在文本中，
+        # 因此预先计算每个关键词“隐含命中”的 (类别, 关键词) 集合
+        all_keywords = list(keyword_categories.keys())
+        self._implied = {}
+        for keyword in all_keywords:
+            implied = []
+            for other in all_keywords:
+                if other in keyword:
+                    for name in keyword_categories[other]:
+                        implied.append((name, other))
+            self._implied[keyword] = tuple(implied)
+
+        # 首字 -> 以该字开头的关键词（长词在前）
+        self._by_first_char: Dict[str, List[str]] = {}
+        for keyword in sorted(all_keywords, key=len, reverse=True):
+            self._by_first_char.setdefault(keyword[0], []).append(keyword)
+
+        self.scan = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _scan(self, text: str) -> Dict[str, FrozenSet[str]]:
+        """
+        扫描文本，返回各类别命中的关键词集合（结果会被缓存共享，调用方不要修改）
+
+        Args:
+            text: 待扫描文本
+
+        Returns:
+            Dict[str, FrozenSet[str]]: 类别名 -> 命中的关键词集合（没有命中的类别不出现）
+        """
+        if not text:
+            return {}
+
+        by_first_char = self._by_first_char
+        startswith = text.startswith
+        found = set()
+        for pos, char in enumerate(text):
+            candidates = by_first_char.get(char)
+            if candidates:
+                for keyword in candidates:
+                    if startswith(keyword, pos):
+                        found.add(keyword)
+                        break
+
+        hits: Dict[str, set] = {}
+        for keyword in found:
+            for name, implied in self._implied[keyword]:
+                hits.setdefault(name, set()).add(implied)
+        return {name: frozenset(keywords) for name, keywords in hits.items()}
+
+    def first(self, text: str, category: str) -> Optional[str]:
+        """返回该类别中出现在文本里、优先级最高的关键词（没有则返回 None）"""
+        keywords = self.scan(text).get(category)
+        if not keywords:
+            return None
+        return min(keywords, key=self._ranks[category].__getitem__)
+
+    def all(self, text: str, category: str) -> List[str]:
+        """按优先级顺序返回该类别中所有出现在文本里的关键词"""
+        keywords = self.scan(text).get(category)
+        if not keywords:
+            return []
+        return sorted(keywords, key=self._ranks[category].__getitem__)
+
+    def contains_any(self, text: str, category: str) -> bool:
+        """文本中是否出现该类别的任一关键词"""
+        return bool(self.scan(text).get(category))
+
+    def cache_info(self):
+        """扫描缓存统计"""
+        return self.scan.cache_info()
+
@@ -0,0 +1,75 @@
+"""
+有界记忆化缓存
+按键缓存构建结果（LRU 淘汰），并统计命中率
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class MemoCache:
+    """有界 LRU 记忆化缓存"""
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最多缓存的条目数（超出时淘汰最久未使用的条目）
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """
+        返回键对应的缓存结果，没有则调用 builder 构建并缓存
+
+        Args:
+            key: 缓存键（必须可哈希；不可哈希时直接构建，不缓存）
+            builder: 无参构建函数
+
+        Returns:
+            缓存（或新构建）的结果，调用方不要修改
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            pass
+        except TypeError:
+            self.misses += 1
+            return builder()
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = builder()
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """清空缓存和统计"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计
+
+        Returns:
+            Dict: hits, misses, size, maxsize, hit_rate
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -0,0 +1,105 @@
+"""
+近似重复分镜检测
+对分镜描述做字符 shingle + MinHash 签名，用 LSH 分桶快速找到候选，
+再按 shingle 集合的 Jaccard 相似度确认；结构化字段（人物、地点、景别等）必须完全相同
+"""
+
+import zlib
+import random
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+# MinHash 使用的大素数（2^61 - 1）
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+class NearDuplicateIndex:
+    """基于 MinHash + LSH 的近似重复索引（在线聚类：每个新条目要么归入已有簇，要么成为新簇的代表）"""
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, seed: int = 1):
+        """
+        初始化索引
+
+        Args:
+            threshold: 判定为近似重复的最低 Jaccard 相似度
+            num_perm: MinHash 签名长度
+            bands: LSH 分段数（num_perm 必须能被整除；段越多召回越高）
+            shingle_size: 字符 shingle 长度
+            seed: 哈希函数随机种子（固定种子保证每次聚类结果一致）
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._buckets: Dict[Tuple, List[Hashable]] = {}
+        self._shingles: Dict[Hashable, Set[str]] = {}
+
+    def shingles(self, text: str) -> Set[str]:
+        """字符 shingle 集合（忽略空白；文本比 shingle 短时整体作为一个 shingle）"""
+        text = "".join((text or "").split())
+        n = self.shingle_size
+        if len(text) <= n:
+            return {text}
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def signature(self, shingles: Set[str]) -> Tuple[int, ...]:
+        """MinHash 签名"""
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def jaccard(first: Set[str], second: Set[str]) -> float:
+        if not first and not second:
+            return 1.0
+        return len(first & second) / len(first | second)
+
+    def find_or_add(self, key: Hashable, block: Hashable, text: str) -> Optional[Hashable]:
+        """
+        查找与该条目近似重复的簇代表；没有则把该条目登记为新的簇代表
+
+        Args:
+            key: 条目标识（例如分镜下标）
+            block: 结构化字段组合（只在相同组合内比较）
+            text: 用于比较的文本（分镜描述）
+
+        Returns:
+            Optional[Hashable]: 簇代表的标识；该条目成为新代表时返回 None
+        """
+        shingles = self.shingles(text)
+        signature = self.signature(shingles)
+        band_keys = [
+            (block, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+        best_key = None
+        best_score = self.threshold
+        seen = set()
+        for band_key in band_keys:
+            for candidate in self._buckets.get(band_key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                score = self.jaccard(shingles, self._shingles[candidate])
+                if score >= best_score:
+                    best_key = candidate
+                    best_score = score
+        if best_key is not None:
+            return best_key
+
+        self._shingles[key] = shingles
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return None
@@ -0,0 +1,135 @@
+"""
+项目目录索引
+在项目目录旁维护一个小的 JSON 清单，记录每个项目文件的摘要（名称、时间、分镜数等），
+列出项目时只需 stat 各文件，文件（或其修改日志）的修改时间或大小变化时才重新读取该文件
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.project_journal import atomic_write
+
+# 清单格式版本（格式变化时整体重建）
+CATALOG_VERSION = 2
+
+
+def summarize_project(project_data: Dict[str, Any], default_name: str = "") -> Dict[str, Any]:
+    """
+    项目摘要（项目列表显示的字段）
+
+    Args:
+        project_data: 项目数据
+        default_name: 项目数据中没有名称时使用的名称（通常为文件名）
+
+    Returns:
+        Dict: project_name / created_at / updated_at / script_length / scene_count / prompt_count
+    """
+    return {
+        "project_name": project_data.get("project_name", default_name),
+        "created_at": project_data.get("created_at", ""),
+        "updated_at": project_data.get("updated_at", ""),
+        "script_length": len(project_data.get("script") or ""),
+        "scene_count": len(project_data.get("scenes") or []),
+        "prompt_count": len(project_data.get("image_prompts") or [])
+    }
+
+
+class ProjectCatalog:
+    """项目目录索引（文件名 -> 文件的修改时间、大小和项目摘要）"""
+
+    def __init__(self, path: Path):
+        """
+        初始化索引（清单在第一次使用时读取）
+
+        Args:
+            path: 清单文件路径
+        """
+        self.path = Path(path)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """读取清单（不存在、损坏或版本不符时返回空索引，之后按需重建）"""
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == CATALOG_VERSION:
+                    return data.get("projects", {})
+        except Exception as e:
+            print(f"Error loading project catalog {self.path}: {e}")
+        return {}
+
+    @staticmethod
+    def _journal_signature(journal_stat: Optional[os.stat_result]) -> Optional[List[int]]:
+        if journal_stat is None:
+            return None
+        return [journal_stat.st_mtime_ns, journal_stat.st_size]
+
+    def lookup(self, filename: str, stat: os.stat_result,
+               journal_stat: Optional[os.stat_result] = None) -> Optional[Dict[str, Any]]:
+        """
+        查询项目摘要
+
+        Args:
+            filename: 项目文件名
+            stat: 项目文件当前的 stat 结果
+            journal_stat: 项目修改日志当前的 stat 结果（没有日志时为 None）
+
+        Returns:
+            Optional[Dict]: 摘要；没有记录或文件 / 日志在记录之后被修改过（修改时间或大小不同）时返回 None
+        """
+        entry = self.entries.get(filename)
+        if (entry and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size
+                and entry.get("journal") == self._journal_signature(journal_stat)):
+            return entry["summary"]
+        return None
+
+    def put(self, filename: str, stat: os.stat_result, summary: Dict[str, Any],
+            journal_stat: Optional[os.stat_result] = None):
+        """记录项目文件的摘要"""
+        self.entries[filename] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "journal": self._journal_signature(journal_stat),
+            "summary": summary
+        }
+        self._dirty = True
+
+    def remove(self, filename: str):
+        """删除项目文件的记录"""
+        if self.entries.pop(filename, None) is not None:
+            self._dirty = True
+
+    def retain(self, filenames: Iterable[str]):
+        """只保留仍然存在的项目文件的记录"""
+        existing = set(filenames)
+        for filename in [name for name in self.entries if name not in existing]:
+            self.remove(filename)
+
+    def save(self) -> bool:
+        """
+        写回清单（没有变化时不写；原子写入，写入中断不会留下不完整的清单）
+
+        Returns:
+            bool: 是否保存成功
+        """
+        if not self._dirty:
+            return True
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps({"version": CATALOG_VERSION, "projects": self.entries}, ensure_ascii=False)
+            atomic_write(self.path, data.encode("utf-8"))
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"Error saving project catalog {self.path}: {e}")
+            return False
@@ -0,0 +1,202 @@
+"""
+紧凑项目文件格式（分段压缩容器）
+剧本、分镜、提示词等分段各自压缩（zlib），文件头记录各段的偏移和长度；
+加载时只解压元数据和分镜，剧本、提示词等在第一次访问时才解压，改写文件时未访问过的分段原样复制
+"""
+
+import json
+import struct
+import zlib
+from typing import Any, Dict
+
+from utils.prompt_schema import json_default
+
+# 文件开头的魔数（区分容器文件与 JSON 项目文件）
+CONTAINER_MAGIC = b"SBPROJ1\n"
+
+# 容器格式项目文件的扩展名
+CONTAINER_SUFFIX = ".sbproj"
+
+CONTAINER_VERSION = 1
+
+# 加载时立即解压的分段（meta 段包含除其他分段外的所有字段：项目名称、时间、元数据等）
+EAGER_SECTIONS = ("meta", "scenes")
+
+# 第一次访问时才解压的分段
+LAZY_SECTIONS = ("script", "image_prompts", "registry", "translation_memory")
+
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+def _compress(value: Any) -> bytes:
+    data = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default)
+    return zlib.compress(data.encode("utf-8"), 6)
+
+
+def _decompress(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+class LazyProject(dict):
+    """
+    延迟解压的项目数据
+
+    与普通字典用法相同；LAZY_SECTIONS 中的字段在第一次读取（[] / get / items 等）时才解压，
+    只检查字段是否存在（in / keys）不会解压
+    """
+
+    def __init__(self, data: Dict[str, Any], pending: Dict[str, bytes]):
+        """
+        Args:
+            data: 已解压的字段
+            pending: 尚未解压的字段 -> 压缩数据
+        """
+        super().__init__(data)
+        self._pending = pending
+
+    def _load(self, key: str) -> Any:
+        value = _decompress(self._pending.pop(key))
+        dict.__setitem__(self, key, value)
+        return value
+
+    def load_all(self) -> "LazyProject":
+        """解压所有尚未解压的字段"""
+        for key in list(self._pending):
+            self._load(key)
+        return self
+
+    def raw_section(self, key: str):
+        """尚未解压的字段的压缩数据（已解压或不存在时返回 None）"""
+        return self._pending.get(key)
+
+    def __missing__(self, key: str) -> Any:
+        if key in self._pending:
+            return self._load(key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._pending:
+            return self._load(key)
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key: str, value: Any):
+        self._pending.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: str):
+        if self._pending.pop(key, None) is None:
+            dict.__delitem__(self, key)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self._pending:
+            self._load(key)
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key in self._pending:
+            return self._load(key)
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **fields):
+        for key, value in dict(*args, **fields).items():
+            self[key] = value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._pending or dict.__contains__(self, key)
+
+    def __iter__(self):
+        yield from list(dict.__iter__(self))
+        yield from list(self._pending)
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self._pending)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return dict.items(self.load_all())
+
+    def values(self):
+        return dict.values(self.load_all())
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.load_all())
+
+    def __eq__(self, other: Any) -> bool:
+        return dict.__eq__(self.load_all(), other)
+
+    def __ne__(self, other: Any) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        return f"LazyProject({dict.__repr__(self)}, pending={list(self._pending)})"
+
+    def to_json(self) -> Dict[str, Any]:
+        """解压所有字段，返回普通字典"""
+        return dict(self.load_all())
+
+
+def is_container(filepath: str) -> bool:
+    """文件是否为容器格式（按文件开头的魔数判断）"""
+    with open(filepath, 'rb') as f:
+        return f.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+
+
+def encode_container(project_data: Dict[str, Any]) -> bytes:
+    """
+    编码为容器格式
+
+    Args:
+        project_data: 项目数据（LazyProject 中尚未解压的分段直接复制压缩数据）
+
+    Returns:
+        bytes: 文件内容
+    """
+    section_fields = set(EAGER_SECTIONS[1:] + LAZY_SECTIONS)
+    raw_section = getattr(project_data, "raw_section", lambda key: None)
+    sections = {"meta": _compress({
+        key: dict.get(project_data, key) for key in dict.keys(project_data) if key not in section_fields
+    })}
+    for key in EAGER_SECTIONS[1:] + LAZY_SECTIONS:
+        if key not in project_data:
+            continue
+        raw = raw_section(key)
+        sections[key] = raw if raw is not None else _compress(project_data[key])
+
+    index = {}
+    offset = 0
+    for key, data in sections.items():
+        index[key] = {"offset": offset, "length": len(data)}
+        offset += len(data)
+    header = json.dumps(
+        {"version": CONTAINER_VERSION, "compression": "zlib", "sections": index}, separators=(",", ":")
+    ).encode("utf-8")
+    return b"".join([CONTAINER_MAGIC, _HEADER_LENGTH.pack(len(header)), header, *sections.values()])
+
+
+def read_container(filepath: str) -> LazyProject:
+    """
+    读取容器格式的项目文件（只解压 EAGER_SECTIONS，其余分段保留压缩数据，访问时解压）
+
+    Raises:
+        ValueError: 不是容器格式或版本不支持
+    """
+    with open(filepath, 'rb') as f:
+        if f.read(len(CONTAINER_MAGIC)) != CONTAINER_MAGIC:
+            raise ValueError(f"不是容器格式的项目文件: {filepath}")
+        (header_length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+        body = f.read()
+    if header.get("version") != CONTAINER_VERSION:
+        raise ValueError(f"不支持的项目文件版本: {header.get('version')}")
+
+    raw = {
+        key: body[entry["offset"]:entry["offset"] + entry["length"]]
+        for key, entry in header["sections"].items()
+    }
+    data = _decompress(raw.pop("meta"))
+    for key in EAGER_SECTIONS[1:]:
+        if key in raw:
+            data[key] = _decompress(raw.pop(key))
+    return LazyProject(data, raw)
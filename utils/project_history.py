@@ -0,0 +1,183 @@
+"""
+项目版本历史（增量压缩）
+每次保存版本只记录与上一版本相比变化的字段和分镜 / 提示词行（与修改日志相同的增量格式），
+每隔 VERSION_CHECKPOINT_INTERVAL 个版本记录一次完整快照；任何版本都只需从最近的快照开始重放有限个增量即可恢复。
+历史文件只追加：每条记录 = 记录头长度 + 正文长度 + 记录头（JSON，版本号、时间、统计）+ 正文（zlib 压缩的 JSON）
+"""
+
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.project_container import LazyProject
+from utils.project_journal import JOURNAL_ROW_FIELDS, apply_journal_entry, diff_rows, dumps_row
+
+# 历史文件扩展名（附加在项目文件名之后，例如 项目_20250101_120000.json.versions）
+HISTORY_SUFFIX = ".versions"
+
+# 每隔多少个版本记录一次完整快照（恢复任意版本最多重放这么多条记录）
+VERSION_CHECKPOINT_INTERVAL = 20
+
+_RECORD_LENGTHS = struct.Struct("<II")
+
+
+class ProjectHistory:
+    """单个项目的版本历史"""
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: 历史文件路径
+        """
+        self.path = Path(path)
+        # 最新版本的序列化状态（用于计算下一个版本的增量）及当时的文件大小
+        self._state: Optional[Dict[str, Any]] = None
+        self._state_size = -1
+
+    def _read_headers(self) -> Tuple[List[Dict[str, Any]], int]:
+        """读取所有记录头；返回 (记录头列表（含正文位置 _offset / _length）, 最后一条完整记录的结束位置)"""
+        headers = []
+        end = 0
+        try:
+            with open(self.path, 'rb') as f:
+                data_size = os.fstat(f.fileno()).st_size
+                while True:
+                    lengths = f.read(_RECORD_LENGTHS.size)
+                    if len(lengths) < _RECORD_LENGTHS.size:
+                        break
+                    header_length, body_length = _RECORD_LENGTHS.unpack(lengths)
+                    offset = f.tell() + header_length
+                    if offset + body_length > data_size:
+                        # 写入中断的不完整记录
+                        break
+                    header = json.loads(f.read(header_length).decode("utf-8"))
+                    header["_offset"] = offset
+                    header["_length"] = body_length
+                    headers.append(header)
+                    f.seek(body_length, os.SEEK_CUR)
+                    end = offset + body_length
+        except FileNotFoundError:
+            pass
+        return headers, end
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """
+        列出所有版本（只读取记录头，不解压正文）
+
+        Returns:
+            List[Dict]: version / saved_at / label / checkpoint / project_name / script_length /
+                        scene_count / prompt_count / changed_scenes / changed_prompts，按版本号升序
+        """
+        headers, _ = self._read_headers()
+        return [{key: value for key, value in header.items() if not key.startswith("_")} for header in headers]
+
+    def load_version(self, version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        恢复指定版本的项目数据
+
+        Args:
+            version: 版本号（默认为最新版本）
+
+        Raises:
+            KeyError: 版本不存在
+        """
+        headers, _ = self._read_headers()
+        return self._reconstruct(headers, version)
+
+    def _reconstruct(self, headers: List[Dict[str, Any]], version: Optional[int]) -> Dict[str, Any]:
+        if version is None and headers:
+            version = headers[-1]["version"]
+        target = next((index for index, header in enumerate(headers) if header["version"] == version), None)
+        if target is None:
+            raise KeyError(f"版本不存在: {version}")
+        start = target
+        while not headers[start]["checkpoint"]:
+            start -= 1
+
+        project_data: Dict[str, Any] = {}
+        with open(self.path, 'rb') as f:
+            for header in headers[start:target + 1]:
+                f.seek(header["_offset"])
+                apply_journal_entry(project_data, json.loads(zlib.decompress(f.read(header["_length"]))))
+        return project_data
+
+    @staticmethod
+    def _serialize(project_data: Dict[str, Any]) -> Dict[str, Any]:
+        """项目数据的序列化状态：普通字段 -> 序列化结果，列表字段 -> 各行的序列化结果"""
+        return {
+            "fields": {key: dumps_row(project_data[key]) for key in project_data if key not in JOURNAL_ROW_FIELDS},
+            "rows": {field: [dumps_row(item) for item in project_data.get(field) or []]
+                     for field in JOURNAL_ROW_FIELDS}
+        }
+
+    def save_version(self, project_data: Dict[str, Any], label: str = "") -> Dict[str, Any]:
+        """
+        记录一个新版本
+
+        Args:
+            project_data: 项目的当前数据
+            label: 版本说明（可选）
+
+        Returns:
+            Dict: 新版本的信息（与 list_versions 的元素相同）
+        """
+        if isinstance(project_data, LazyProject):
+            project_data = project_data.to_json()
+        headers, end = self._read_headers()
+        version = headers[-1]["version"] + 1 if headers else 1
+        checkpoint = not headers or (version - 1) % VERSION_CHECKPOINT_INTERVAL == 0
+
+        state = self._serialize(project_data)
+        changed = {}
+        if checkpoint:
+            # 完整快照：所有字段都记录为「设为某值」
+            entry = {"set": {key: value for key, value in project_data.items()}}
+            changed = {field: len(state["rows"][field]) for field in JOURNAL_ROW_FIELDS}
+        else:
+            previous = self._latest_state(headers, end)
+            entry = {}
+            for key, row in state["fields"].items():
+                if previous["fields"].get(key) != row:
+                    entry.setdefault("set", {})[key] = project_data[key]
+            for field in JOURNAL_ROW_FIELDS:
+                _, change = diff_rows(previous["rows"][field], project_data.get(field) or [], state["rows"][field])
+                changed[field] = len(change["rows"])
+                if change["rows"] or change["length"] != len(previous["rows"][field]):
+                    entry.setdefault("rows", {})[field] = change
+
+        header = {
+            "version": version,
+            "saved_at": datetime.now().isoformat(),
+            "label": label,
+            "checkpoint": checkpoint,
+            "project_name": project_data.get("project_name", ""),
+            "script_length": len(project_data.get("script") or ""),
+            "scene_count": len(state["rows"]["scenes"]),
+            "prompt_count": len(state["rows"]["image_prompts"]),
+            "changed_scenes": changed["scenes"],
+            "changed_prompts": changed["image_prompts"]
+        }
+        header_data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        body = zlib.compress(dumps_row(entry).encode("utf-8"), 6)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            # 丢弃上次写入中断留下的不完整记录
+            f.truncate(end)
+            f.write(_RECORD_LENGTHS.pack(len(header_data), len(body)) + header_data + body)
+            f.flush()
+            os.fsync(f.fileno())
+            self._state_size = f.tell()
+        self._state = state
+        return header
+
+    def _latest_state(self, headers: List[Dict[str, Any]], end: int) -> Dict[str, Any]:
+        """最新版本的序列化状态（缓存；历史文件被其他进程追加过时重新恢复）"""
+        if self._state is None or self._state_size != end:
+            self._state = self._serialize(self._reconstruct(headers, None))
+            self._state_size = end
+        return self._state
@@ -0,0 +1,159 @@
+"""
+项目文件的原子写入和追加式修改日志
+项目文件（快照）只通过「写临时文件 → fsync → 重命名替换」整体写入，写入中断不会留下不完整的文件；
+小的修改（单个分镜、提示词、剧本等）以一行 JSON 追加到项目的日志文件中，加载时在快照上重放，
+日志积累到一定大小后合并（compaction）为新的快照
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.project_container import is_container, read_container
+from utils.prompt_schema import json_default
+
+# 日志文件扩展名（附加在项目文件名之后，例如 项目_20250101_120000.json.journal）
+JOURNAL_SUFFIX = ".journal"
+
+# 日志条目数达到该值时合并为新的快照
+JOURNAL_COMPACT_ENTRIES = 100
+
+# 按行记录修改的列表字段
+JOURNAL_ROW_FIELDS = ("scenes", "image_prompts")
+
+
+def dumps_row(value: Any) -> str:
+    """序列化日志中的值（也用于比较分镜 / 提示词是否变化）"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+
+def atomic_write(filepath: Path, data: bytes):
+    """
+    原子写入文件：先写入同目录下的临时文件并 fsync，再重命名替换目标文件
+    （任何时刻目标文件要么是旧内容，要么是完整的新内容）
+    """
+    filepath = Path(filepath)
+    temp_path = filepath.with_name(filepath.name + ".tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+
+def journal_path(filepath: Path) -> Path:
+    """项目文件对应的日志文件路径"""
+    filepath = Path(filepath)
+    return filepath.with_name(filepath.name + JOURNAL_SUFFIX)
+
+
+def read_journal(path: Path) -> List[Dict[str, Any]]:
+    """
+    读取日志条目（日志不存在时返回空列表；写入中断留下的不完整行忽略）
+
+    Args:
+        path: 日志文件路径
+    """
+    entries = []
+    try:
+        # 按字节逐行读取：写入中断的行可能截断在多字节字符中间，只跳过该行
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entries.append(json.loads(line.decode("utf-8")))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def append_journal(path: Path, entry: Dict[str, Any]):
+    """追加一条日志（一次写入一整行并 fsync）"""
+    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=json_default) + "\n"
+    with open(path, 'a+b') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # 上次追加中断留下了不完整的行：另起一行，读取时跳过该行
+                line = "\n" + line
+        f.write(line.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def diff_rows(old_rows: List[str], items: List[Any],
+              rows: Optional[List[str]] = None) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    比较列表字段的新旧内容
+
+    Args:
+        old_rows: 原有各行的序列化结果（dumps_row）
+        items: 新的列表
+        rows: 新列表各行已有的序列化结果（可选，省去重复序列化）
+
+    Returns:
+        Tuple[List[str], Dict]: (新各行的序列化结果, 日志中的行修改 {"length": 新长度, "rows": {下标: 新值}})
+    """
+    if rows is None:
+        rows = [dumps_row(item) for item in items]
+    old_length = len(old_rows)
+    changed = {
+        str(index): items[index]
+        for index, row in enumerate(rows)
+        if index >= old_length or old_rows[index] != row
+    }
+    return rows, {"length": len(items), "rows": changed}
+
+
+def apply_journal_entry(project_data: Dict[str, Any], entry: Dict[str, Any]):
+    """
+    在项目数据上重放一条日志
+
+    每条日志只包含「字段设为某值」「列表长度设为 N 并设置若干行」「元数据合并」这类幂等修改，
+    合并快照后、删除日志前中断时，在新快照上再次重放整个日志得到的结果不变
+    """
+    for field, value in entry.get("set", {}).items():
+        project_data[field] = value
+    for field, change in entry.get("rows", {}).items():
+        items = list(project_data.get(field) or [])
+        length = change["length"]
+        del items[length:]
+        items.extend([None] * (length - len(items)))
+        for index, value in change["rows"].items():
+            items[int(index)] = value
+        project_data[field] = items
+    if entry.get("metadata"):
+        metadata = project_data.get("metadata") or {}
+        metadata.update(entry["metadata"])
+        project_data["metadata"] = metadata
+    if entry.get("updated_at"):
+        project_data["updated_at"] = entry["updated_at"]
+
+
+def load_project_file(filepath: Path) -> Tuple[Dict[str, Any], int]:
+    """
+    加载项目文件（JSON 或容器格式的快照）并重放修改日志
+
+    Returns:
+        Tuple[Dict, int]: (项目数据, 日志条目数)
+    """
+    if is_container(filepath):
+        project_data = read_container(filepath)
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            project_data = json.load(f)
+
+    entries = read_journal(journal_path(filepath))
+    for entry in entries:
+        apply_journal_entry(project_data, entry)
+    return project_data, len(entries)
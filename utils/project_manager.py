@@ -9,16 +9,42 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
+from utils.project_catalog import ProjectCatalog, summarize_project
+from utils.project_container import CONTAINER_SUFFIX, LazyProject, encode_container
+from utils.project_history import HISTORY_SUFFIX, ProjectHistory
+from utils.project_journal import (
+    JOURNAL_COMPACT_ENTRIES, JOURNAL_ROW_FIELDS, append_journal, atomic_write,
+    diff_rows, dumps_row, journal_path, load_project_file
+)
+from utils.project_store import SQLiteProjectStore
+from utils.prompt_schema import json_default
+from utils.translation_memory import TranslationMemory
+
+
+# 存储后端：json（每个项目一个 JSON 文件）/ sqlite（所有项目保存在一个 SQLite 数据库中）
+STORAGE_BACKENDS = ("json", "sqlite")
+
+# 新保存的项目文件格式：json（格式化的 JSON）/ container（分段压缩容器，加载时剧本、提示词按需解压）；
+# 两种格式的文件都可以加载，更新时保持文件原有格式
+FILE_FORMATS = {"json": ".json", "container": CONTAINER_SUFFIX}
+
+# SQLite 后端的项目标识前缀（项目标识在界面中与 JSON 文件路径同样使用）
+SQLITE_PROJECT_PREFIX = "sqlite:"
+
 
 class ProjectManager:
     """项目管理器"""
     
-    def __init__(self, projects_dir: str = None):
+    def __init__(self, projects_dir: str = None, backend: str = None, file_format: str = None):
         """
         初始化项目管理器
         
         Args:
             projects_dir: 项目保存目录，默认在用户目录下的 .script_storyboard 文件夹
+            backend: 存储后端（json / sqlite），默认取环境变量 PROJECT_STORAGE_BACKEND，未设置时为 json；
+                     sqlite 后端首次使用时自动导入项目目录中已有的项目文件（含修改日志）
+            file_format: json 后端新保存的项目文件格式（json / container），默认取环境变量 PROJECT_FILE_FORMAT，
+                         未设置时为 json
         """
         if projects_dir is None:
             # 默认保存在用户目录下
@@ -29,9 +55,34 @@ class ProjectManager:
         
         # 确保目录存在
         self.projects_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 全局翻译术语库（跨项目共享，放在子目录中，避免被当作项目文件列出）
+        self.glossary_path = self.projects_dir / "shared" / "translation_glossary.json"
+        
+        # 项目目录索引（列出项目时不必读取每个项目文件）
+        self.catalog = ProjectCatalog(self.projects_dir / "shared" / "catalog.json")
+        
+        self.backend = backend or os.environ.get("PROJECT_STORAGE_BACKEND", "json")
+        if self.backend not in STORAGE_BACKENDS:
+            raise ValueError(f"不支持的存储后端: {self.backend}")
+        self.file_format = file_format or os.environ.get("PROJECT_FILE_FORMAT", "json")
+        if self.file_format not in FILE_FORMATS:
+            raise ValueError(f"不支持的项目文件格式: {self.file_format}")
+        
+        self.store = None
+        if self.backend == "sqlite":
+            self.store = SQLiteProjectStore(self.projects_dir / "shared" / "projects.db")
+            self.store.import_json_dir(self.projects_dir)
+        
+        # 各项目最近一次读写后的内容（分镜 / 提示词逐行序列化），更新时据此只把变化写入修改日志
+        self._journal_states: Dict[str, Dict[str, Any]] = {}
+        
+        # 各项目的版本历史（缓存最新版本的状态，保存新版本时只需计算增量）
+        self._histories: Dict[str, ProjectHistory] = {}
     
     def save_project(self, project_name: str, script: str, scenes: List[Dict], 
-                    image_prompts: List[Dict] = None, metadata: Dict = None) -> str:
+                    image_prompts: List[Dict] = None, metadata: Dict = None,
+                    registry: Any = None, translation_memory: Any = None) -> str:
         """
         保存项目
         
@@ -41,14 +92,25 @@ class ProjectManager:
             scenes: 分镜列表
             image_prompts: 提示词列表（可选）
             metadata: 元数据（可选）
+            registry: 人物 / 地点登记表（可选，VisualRegistry 或其字典形式）
+            translation_memory: 本项目的翻译记忆库（可选，TranslationMemory 或其字典形式）
         
         Returns:
-            str: 保存的文件路径
+            str: 保存的文件路径（sqlite 后端为项目标识）
         """
+        if self.store is not None:
+            project_id = self.store.save_project(
+                project_name, script, scenes, image_prompts=image_prompts, metadata=metadata,
+                registry=registry, translation_memory=translation_memory
+            )
+            identifier = f"{SQLITE_PROJECT_PREFIX}{project_id}"
+            self._history(identifier).save_version(self.store.load_project(project_id))
+            return identifier
+        
         # 生成文件名（去除特殊字符）
         safe_name = self._sanitize_filename(project_name)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_name}_{timestamp}.json"
+        filename = f"{safe_name}_{timestamp}{FILE_FORMATS[self.file_format]}"
         filepath = self.projects_dir / filename
         
         # 构建项目数据
@@ -59,12 +121,18 @@ class ProjectManager:
             "script": script,
             "scenes": scenes,
             "image_prompts": image_prompts or [],
+            "registry": registry,
+            "translation_memory": translation_memory,
             "metadata": metadata or {}
         }
         
         # 保存到文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(project_data, f, ensure_ascii=False, indent=2)
+        self._write_project(filepath, project_data)
+        
+        self._catalog_project(filepath, project_data)
+        
+        # 新项目的第一个版本
+        self._history(str(filepath)).save_version(project_data)
         
         return str(filepath)
     
@@ -76,50 +144,64 @@ class ProjectManager:
             filepath: 项目文件路径
         
         Returns:
-            Dict: 项目数据
+            Dict: 项目数据（容器格式的文件返回 LazyProject，剧本、提示词等在第一次访问时解压）
         """
-        with open(filepath, 'r', encoding='utf-8') as f:
-            project_data = json.load(f)
+        project_id = self._store_id(filepath)
+        if project_id is not None:
+            return self.store.load_project(project_id)
         
+        project_data, _ = self._load_with_journal(Path(filepath))
         return project_data
     
+    def _load_with_journal(self, filepath: Path):
+        """加载项目文件（快照）并重放修改日志；返回 (项目数据, 日志条目数)"""
+        return load_project_file(filepath)
+    
     def list_projects(self) -> List[Dict[str, Any]]:
         """
         列出所有项目
         
+        项目摘要来自目录索引，只有新增的、或修改时间 / 大小与索引记录不同的项目文件才会重新读取
+        
         Returns:
             List[Dict]: 项目信息列表
         """
+        if self.store is not None:
+            return [self._store_project_info(project) for project in self.store.list_projects()]
+        
         projects = []
+        filenames = []
         
         # 遍历项目目录
-        for filepath in self.projects_dir.glob("*.json"):
+        for filepath in self._project_files():
+            filenames.append(filepath.name)
             try:
-                # 读取项目信息（不加载完整内容）
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # 获取文件修改时间
+                # 获取修改时间（修改先追加到日志，快照只在合并时改写：取两者中较晚的）
                 stat = filepath.stat()
-                mtime = datetime.fromtimestamp(stat.st_mtime)
+                journal_stat = self._journal_stat(filepath)
+                mtime = datetime.fromtimestamp(max(stat.st_mtime, journal_stat.st_mtime if journal_stat else 0))
                 
-                projects.append({
-                    "filename": filepath.name,
-                    "filepath": str(filepath),
-                    "project_name": data.get("project_name", filepath.stem),
-                    "created_at": data.get("created_at", ""),
-                    "updated_at": data.get("updated_at", mtime.isoformat()),
-                    "script_length": len(data.get("script", "")),
-                    "scene_count": len(data.get("scenes", [])),
-                    "prompt_count": len(data.get("image_prompts", [])),
-                    "file_size": stat.st_size,
-                    "modified_time": mtime.isoformat()
-                })
+                summary = self.catalog.lookup(filepath.name, stat, journal_stat)
+                if summary is None:
+                    # 索引中没有或已过期：读取项目文件（含修改日志）并记录摘要
+                    summary = summarize_project(self.load_project(str(filepath)), filepath.stem)
+                    self.catalog.put(filepath.name, stat, summary, journal_stat)
+                
+                project = {"filename": filepath.name, "filepath": str(filepath)}
+                project.update(summary)
+                project["updated_at"] = project["updated_at"] or mtime.isoformat()
+                project["file_size"] = stat.st_size
+                project["modified_time"] = mtime.isoformat()
+                projects.append(project)
             except Exception as e:
                 # 如果文件损坏，跳过
                 print(f"Error loading project {filepath}: {e}")
                 continue
         
+        # 删除已不存在的项目文件的记录
+        self.catalog.retain(filenames)
+        self.catalog.save()
+        
         # 按修改时间排序（最新的在前）
         projects.sort(key=lambda x: x.get("modified_time", ""), reverse=True)
         
@@ -136,9 +218,19 @@ class ProjectManager:
             bool: 是否删除成功
         """
         try:
+            project_id = self._store_id(filepath)
+            if project_id is not None:
+                self._delete_history(filepath)
+                return self.store.delete_project(project_id)
+            
             path = Path(filepath)
             if path.exists() and path.parent == self.projects_dir:
                 path.unlink()
+                journal_path(path).unlink(missing_ok=True)
+                self._journal_states.pop(str(path), None)
+                self._delete_history(filepath)
+                self.catalog.remove(path.name)
+                self.catalog.save()
                 return True
             return False
         except Exception as e:
@@ -157,6 +249,10 @@ class ProjectManager:
             Optional[str]: 新文件路径，如果失败返回None
         """
         try:
+            project_id = self._store_id(old_filepath)
+            if project_id is not None:
+                return old_filepath if self.store.rename_project(project_id, new_name) else None
+            
             old_path = Path(old_filepath)
             if not old_path.exists() or old_path.parent != self.projects_dir:
                 return None
@@ -174,19 +270,28 @@ class ProjectManager:
             else:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            new_filename = f"{safe_name}_{timestamp}.json"
+            new_filename = f"{safe_name}_{timestamp}{old_path.suffix}"
             new_path = self.projects_dir / new_filename
             
-            # 重命名文件
-            old_path.rename(new_path)
-            
-            # 更新项目数据中的名称
-            project_data = self.load_project(str(new_path))
+            # 更新项目数据中的名称（连同修改日志合并为新文件的快照）
+            project_data = self.load_project(str(old_path))
             project_data["project_name"] = new_name
             project_data["updated_at"] = datetime.now().isoformat()
             
-            with open(new_path, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, ensure_ascii=False, indent=2)
+            # 先完整写入新文件，再删除旧文件和日志（中途中断时旧文件仍然完好）
+            self._write_project(new_path, project_data)
+            if new_path != old_path:
+                # 版本历史随项目文件改名
+                old_history = self._history_path(str(old_path))
+                if old_history.exists():
+                    os.replace(old_history, self._history_path(str(new_path)))
+                self._histories.pop(str(old_path), None)
+                old_path.unlink()
+            journal_path(old_path).unlink(missing_ok=True)
+            self._journal_states.pop(str(old_path), None)
+            
+            self.catalog.remove(old_path.name)
+            self._catalog_project(new_path, project_data)
             
             return str(new_path)
         except Exception as e:
@@ -194,46 +299,289 @@ class ProjectManager:
             return None
     
     def update_project(self, filepath: str, script: str = None, scenes: List[Dict] = None,
-                      image_prompts: List[Dict] = None, metadata: Dict = None) -> bool:
+                      image_prompts: List[Dict] = None, metadata: Dict = None,
+                      registry: Any = None, translation_memory: Any = None) -> bool:
         """
         更新项目
         
+        JSON 后端只把与上次保存相比有变化的字段、分镜、提示词作为一条日志追加到项目的修改日志中，
+        日志积累到 JOURNAL_COMPACT_ENTRIES 条时合并为新的快照
+        
         Args:
             filepath: 项目文件路径
             script: 更新的剧本内容（可选）
             scenes: 更新的分镜列表（可选）
             image_prompts: 更新的提示词列表（可选）
             metadata: 更新的元数据（可选）
+            registry: 更新的人物 / 地点登记表（可选）
+            translation_memory: 更新的翻译记忆库（可选）
         
         Returns:
             bool: 是否更新成功
         """
         try:
-            # 加载现有项目
-            project_data = self.load_project(filepath)
+            project_id = self._store_id(filepath)
+            if project_id is not None:
+                # 只写入有变化的分镜 / 提示词行
+                return self.store.update_project(
+                    project_id, script=script, scenes=scenes, image_prompts=image_prompts, metadata=metadata,
+                    registry=registry, translation_memory=translation_memory
+                )
+            
+            path = Path(filepath)
+            state = self._journal_state(path)
             
-            # 更新字段（只更新提供的字段）
-            if script is not None:
-                project_data["script"] = script
-            if scenes is not None:
-                project_data["scenes"] = scenes
-            if image_prompts is not None:
-                project_data["image_prompts"] = image_prompts
+            # 更新字段（只记录提供的、且与上次保存不同的字段）
+            entry = {"updated_at": datetime.now().isoformat()}
+            if script is not None and script != state["script"]:
+                entry.setdefault("set", {})["script"] = script
+                state["script"] = script
+            for field, value in (("registry", registry), ("translation_memory", translation_memory)):
+                if value is not None:
+                    row = dumps_row(value)
+                    if row != state[field]:
+                        entry.setdefault("set", {})[field] = value
+                        state[field] = row
+            for field, items in (("scenes", scenes), ("image_prompts", image_prompts)):
+                if items is not None:
+                    rows, change = diff_rows(state["rows"][field], items)
+                    if change["rows"] or len(rows) != len(state["rows"][field]):
+                        entry.setdefault("rows", {})[field] = change
+                    state["rows"][field] = rows
             if metadata is not None:
-                project_data["metadata"].update(metadata)
+                entry["metadata"] = metadata
+            state["updated_at"] = entry["updated_at"]
             
-            # 更新修改时间
-            project_data["updated_at"] = datetime.now().isoformat()
+            # 追加到修改日志
+            append_journal(journal_path(path), entry)
+            state["entries"] += 1
             
-            # 保存更新
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, ensure_ascii=False, indent=2)
+            if state["entries"] >= JOURNAL_COMPACT_ENTRIES:
+                return self.compact_project(filepath)
+            
+            state["signature"] = self._journal_signature(path)
+            self.catalog.put(path.name, path.stat(), self._state_summary(state), self._journal_stat(path))
+            self.catalog.save()
             
             return True
         except Exception as e:
             print(f"Error updating project {filepath}: {e}")
             return False
     
+    def save_version(self, filepath: str, label: str = "", **fields) -> Optional[Dict[str, Any]]:
+        """
+        保存项目的一个版本（代替每次保存都生成一份完整的新项目文件）
+        
+        先按 update_project 更新项目，再把项目的当前内容记入版本历史（只记录与上一版本相比的增量）
+        
+        Args:
+            filepath: 项目文件路径（sqlite 后端为项目标识）
+            label: 版本说明（可选）
+            **fields: 与 update_project 相同的更新字段（script / scenes / image_prompts / metadata / ...）
+        
+        Returns:
+            Optional[Dict]: 新版本的信息（与 list_versions 的元素相同），失败返回 None
+        """
+        try:
+            if fields and not self.update_project(filepath, **fields):
+                return None
+            return self._history(filepath).save_version(self.load_project(filepath), label)
+        except Exception as e:
+            print(f"Error saving version of project {filepath}: {e}")
+            return None
+    
+    def list_versions(self, filepath: str) -> List[Dict[str, Any]]:
+        """
+        列出项目的所有版本（只读取版本记录头，不恢复内容）
+        
+        Args:
+            filepath: 项目文件路径（sqlite 后端为项目标识）
+        
+        Returns:
+            List[Dict]: version / saved_at / label / scene_count / prompt_count / changed_scenes 等，按版本号升序
+        """
+        try:
+            return self._history(filepath).list_versions()
+        except Exception as e:
+            print(f"Error listing versions of project {filepath}: {e}")
+            return []
+    
+    def load_version(self, filepath: str, version: int = None) -> Dict[str, Any]:
+        """
+        恢复项目的某个版本（从最近的完整快照开始重放增量，最多 VERSION_CHECKPOINT_INTERVAL 条记录）
+        
+        Args:
+            filepath: 项目文件路径（sqlite 后端为项目标识）
+            version: 版本号（默认为最新版本）
+        
+        Returns:
+            Dict: 该版本的项目数据（与 load_project 的结构相同）
+        
+        Raises:
+            KeyError: 版本不存在
+        """
+        return self._history(filepath).load_version(version)
+    
+    def _history_path(self, filepath: str) -> Path:
+        """版本历史文件路径（JSON 后端在项目文件旁，sqlite 后端在 shared/versions 下）"""
+        project_id = self._store_id(filepath)
+        if project_id is not None:
+            return self.projects_dir / "shared" / "versions" / f"sqlite_{project_id}{HISTORY_SUFFIX}"
+        path = Path(filepath)
+        return path.with_name(path.name + HISTORY_SUFFIX)
+    
+    def _history(self, filepath: str) -> ProjectHistory:
+        history = self._histories.get(str(filepath))
+        if history is None:
+            history = self._histories[str(filepath)] = ProjectHistory(self._history_path(filepath))
+        return history
+    
+    def _delete_history(self, filepath: str):
+        self._history_path(filepath).unlink(missing_ok=True)
+        self._histories.pop(str(filepath), None)
+    
+    def compact_project(self, filepath: str) -> bool:
+        """
+        合并修改日志：快照和日志合并后原子写入为新的快照，再删除日志
+        （删除日志前中断时，日志条目在新快照上重放的结果不变）
+        
+        Args:
+            filepath: 项目文件路径
+        
+        Returns:
+            bool: 是否合并成功
+        """
+        try:
+            path = Path(filepath)
+            self._journal_states.pop(str(path), None)
+            project_data = self.load_project(str(path))
+            self._write_project(path, project_data)
+            journal_path(path).unlink(missing_ok=True)
+            self._catalog_project(path, project_data)
+            return True
+        except Exception as e:
+            print(f"Error compacting project {filepath}: {e}")
+            return False
+    
+    def _journal_state(self, path: Path) -> Dict[str, Any]:
+        """项目当前内容的序列化状态（缓存；项目文件或日志被其他进程修改过时重新加载）"""
+        signature = self._journal_signature(path)
+        state = self._journal_states.get(str(path))
+        if state is not None and state["signature"] == signature:
+            return state
+        
+        project_data, entries = self._load_with_journal(path)
+        state = {
+            "signature": signature,
+            "entries": entries,
+            "project_name": project_data.get("project_name", path.stem),
+            "created_at": project_data.get("created_at", ""),
+            "updated_at": project_data.get("updated_at", ""),
+            "script": project_data.get("script") or "",
+            "registry": dumps_row(project_data.get("registry")),
+            "translation_memory": dumps_row(project_data.get("translation_memory")),
+            "rows": {field: [dumps_row(item) for item in project_data.get(field) or []] for field in JOURNAL_ROW_FIELDS}
+        }
+        self._journal_states[str(path)] = state
+        return state
+    
+    def _journal_stat(self, path: Path) -> Optional[os.stat_result]:
+        """项目修改日志的 stat 结果（没有日志时返回 None）"""
+        try:
+            return journal_path(path).stat()
+        except FileNotFoundError:
+            return None
+    
+    def _journal_signature(self, path: Path):
+        """项目文件和修改日志的 (修改时间, 大小)，用于判断缓存的状态是否仍然有效"""
+        stat = path.stat()
+        journal_stat = self._journal_stat(path)
+        return (stat.st_mtime_ns, stat.st_size,
+                journal_stat.st_mtime_ns if journal_stat else None, journal_stat.st_size if journal_stat else None)
+    
+    @staticmethod
+    def _state_summary(state: Dict[str, Any]) -> Dict[str, Any]:
+        """由序列化状态得到项目摘要（与 summarize_project 的字段相同）"""
+        return {
+            "project_name": state["project_name"],
+            "created_at": state["created_at"],
+            "updated_at": state["updated_at"],
+            "script_length": len(state["script"]),
+            "scene_count": len(state["rows"]["scenes"]),
+            "prompt_count": len(state["rows"]["image_prompts"])
+        }
+    
+    def _project_files(self) -> List[Path]:
+        """项目目录中的所有项目文件（JSON 和容器格式）"""
+        files = []
+        for suffix in FILE_FORMATS.values():
+            files.extend(self.projects_dir.glob(f"*{suffix}"))
+        return files
+    
+    def _write_project(self, filepath: Path, project_data: Dict[str, Any]):
+        """按文件扩展名对应的格式原子写入项目文件（写入中断时原文件保持不变）"""
+        if filepath.suffix == CONTAINER_SUFFIX:
+            data = encode_container(project_data)
+        else:
+            if isinstance(project_data, LazyProject):
+                project_data = project_data.to_json()
+            data = json.dumps(project_data, ensure_ascii=False, indent=2, default=json_default).encode("utf-8")
+        atomic_write(filepath, data)
+    
+    def _store_id(self, filepath: str) -> Optional[int]:
+        """sqlite 后端的项目标识 -> 项目 ID（JSON 文件路径返回 None）"""
+        if self.store is not None and str(filepath).startswith(SQLITE_PROJECT_PREFIX):
+            return int(str(filepath)[len(SQLITE_PROJECT_PREFIX):])
+        return None
+    
+    def _store_project_info(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        """sqlite 后端的项目摘要 -> 与 JSON 文件相同字段的项目信息"""
+        info = {"filename": "", "filepath": f"{SQLITE_PROJECT_PREFIX}{project['id']}"}
+        info.update({key: value for key, value in project.items() if key != "id"})
+        info["file_size"] = None
+        info["modified_time"] = project["updated_at"]
+        return info
+    
+    def _catalog_project(self, filepath: Path, project_data: Dict[str, Any]):
+        """刚写入的项目文件记入目录索引（摘要直接取自内存中的项目数据，不再读取文件）"""
+        self.catalog.put(filepath.name, filepath.stat(), summarize_project(project_data, filepath.stem),
+                         self._journal_stat(filepath))
+        self.catalog.save()
+    
+    def load_glossary(self) -> TranslationMemory:
+        """
+        加载全局翻译术语库（不存在或损坏时返回空术语库）
+        
+        Returns:
+            TranslationMemory: 术语库
+        """
+        try:
+            if self.glossary_path.exists():
+                with open(self.glossary_path, 'r', encoding='utf-8') as f:
+                    return TranslationMemory.from_json(json.load(f))
+        except Exception as e:
+            print(f"Error loading glossary {self.glossary_path}: {e}")
+        return TranslationMemory()
+    
+    def save_glossary(self, glossary: TranslationMemory) -> bool:
+        """
+        保存全局翻译术语库
+        
+        Args:
+            glossary: 术语库
+        
+        Returns:
+            bool: 是否保存成功
+        """
+        try:
+            self.glossary_path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(glossary, ensure_ascii=False, indent=2, default=json_default)
+            atomic_write(self.glossary_path, data.encode("utf-8"))
+            return True
+        except Exception as e:
+            print(f"Error saving glossary {self.glossary_path}: {e}")
+            return False
+    
     def _sanitize_filename(self, filename: str) -> str:
         """
         清理文件名，移除特殊字符
@@ -0,0 +1,319 @@
+"""
+SQLite 项目存储
+项目、分镜、提示词分表保存（每个分镜 / 提示词一行），修改单个分镜只需更新一行；
+使用 WAL 模式（读取不阻塞写入），每次保存在一个事务中完成；支持导入原有的项目文件（JSON / 容器格式，含修改日志）
+"""
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from utils.project_container import CONTAINER_SUFFIX
+from utils.project_journal import load_project_file
+from utils.prompt_schema import json_default
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    project_name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    script TEXT NOT NULL DEFAULT '',
+    registry TEXT,
+    translation_memory TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS scenes (
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (project_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS prompts (
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (project_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS imports (
+    source_path TEXT PRIMARY KEY,
+    project_id INTEGER NOT NULL
+);
+"""
+
+# 按行保存的列表字段 -> 表名
+_ROW_TABLES = {"scenes": "scenes", "image_prompts": "prompts"}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=json_default)
+
+
+class SQLiteProjectStore:
+    """SQLite 项目存储（每次操作使用独立连接，可在多个线程 / 进程之间共享同一个数据库文件）"""
+
+    def __init__(self, db_path: str):
+        """
+        初始化存储（数据库文件不存在时创建）
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # WAL 模式记录在数据库文件中，设置一次即可
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接；with 块正常结束时提交事务，出错时回滚"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_project(self, project_name: str, script: str, scenes: List[Dict],
+                     image_prompts: List[Dict] = None, metadata: Dict = None,
+                     registry: Any = None, translation_memory: Any = None,
+                     created_at: str = None, updated_at: str = None,
+                     source_path: str = None) -> int:
+        """
+        保存新项目（一个事务）
+
+        Args:
+            project_name ~ translation_memory: 与 ProjectManager.save_project 相同
+            created_at / updated_at: 创建 / 修改时间（默认为当前时间；导入时保留原值）
+            source_path: 导入来源的 JSON 文件路径（可选）
+
+        Returns:
+            int: 项目 ID
+        """
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO projects (project_name, created_at, updated_at, script, registry, "
+                "translation_memory, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (project_name, created_at or now, updated_at or now, script or "",
+                 _dumps(registry), _dumps(translation_memory), _dumps(metadata or {}))
+            )
+            project_id = cursor.lastrowid
+            if source_path:
+                # 导入记录在项目删除后仍然保留，已导入的文件不会再次导入
+                conn.execute("INSERT OR REPLACE INTO imports (source_path, project_id) VALUES (?, ?)",
+                             (source_path, project_id))
+            for field, table in _ROW_TABLES.items():
+                items = scenes if field == "scenes" else image_prompts
+                conn.executemany(
+                    f"INSERT INTO {table} (project_id, position, data) VALUES (?, ?, ?)",
+                    [(project_id, position, _dumps(item)) for position, item in enumerate(items or [])]
+                )
+        return project_id
+
+    def load_project(self, project_id: int) -> Dict[str, Any]:
+        """
+        加载项目（与 JSON 项目文件的结构相同）
+
+        Raises:
+            KeyError: 项目不存在
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT project_name, created_at, updated_at, script, registry, translation_memory, metadata "
+                "FROM projects WHERE id = ?", (project_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"项目不存在: {project_id}")
+            project_name, created_at, updated_at, script, registry, translation_memory, metadata = row
+            project_data = {
+                "project_name": project_name,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "script": script
+            }
+            for field, table in _ROW_TABLES.items():
+                project_data[field] = [
+                    json.loads(data) for (data,) in conn.execute(
+                        f"SELECT data FROM {table} WHERE project_id = ? ORDER BY position", (project_id,)
+                    )
+                ]
+            project_data["registry"] = json.loads(registry) if registry else None
+            project_data["translation_memory"] = json.loads(translation_memory) if translation_memory else None
+            project_data["metadata"] = json.loads(metadata) if metadata else {}
+        return project_data
+
+    def update_project(self, project_id: int, script: str = None, scenes: List[Dict] = None,
+                       image_prompts: List[Dict] = None, metadata: Dict = None,
+                       registry: Any = None, translation_memory: Any = None) -> bool:
+        """
+        更新项目（只更新提供的字段；分镜 / 提示词列表逐行比较，只写入有变化的行；一个事务）
+
+        Returns:
+            bool: 项目是否存在
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT metadata FROM projects WHERE id = ?", (project_id,)).fetchone()
+            if row is None:
+                return False
+
+            columns = {"updated_at": datetime.now().isoformat()}
+            if script is not None:
+                columns["script"] = script
+            if registry is not None:
+                columns["registry"] = _dumps(registry)
+            if translation_memory is not None:
+                columns["translation_memory"] = _dumps(translation_memory)
+            if metadata is not None:
+                merged = json.loads(row[0]) if row[0] else {}
+                merged.update(metadata)
+                columns["metadata"] = _dumps(merged)
+            conn.execute(
+                f"UPDATE projects SET {', '.join(f'{name} = ?' for name in columns)} WHERE id = ?",
+                (*columns.values(), project_id)
+            )
+
+            if scenes is not None:
+                self._sync_rows(conn, "scenes", project_id, scenes)
+            if image_prompts is not None:
+                self._sync_rows(conn, "prompts", project_id, image_prompts)
+        return True
+
+    @staticmethod
+    def _sync_rows(conn: sqlite3.Connection, table: str, project_id: int, items: List[Any]):
+        """把表中该项目的行同步为 items：只写入内容变化的行，删除多余的行"""
+        existing = dict(conn.execute(f"SELECT position, data FROM {table} WHERE project_id = ?", (project_id,)))
+        changed = []
+        for position, item in enumerate(items):
+            data = _dumps(item)
+            if existing.get(position) != data:
+                changed.append((project_id, position, data))
+        if changed:
+            conn.executemany(f"INSERT OR REPLACE INTO {table} (project_id, position, data) VALUES (?, ?, ?)", changed)
+        if len(existing) > len(items):
+            conn.execute(f"DELETE FROM {table} WHERE project_id = ? AND position >= ?", (project_id, len(items)))
+
+    def update_scene(self, project_id: int, index: int, scene: Dict) -> bool:
+        """
+        更新单个分镜（只写入一行）
+
+        Args:
+            project_id: 项目 ID
+            index: 分镜下标（从 0 开始）
+            scene: 分镜
+
+        Returns:
+            bool: 该分镜是否存在
+        """
+        return self._update_row("scenes", project_id, index, scene)
+
+    def update_prompt(self, project_id: int, index: int, prompt: Dict) -> bool:
+        """更新单个提示词（只写入一行）；参数同 update_scene"""
+        return self._update_row("prompts", project_id, index, prompt)
+
+    def _update_row(self, table: str, project_id: int, index: int, item: Any) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE {table} SET data = ? WHERE project_id = ? AND position = ?",
+                (_dumps(item), project_id, index)
+            )
+            if not cursor.rowcount:
+                return False
+            conn.execute("UPDATE projects SET updated_at = ? WHERE id = ?", (datetime.now().isoformat(), project_id))
+        return True
+
+    def rename_project(self, project_id: int, new_name: str) -> bool:
+        """重命名项目；返回项目是否存在"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE projects SET project_name = ?, updated_at = ? WHERE id = ?",
+                (new_name, datetime.now().isoformat(), project_id)
+            )
+            return bool(cursor.rowcount)
+
+    def delete_project(self, project_id: int) -> bool:
+        """删除项目（分镜和提示词随之删除）；返回项目是否存在"""
+        with self._connect() as conn:
+            return bool(conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount)
+
+    def list_projects(self) -> List[Dict[str, Any]]:
+        """
+        列出所有项目的摘要（不读取剧本、分镜、提示词内容）
+
+        Returns:
+            List[Dict]: id / project_name / created_at / updated_at / script_length / scene_count / prompt_count，
+                        按修改时间排序（最新的在前）
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, project_name, created_at, updated_at, length(script), "
+                "(SELECT COUNT(*) FROM scenes WHERE project_id = projects.id), "
+                "(SELECT COUNT(*) FROM prompts WHERE project_id = projects.id) "
+                "FROM projects ORDER BY updated_at DESC"
+            ).fetchall()
+        return [
+            {
+                "id": project_id,
+                "project_name": project_name,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "script_length": script_length,
+                "scene_count": scene_count,
+                "prompt_count": prompt_count
+            }
+            for project_id, project_name, created_at, updated_at, script_length, scene_count, prompt_count in rows
+        ]
+
+    def import_json(self, filepath: str) -> int:
+        """
+        导入项目文件（JSON 或容器格式；重放尚未合并的修改日志，保留原有的创建 / 修改时间）
+
+        Args:
+            filepath: 项目文件路径
+
+        Returns:
+            int: 新项目的 ID
+        """
+        data, _ = load_project_file(Path(filepath))
+        return self.save_project(
+            data.get("project_name", Path(filepath).stem),
+            data.get("script", ""),
+            data.get("scenes", []),
+            image_prompts=data.get("image_prompts", []),
+            metadata=data.get("metadata", {}),
+            registry=data.get("registry"),
+            translation_memory=data.get("translation_memory"),
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at"),
+            source_path=str(Path(filepath).resolve())
+        )
+
+    def import_json_dir(self, directory: str) -> List[int]:
+        """
+        导入目录中尚未导入过的项目文件（JSON 和容器格式；按来源路径判断，导入后又删除的项目也不再导入；损坏的文件跳过）
+
+        Args:
+            directory: 项目目录
+
+        Returns:
+            List[int]: 新导入的项目 ID
+        """
+        with self._connect() as conn:
+            imported = {path for (path,) in conn.execute("SELECT source_path FROM imports")}
+        project_ids = []
+        filepaths = [*Path(directory).glob("*.json"), *Path(directory).glob(f"*{CONTAINER_SUFFIX}")]
+        for filepath in sorted(filepaths):
+            if str(filepath.resolve()) in imported:
+                continue
+            try:
+                project_ids.append(self.import_json(str(filepath)))
+            except Exception as e:
+                print(f"Error importing project {filepath}: {e}")
+        return project_ids
@@ -3,10 +3,15 @@
 支持 LLM 辅助生成更准确的 JSON 提示词
 """
 
+import hashlib
 import json
-from typing import Dict, List, Any, Optional
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from typing import Dict, List, Any, Optional, Callable, Iterator, Tuple
 from config.image_prompt_templates import (
-    NANO_BANANA_PROMPT_TEMPLATE,
     SHOT_SIZE_MAPPING,
     CAMERA_ANGLE_MAPPING,
     CAMERA_MOVEMENT_MAPPING,
@@ -22,13 +27,314 @@ from config.image_prompt_templates import (
 from config.prompt_generation_prompts import (
     PROMPT_GENERATION_SYSTEM_PROMPT,
     get_visual_elements_extraction_prompt,
+    get_batch_visual_elements_extraction_prompt,
     get_translation_prompt
 )
+from utils.prompt_schema import (
+    NanoBananaPrompt,
+    SubjectSection,
+    SceneSection,
+    CompositionSection,
+    LightingSection,
+    CameraTechnicalSection,
+    VisualStyleSection,
+    prompt_variant
+)
+from utils.keyword_matcher import KeywordMatcher
+from utils.memo_cache import MemoCache
+from utils.visual_registry import VisualRegistry
+from utils.translation_memory import TranslationMemory
+from utils.segmenter import MaxMatchSegmenter, PUNCTUATION_TRANSLATIONS
+from utils.near_duplicate import NearDuplicateIndex
+
+# ===== 规则模式关键词表（模块加载时编译一次，所有提取函数共享） =====
+
+# 动作关键词（按长度排序，优先匹配长词）
+ACTION_KEYWORDS = sorted([
+    "坐", "站", "走", "跑", "看", "说", "笑", "哭", "转身", "抬头", "低头",
+    "推", "拉", "拿", "放", "举", "握", "抓", "扔", "踢", "跳",
+    "进入", "离开", "靠近", "远离", "跟随", "追逐", "躲避",
+    "环顾", "张望", "凝视", "注视", "扫视", "瞥见",
+    "点头", "摇头", "挥手", "摆手", "指向",
+    "蹲下", "站起", "躺下", "趴下", "跪下", "弯腰",
+    "拥抱", "握手", "拍", "打", "推门", "开门", "关门",
+    "拿起", "放下", "递给", "接过", "翻开", "合上"
+], key=len, reverse=True)
+
+# 姿势关键词（按长度排序）
+POSE_KEYWORDS = sorted([
+    "坐", "站", "蹲", "跪", "躺", "趴", "靠", "倚",
+    "弯腰", "挺胸", "抬头", "低头", "侧身", "转身",
+    "双手叉腰", "双手抱胸", "双手背后", "单手扶墙",
+    "双腿交叉", "单腿站立", "盘腿", "翘腿"
+], key=len, reverse=True)
+
+# 表情关键词（按长度排序）
+EXPRESSION_KEYWORDS = sorted([
+    "焦虑", "紧张", "轻松", "悲伤", "高兴", "愤怒", "疑惑", "微笑",
+    "严肃", "冷漠", "兴奋", "恐惧", "惊讶", "失望", "满意", "不满",
+    "痛苦", "快乐", "忧郁", "开朗", "疲惫", "精神", "专注", "分心",
+    "面无表情", "眉头紧锁", "嘴角上扬", "眼神坚定", "眼神闪烁",
+    "如释重负", "愁眉苦脸", "喜笑颜开", "怒目而视"
+], key=len, reverse=True)
+
+# 服装关键词（按列表顺序匹配）
+CLOTHING_KEYWORDS = [
+    "西装", "衬衫", "T恤", "裙子", "裤子", "外套", "大衣", "风衣",
+    "制服", "工作服", "运动服", "休闲服", "正装", "便装",
+    "红色", "蓝色", "黑色", "白色", "灰色", "彩色"
+]
+
+# 道具关键词（按列表顺序匹配）
+PROPS_KEYWORDS = [
+    "手机", "电脑", "书", "笔", "杯子", "包", "钥匙", "钱包",
+    "文件", "文件夹", "报纸", "杂志", "相机", "眼镜",
+    "门", "窗", "桌子", "椅子", "沙发", "床",
+    "车", "自行车", "摩托车", "行李箱"
+]
+
+# 天气关键词（按列表顺序匹配）
+WEATHER_KEYWORDS = [
+    "晴天", "阴天", "雨天", "雪天", "雾天", "大风", "微风",
+    "阳光", "月光", "星光", "灯光", "霓虹灯"
+]
+
+# 场景特征关键词
+SCENE_FEATURE_KEYWORDS = [
+    "宽敞", "狭窄", "明亮", "昏暗", "整洁", "凌乱", "安静", "嘈杂",
+    "现代", "古典", "豪华", "简陋", "温馨", "冷清", "热闹", "空旷"
+]
+
+# 位置关系关键词（长词优先）
+POSITION_KEYWORDS = sorted([
+    "坐在", "站在", "躺在", "靠在", "倚在", "位于",
+    "窗边", "桌边", "门口", "角落", "中央", "中间",
+    "旁边", "前方", "后方", "左侧", "右侧", "边缘",
+    "面对", "背对", "面向", "背向", "靠近", "远离"
+], key=len, reverse=True)
+
+# 空镜判断：人物词汇、动作词汇、环境词汇、空镜标注词汇
+PERSON_KEYWORDS = [
+    "人物", "角色", "人", "主角", "演员", "他", "她", "他们", "她们",
+    "配角", "反派", "英雄"
+]
+EMPTY_SCENE_ACTION_KEYWORDS = ["走", "跑", "坐", "站", "看", "说", "笑", "哭", "转身", "抬头", "低头"]
+ENVIRONMENT_KEYWORDS = [
+    "风景", "环境", "建筑", "天空", "云", "山", "海", "树", "街道", "城市", "房屋",
+    "空镜", "空景", "空镜头", "空场景", "无人物", "没有人", "纯环境", "纯风景"
+]
+EMPTY_SCENE_MARKER_KEYWORDS = ["空镜", "空景", "空镜头", "空场景", "无人物", "没有人", "纯环境", "纯风景"]
+
+# 姿势推断规则：(关键词, 姿势)，按顺序匹配（关键词在小写文本中查找）
+POSE_BY_ACTION_RULES = [
+    (("跑", "奔跑", "running"), "身体前倾、双腿交替、手臂摆动"),
+    (("走", "步行", "walking"), "自然站立、双腿交替、手臂自然摆动"),
+    (("停", "停下", "stop"), "急停、身体前倾、双手撑膝"),
+    (("坐", "sitting"), "盘腿而坐、身体前倾"),
+    (("站", "站立", "standing"), "昂首站立、双手自然下垂"),
+    (("蹲", "crouching"), "蹲下、身体前倾、双手撑地"),
+    (("躺", "lying"), "平躺、身体放松"),
+    (("转身", "turn"), "转身、背对镜头、肩膀紧绷"),
+    (("看", "look", "凝视"), "站立、头部转向、眼神专注"),
+    (("握", "grip", "握拳"), "握拳、挺胸、身体前倾"),
+]
+POSE_BY_MOOD_RULES = [
+    (("愤怒", "angry"), "握拳、挺胸、身体前倾"),
+    (("悲伤", "sad"), "低头、肩膀下垂、双手无力"),
+    (("紧张", "nervous"), "身体紧绷、双手握拳、肩膀高耸"),
+    (("放松", "relaxed"), "身体放松、双手自然下垂、肩膀放松"),
+]
+POSE_BY_SHOT_SIZE_RULES = [
+    (("特写", "close"), "头部特写、颈部以上"),
+    (("近景", "close shot"), "肩部以上、头部和肩膀"),
+    (("中景", "medium"), "腰部以上、上半身"),
+    (("全景", "full"), "全身站立、双手自然下垂"),
+]
+
+# 动词模式（没有命中动作关键词时使用）
+VERB_PATTERNS = [
+    re.compile(r"([^，。！？\s]+(?:着|了|过|在))"),  # 带助词的动词
+    re.compile(r"([^，。！？\s]+(?:中|时))"),  # 进行时
+]
+
+RULE_KEYWORD_MATCHER = KeywordMatcher({
+    "action": ACTION_KEYWORDS,
+    "pose": POSE_KEYWORDS,
+    "expression": EXPRESSION_KEYWORDS,
+    "clothing": CLOTHING_KEYWORDS,
+    "props": PROPS_KEYWORDS,
+    "weather": WEATHER_KEYWORDS,
+    "scene_feature": SCENE_FEATURE_KEYWORDS,
+    "position": POSITION_KEYWORDS,
+    "person": PERSON_KEYWORDS,
+    "empty_scene_action": EMPTY_SCENE_ACTION_KEYWORDS,
+    "environment": ENVIRONMENT_KEYWORDS,
+    "empty_scene_marker": EMPTY_SCENE_MARKER_KEYWORDS,
+    "pose_by_action": [keyword for keywords, _ in POSE_BY_ACTION_RULES for keyword in keywords],
+    "pose_by_mood": [keyword for keywords, _ in POSE_BY_MOOD_RULES for keyword in keywords],
+    "pose_by_shot_size": [keyword for keywords, _ in POSE_BY_SHOT_SIZE_RULES for keyword in keywords],
+})
+
+
+# 影响提示词生成结果的分镜字段（用于计算内容哈希，判断分镜是否需要重新生成）
+PROMPT_RELEVANT_SCENE_FIELDS = (
+    "scene_number", "scene_description", "characters", "location", "time", "mood",
+    "shot_size", "camera_angle", "composition_tension", "lens_focal_length",
+    "camera", "lens", "aperture", "dialogue_text"
+)
+
+# 影响提示词生成结果的生成器配置项
+PROMPT_RELEVANT_CONFIG_KEYS = (
+    "language", "detail_level", "include_technical", "include_mood",
+    "include_characters", "include_dialogue", "use_llm", "llm_mode"
+)
+
+# 多语言输出时生成的语言版本，以及每个版本包含的字段
+PROMPT_LANGUAGES = ("chinese", "english", "bilingual")
+PROMPT_VARIANT_FIELDS = ("prompt_json", "prompt_text", "negative_prompt")
+
+# 基础翻译字典（扩展版），模块加载时构建一次，所有生成器共享（只读）
+BASIC_TRANSLATIONS = {
+    # 基础动作
+    "坐": "sitting", "站": "standing", "走": "walking", "跑": "running",
+    "看": "looking", "说": "speaking", "笑": "smiling", "哭": "crying",
+    "转身": "turning", "抬头": "looking up", "低头": "looking down",
+    "蹲": "crouching", "跪": "kneeling", "躺": "lying", "趴": "lying face down",
+    "靠": "leaning", "倚": "leaning against", "弯腰": "bending over",
+    "挺胸": "chest out", "侧身": "sideways", "转身": "turning around",
+    "推": "pushing", "拉": "pulling", "拿": "holding", "放": "placing",
+    "举": "raising", "握": "gripping", "抓": "grabbing", "扔": "throwing",
+    "踢": "kicking", "跳": "jumping", "进入": "entering", "离开": "leaving",
+    "靠近": "approaching", "远离": "moving away", "跟随": "following",
+    "追逐": "chasing", "躲避": "avoiding", "环顾": "looking around",
+    "张望": "peering", "凝视": "gazing", "注视": "staring", "扫视": "scanning",
+    "瞥见": "glimpsing", "点头": "nodding", "摇头": "shaking head",
+    "挥手": "waving", "摆手": "gesturing", "指向": "pointing",
+    "蹲下": "squatting", "站起": "standing up", "躺下": "lying down",
+    "趴下": "lying face down", "跪下": "kneeling", "弯腰": "bending",
+    "拥抱": "hugging", "握手": "shaking hands", "拍": "patting",
+    "打": "hitting", "推门": "pushing door", "开门": "opening door",
+    "关门": "closing door", "拿起": "picking up", "放下": "putting down",
+    "递给": "handing", "接过": "receiving", "翻开": "opening", "合上": "closing",
+    
+    # 表情和情绪
+    "焦虑": "anxious", "紧张": "tense", "轻松": "relaxed", "悲伤": "sad",
+    "高兴": "happy", "愤怒": "angry", "疑惑": "confused", "微笑": "smiling",
+    "严肃": "serious", "冷漠": "indifferent", "兴奋": "excited", "恐惧": "fearful",
+    "惊讶": "surprised", "失望": "disappointed", "满意": "satisfied", "不满": "dissatisfied",
+    "痛苦": "painful", "快乐": "joyful", "忧郁": "melancholic", "开朗": "cheerful",
+    "疲惫": "tired", "精神": "energetic", "专注": "focused", "分心": "distracted",
+    "面无表情": "expressionless", "眉头紧锁": "frowning", "嘴角上扬": "smiling",
+    "眼神坚定": "determined eyes", "眼神闪烁": "shifty eyes", "如释重负": "relieved",
+    "愁眉苦脸": "worried", "喜笑颜开": "beaming", "怒目而视": "glaring",
+    
+    # 姿势相关
+    "双手叉腰": "hands on hips", "双手抱胸": "arms crossed", "双手背后": "hands behind back",
+    "单手扶墙": "one hand on wall", "双腿交叉": "legs crossed", "单腿站立": "standing on one leg",
+    "盘腿": "cross-legged", "翘腿": "legs crossed", "身体前倾": "leaning forward",
+    "身体后仰": "leaning back", "肩膀下垂": "shoulders drooping", "肩膀高耸": "shoulders raised",
+    "双手撑膝": "hands on knees", "双手撑地": "hands on ground", "握拳": "clenched fists",
+    "自然站立": "standing naturally", "双手自然下垂": "arms hanging naturally",
+    
+    # 服装相关
+    "西装": "suit", "衬衫": "shirt", "T恤": "T-shirt", "裙子": "skirt",
+    "裤子": "pants", "外套": "jacket", "大衣": "coat", "风衣": "trench coat",
+    "制服": "uniform", "工作服": "work clothes", "运动服": "sportswear",
+    "休闲服": "casual wear", "正装": "formal wear", "便装": "casual clothes",
+    
+    # 场景和环境
+    "宽敞": "spacious", "狭窄": "narrow", "明亮": "bright", "昏暗": "dim",
+    "整洁": "tidy", "凌乱": "messy", "安静": "quiet", "嘈杂": "noisy",
+    "现代": "modern", "古典": "classical", "豪华": "luxurious", "简陋": "simple",
+    "温馨": "cozy", "冷清": "desolate", "热闹": "lively", "空旷": "empty",
+    
+    # 时间和天气
+    "白天": "daytime", "夜晚": "night", "黄昏": "dusk", "黎明": "dawn",
+    "中午": "noon", "下午": "afternoon", "早晨": "morning", "傍晚": "evening",
+    "晴天": "sunny", "雨天": "rainy", "阴天": "cloudy", "雪天": "snowy",
+    "大风": "windy", "雾天": "foggy", "雷雨": "thunderstorm",
+    
+    # 通用词汇
+    "动作": "action", "自然表情": "natural expression", "人物": "character",
+    "主角": "protagonist", "角色": "character", "场景": "scene", "环境": "environment",
+    "背景": "background", "地点": "location", "氛围": "atmosphere", "情绪": "emotion",
+    "表情": "expression", "姿势": "pose", "服装": "clothing", "道具": "props",
+    "特写": "close-up", "中景": "medium shot", "远景": "wide shot", "全景": "full shot",
+    "镜头": "shot", "画面": "frame", "构图": "composition", "光影": "lighting",
+    "色彩": "color", "色调": "tone", "质感": "texture", "风格": "style"
+}
+
+
+def _build_translation_lexicon() -> Dict[str, str]:
+    """
+    字典翻译的词典：基础翻译字典 + 镜头 / 情绪 / 时间映射表中的中文词条 + 中文标点
+    
+    映射表的英文描述取第一个逗号前的部分（例如 "大远景" -> "extreme wide shot"），
+    与基础翻译字典重复的词条以基础翻译字典为准
+    """
+    lexicon = dict(PUNCTUATION_TRANSLATIONS)
+    for mapping in (SHOT_SIZE_MAPPING, CAMERA_ANGLE_MAPPING, CAMERA_MOVEMENT_MAPPING,
+                    CAMERA_EQUIPMENT_MAPPING, MOOD_MAPPING, TIME_MAPPING):
+        for chinese, entry in mapping.items():
+            english = entry.get("english", "").split(",")[0].strip()
+            if english and re.search(r"[\u4e00-\u9fff]", chinese):
+                lexicon.setdefault(chinese, english.replace(" atmosphere", ""))
+    lexicon.update(BASIC_TRANSLATIONS)
+    return lexicon
+
+
+# 字典翻译使用的双向最大匹配分词器（模块加载时构建一次，所有生成器共享）
+TRANSLATION_SEGMENTER = MaxMatchSegmenter(_build_translation_lexicon())
+
+# 字典翻译结果缓存（词典只读，动作、姿势、表情等短语在分镜之间大量重复）
+DICT_TRANSLATION_MEMO = MemoCache(maxsize=8192)
+
+
+def _translate_description_with_dict(text: str) -> str:
+    """
+    分镜描述的字典翻译：双向最大匹配分词后逐词翻译，
+    未登录片段（人名、词典外的短语等）作为整体保留原文，与译文之间以空格分隔，不把英文拼接进中文词中间
+    """
+    return TRANSLATION_SEGMENTER.translate(text)
+
+# 详细程度（决定生成成本）：
+#   simple   - 快速预览：不做视觉元素提取和翻译，只构建构图、技术参数和质量标签
+#   standard - 规则处理（关键词提取 + 字典翻译）
+#   detailed - 启用 LLM 提取视觉元素和翻译（需要提供 llm_service）
+DETAIL_LEVELS = ("simple", "standard", "detailed")
+
+# 只依赖少量枚举字段的分区：分区名 -> 决定其内容的分镜字段
+# 这些字段取自 SceneParser 的固定选项，组合数很少，按 (分区, 语言, 字段值) 缓存构建结果
+MEMOIZED_SECTION_FIELDS = {
+    "composition": ("shot_size", "camera_angle", "composition_tension"),
+    "lighting": ("time", "mood"),
+    "camera_technical": ("camera", "lens", "aperture", "lens_focal_length"),
+    "visual_style": ("camera", "mood"),
+}
+
+# 分区缓存（所有生成器实例共享，缓存的分区为只读对象）
+SECTION_MEMO = MemoCache(maxsize=4096)
+
+# 多进程批量生成时，每个进程至少分到的分镜数（分镜太少时进程启动开销大于收益，直接串行）
+PARALLEL_MIN_CHUNK_SIZE = 50
+
+
+def _match_pose_rule(text: str, category: str, rules: List) -> str:
+    """按规则顺序返回第一条命中的姿势（没有命中返回空字符串）"""
+    hits = RULE_KEYWORD_MATCHER.scan(text).get(category)
+    if hits:
+        for keywords, pose in rules:
+            if not hits.isdisjoint(keywords):
+                return pose
+    return ""
+
 
 class ImagePromptGenerator:
     """文生图提示词生成器（Nano Banana Pro 格式）"""
     
-    def __init__(self, config: Optional[Dict] = None, llm_service: Optional[Any] = None):
+    def __init__(self, config: Optional[Dict] = None, llm_service: Optional[Any] = None,
+                 registry: Optional[VisualRegistry] = None,
+                 translation_memory: Optional[TranslationMemory] = None):
         """
         初始化生成器
         
@@ -36,12 +342,24 @@ class ImagePromptGenerator:
             config: 配置字典，包含：
                 - language: "chinese", "english", "bilingual" (默认: "bilingual")
                 - detail_level: "simple", "standard", "detailed" (默认: "standard")
+                  simple 为快速预览（不提取、不翻译）；detailed 自动启用 LLM 辅助
                 - include_technical: bool (默认: True)
                 - include_mood: bool (默认: True)
                 - include_characters: bool (默认: True)
                 - include_dialogue: bool (默认: False)
                 - use_llm: bool (默认: False) - 是否使用 LLM 辅助生成
+                - llm_batch_size: int (默认: 1) - LLM 模式下一次请求提取的连续分镜数
+                - llm_mode: "full", "hybrid" (默认: "full") - hybrid 为混合模式：先用规则提取，
+                  只有结果不完整、置信度低于 llm_confidence_threshold (默认: 0.7) 的分镜才调用 LLM 提取
+                  （阈值为 0 时等同规则模式，为 1 时等同 full 模式）；
+                  词典能完整覆盖的分镜描述直接字典翻译，不调用 LLM 翻译
+                - near_duplicate_threshold: float (LLM 模式默认: 0.85，规则模式默认: 0 即关闭)
+                  人物、地点、景别、时间、情绪、天气相同且描述相似度达到阈值的分镜只生成一次，其余分镜只修补不同的字段
+                - multilingual: bool (默认: False) - 多语言输出：每个分镜只提取、翻译一次，
+                  同时生成中文、英文、双语三个版本（结果中的 variants），顶层字段为 language 指定的版本
             llm_service: LLMService 实例（可选），如果提供且 use_llm=True，将使用 LLM 辅助生成
+            registry: 项目级人物 / 地点登记表（可选），提供时人物服装和地点环境直接取自登记表
+            translation_memory: 翻译记忆库（可选），LLM 翻译前先查询，翻译结果也会记入
         """
         self.config = config or {}
         self.language = self.config.get("language", "bilingual")
@@ -50,14 +368,38 @@ class ImagePromptGenerator:
         self.include_mood = self.config.get("include_mood", True)
         self.include_characters = self.config.get("include_characters", True)
         self.include_dialogue = self.config.get("include_dialogue", False)
-        self.use_llm = self.config.get("use_llm", False)
+        # detailed 自动启用 LLM；simple 不做提取和翻译，也就不需要 LLM
+        self.use_llm = (
+            (self.config.get("use_llm", False) or self.detail_level == "detailed")
+            and self.detail_level != "simple"
+        )
+        self.llm_batch_size = max(1, int(self.config.get("llm_batch_size", 1) or 1))
+        self.llm_mode = self.config.get("llm_mode", "full")
+        self.llm_confidence_threshold = self.config.get("llm_confidence_threshold", 0.7)
+        self.multilingual = bool(self.config.get("multilingual", False))
         self.llm_service = llm_service
+        self.registry = registry
+        self.translation_memory = translation_memory
         
         # 如果启用 LLM 但没有提供服务，发出警告
         if self.use_llm and not self.llm_service:
             import warnings
             warnings.warn("use_llm=True 但未提供 llm_service，将回退到规则处理模式")
             self.use_llm = False
+        
+        # 近似重复分镜检测主要用于节省 LLM 调用；规则处理本身很快，默认不启用
+        self.near_duplicate_threshold = self.config.get(
+            "near_duplicate_threshold", 0.85 if self.use_llm else 0
+        )
+        
+        # 最近一次批量生成的统计
+        self.last_batch_stats = self._new_batch_stats()
+        
+        # 批量提取预取的 LLM 结果：id(分镜) -> 提取结果（None 表示批量提取失败，需单独重试）
+        self._prefetched_extractions: Dict[int, Optional[Dict]] = {}
+        
+        # 多语言输出时当前分镜各语言版本共享的翻译结果：(类别, 原文) -> 译文（其余时间为 None）
+        self._translation_cache: Optional[Dict[Tuple[str, str], str]] = None
     
     def generate_prompt(self, scene: Dict[str, Any], context_scenes: List[Dict] = None) -> Dict[str, Any]:
         """
@@ -70,46 +412,49 @@ class ImagePromptGenerator:
         Returns:
             Dict: 包含 JSON 结构化提示词的字典
         """
+        if self.detail_level == "simple":
+            render = lambda: self._generate_simple_prompt(scene, context_scenes)
+        else:
+            # 提取视觉元素（带上下文）；多语言输出时所有语言版本共用这一次提取
+            visual_elements = self._extract_visual_elements(scene, context_scenes)
+            render = lambda: self._render_prompt(scene, visual_elements, context_scenes)
+        
+        if self.multilingual:
+            return self._render_variants(render)
+        return render()
+    
+    def _render_prompt(self, scene: Dict[str, Any], visual_elements: Dict,
+                       context_scenes: List[Dict] = None) -> Dict[str, Any]:
+        """根据提取好的视觉元素，按当前语言构建提示词结果"""
         # 获取完整的分镜描述（作为核心内容）
         full_description = scene.get("scene_description", "")
         
-        # 创建基础模板副本
-        prompt = json.loads(json.dumps(NANO_BANANA_PROMPT_TEMPLATE))
-        
-        # 提取视觉元素（带上下文）
-        visual_elements = self._extract_visual_elements(scene, context_scenes)
+        # 创建提示词对象（各分区在下面逐一构建，无需复制模板）
+        prompt = NanoBananaPrompt()
         
         # 填充主体信息（基于完整描述提取，但保留描述完整性）
         prompt["subject"] = self._build_subject(visual_elements, scene)
-        # 将完整描述添加到主体信息中
-        if full_description:
-            if self.language == "bilingual":
-                prompt["subject"]["full_description"] = f"{full_description} / {self._translate_scene_description(full_description)}"
-            elif self.language == "english":
-                prompt["subject"]["full_description"] = self._translate_scene_description(full_description)
-            else:
-                prompt["subject"]["full_description"] = full_description
         
         # 填充场景信息
         prompt["scene"] = self._build_scene(visual_elements, scene)
-        # 将完整描述添加到场景信息中
-        if full_description:
-            prompt["scene"]["full_description"] = full_description
+        
+        # 将完整描述添加到主体信息和场景信息中
+        self._apply_full_description(prompt, full_description)
         
         # 填充构图信息
-        prompt["composition"] = self._build_composition(scene)
+        prompt["composition"] = self._memoized_section("composition", self._build_composition, scene)
         
         # 填充光照信息
-        prompt["lighting"] = self._build_lighting(scene)
+        prompt["lighting"] = self._memoized_section("lighting", self._build_lighting, scene)
         
         # 填充技术参数
         if self.include_technical:
-            prompt["camera_technical"] = self._build_camera_technical(scene)
-        else:
-            prompt.pop("camera_technical", None)
+            prompt["camera_technical"] = self._memoized_section(
+                "camera_technical", self._build_camera_technical, scene
+            )
         
         # 填充视觉风格
-        prompt["visual_style"] = self._build_visual_style(scene)
+        prompt["visual_style"] = self._memoized_section("visual_style", self._build_visual_style, scene)
         
         # 构建空间锚点（根据构图需求）
         prompt["spatial_anchors"] = self._build_spatial_anchors(scene)
@@ -122,34 +467,391 @@ class ImagePromptGenerator:
             "scene_description": full_description,
             "prompt_json": prompt,
             "prompt_text": self._format_prompt_text(prompt, full_description),
-            "negative_prompt": self._format_negative_prompt(scene)
+            "negative_prompt": self._format_negative_prompt(scene),
+            "content_hash": self.scene_content_hash(scene, context_scenes)
+        }
+    
+    def _render_variants(self, render: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        依次切换到每种语言调用 render，合并为一个多语言结果
+        
+        各语言版本共享同一次提取结果，翻译在版本之间缓存（英文和双语版本不会重复翻译）
+        
+        Returns:
+            Dict: 顶层字段为主语言（language 配置）的版本，另有
+                  language: 主语言，variants: 语言 -> {prompt_json, prompt_text, negative_prompt}
+        """
+        primary_language = self.language
+        rendered = {}
+        self._translation_cache = {}
+        try:
+            for language in PROMPT_LANGUAGES:
+                self.language = language
+                rendered[language] = render()
+        finally:
+            self.language = primary_language
+            self._translation_cache = None
+        
+        if primary_language not in rendered:
+            # 未知语言按中文处理（与各分区构建函数的行为一致）
+            primary_language = "chinese"
+        result = dict(rendered[primary_language])
+        result["language"] = primary_language
+        result["variants"] = {
+            language: {field: variant[field] for field in PROMPT_VARIANT_FIELDS}
+            for language, variant in rendered.items()
+        }
+        return result
+    
+    def _apply_full_description(self, prompt: NanoBananaPrompt, full_description: str):
+        """将完整分镜描述写入主体信息（按语言翻译）和场景信息"""
+        if not full_description:
+            return
+        if self.language == "bilingual":
+            prompt["subject"]["full_description"] = f"{full_description} / {self._translate_scene_description(full_description)}"
+        elif self.language == "english":
+            prompt["subject"]["full_description"] = self._translate_scene_description(full_description)
+        else:
+            prompt["subject"]["full_description"] = full_description
+        prompt["scene"]["full_description"] = full_description
+    
+    def _cluster_near_duplicates(self, scenes: List[Dict[str, Any]],
+                                 reused_results: List[Optional[Dict[str, Any]]]) -> Dict[int, int]:
+        """
+        找出需要生成的分镜中的近似重复分镜（结构化字段相同，描述相似度达到阈值）
+        
+        Returns:
+            Dict[int, int]: 近似重复分镜下标 -> 簇代表下标
+        """
+        if not self.near_duplicate_threshold or self.detail_level == "simple":
+            return {}
+        
+        index = NearDuplicateIndex(threshold=self.near_duplicate_threshold)
+        representatives = {}
+        for idx, scene in enumerate(scenes):
+            if reused_results[idx] is not None:
+                continue
+            head = index.find_or_add(idx, self._near_duplicate_block(scene), scene.get("scene_description", ""))
+            if head is not None:
+                representatives[idx] = head
+        return representatives
+    
+    def _near_duplicate_block(self, scene: Dict[str, Any]) -> str:
+        """
+        近似重复分镜必须完全相同的字段组合
+        
+        修补时沿用簇代表的场景分区（时间、天气）和主体分区（按情绪推断的姿势），
+        因此除人物、地点、景别外，时间、情绪和描述中的天气也必须相同
+        """
+        return repr((
+            scene.get("characters"), scene.get("location"), scene.get("shot_size"),
+            scene.get("time"), scene.get("mood"),
+            self._extract_weather(scene.get("scene_description", ""))
+        ))
+    
+    def _patch_near_duplicate(self, base: Dict[str, Any], scene: Dict[str, Any],
+                              context_scenes: List[Dict] = None) -> Dict[str, Any]:
+        """
+        以簇代表的结果为基础生成近似重复分镜的提示词
+        
+        沿用代表的主体 / 场景提取结果（动作、姿势、表情等），
+        重建完整描述以及只依赖枚举字段的分区（构图、光照、技术参数、视觉风格都会命中分区缓存）；
+        多语言输出时每个语言版本分别以代表的同语言版本为基础修补
+        """
+        if self.multilingual:
+            return self._render_variants(
+                lambda: self._patch_near_duplicate_variant(prompt_variant(base, self.language), scene, context_scenes)
+            )
+        return self._patch_near_duplicate_variant(base, scene, context_scenes)
+    
+    def _patch_near_duplicate_variant(self, base: Dict[str, Any], scene: Dict[str, Any],
+                                      context_scenes: List[Dict] = None) -> Dict[str, Any]:
+        """以代表的单一语言结果为基础，按当前语言修补近似重复分镜的提示词"""
+        full_description = scene.get("scene_description", "")
+        prompt = base["prompt_json"].copy()
+        
+        if full_description != base.get("scene_description"):
+            self._apply_full_description(prompt, full_description)
+        prompt["composition"] = self._memoized_section("composition", self._build_composition, scene)
+        prompt["lighting"] = self._memoized_section("lighting", self._build_lighting, scene)
+        if self.include_technical:
+            prompt["camera_technical"] = self._memoized_section(
+                "camera_technical", self._build_camera_technical, scene
+            )
+        prompt["visual_style"] = self._memoized_section("visual_style", self._build_visual_style, scene)
+        prompt["spatial_anchors"] = self._build_spatial_anchors(scene)
+        prompt["negative_constraints"] = self._build_negative_constraints(scene)
+        
+        return {
+            "scene_number": scene.get("scene_number", 0),
+            "scene_description": full_description,
+            "prompt_json": prompt,
+            "prompt_text": self._format_prompt_text(prompt, full_description),
+            "negative_prompt": self._format_negative_prompt(scene),
+            "content_hash": self.scene_content_hash(scene, context_scenes)
+        }
+    
+    def _generate_simple_prompt(self, scene: Dict[str, Any], context_scenes: List[Dict] = None) -> Dict[str, Any]:
+        """
+        快速预览模式：跳过视觉元素提取和翻译，只构建构图、技术参数和负面约束（质量标签在文本中添加）
+        
+        这些分区只依赖枚举字段，都能命中分区缓存，适合大项目的快速预览
+        """
+        full_description = scene.get("scene_description", "")
+        
+        prompt = NanoBananaPrompt()
+        prompt["composition"] = self._memoized_section("composition", self._build_composition, scene)
+        if self.include_technical:
+            prompt["camera_technical"] = self._memoized_section(
+                "camera_technical", self._build_camera_technical, scene
+            )
+        prompt["negative_constraints"] = self._build_negative_constraints(scene)
+        
+        return {
+            "scene_number": scene.get("scene_number", 0),
+            "scene_description": full_description,
+            "prompt_json": prompt,
+            "prompt_text": self._format_prompt_text(prompt, full_description),
+            "negative_prompt": self._format_negative_prompt(scene),
+            "content_hash": self.scene_content_hash(scene, context_scenes)
+        }
+    
+    def scene_content_hash(self, scene: Dict[str, Any], context_scenes: List[Dict] = None) -> str:
+        """
+        计算分镜的内容哈希（分镜中影响提示词的字段 + 生成器配置）
+        
+        LLM 模式下前后分镜的描述也会影响提取结果，因此一并计入哈希
+        
+        Args:
+            scene: 分镜数据字典
+            context_scenes: 上下文分镜列表
+            
+        Returns:
+            str: 十六进制哈希值
+        """
+        payload = {
+            "config": [self.config.get(key) for key in PROMPT_RELEVANT_CONFIG_KEYS],
+            "use_llm": self.use_llm,
+            "scene": [scene.get(field) for field in PROMPT_RELEVANT_SCENE_FIELDS]
         }
+        if self.use_llm:
+            payload["context"] = self._find_neighbor_descriptions(scene, context_scenes)
+        if self.registry:
+            payload["registry"] = self.registry.entries_for(scene)
+        if self.multilingual:
+            payload["multilingual"] = True
+        encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
     
-    def generate_batch(self, scenes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def generate_batch(self, scenes: List[Dict[str, Any]],
+                       previous_prompts: List[Dict[str, Any]] = None,
+                       workers: Optional[int] = 1) -> List[Dict[str, Any]]:
         """
         批量生成提示词（支持上下文分析）
         
+        如果提供了之前生成的提示词，内容哈希未变化的分镜会直接复用原有结果，
+        只重新生成有改动的分镜
+        
+        规则模式下可以用多进程并行生成（结果顺序、内容与串行完全一致）；
+        LLM 模式需要前后分镜上下文且受 API 限速，始终串行
+        
         Args:
             scenes: 分镜列表
+            previous_prompts: 之前生成的提示词列表（可选，用于增量生成）
+            workers: 并行进程数（默认 1 即串行；None 表示使用全部 CPU 核心）
             
         Returns:
             List[Dict]: 提示词列表
         """
-        results = []
-        for scene in scenes:
-            try:
+        if self._resolve_workers(workers, len(scenes)) <= 1:
+            return list(self.generate_iter(scenes, previous_prompts=previous_prompts))
+        
+        reusable = self._index_reusable(previous_prompts)
+        self.last_batch_stats = self._new_batch_stats()
+        results = [self._find_reusable(reusable, scene, scenes) for scene in scenes]
+        self.last_batch_stats["reused"] = sum(result is not None for result in results)
+        
+        # 与串行生成相同的近似重复聚类：簇代表和独立分镜并行生成，簇成员在主进程中以代表的结果为基础修补
+        representatives = self._cluster_near_duplicates(scenes, results)
+        pending = [idx for idx, result in enumerate(results) if result is None and idx not in representatives]
+        
+        workers = self._resolve_workers(workers, len(pending))
+        if workers > 1:
+            generated = self._generate_parallel([scenes[idx] for idx in pending], workers)
+        else:
+            generated = [self._generate_one(scenes[idx], scenes) for idx in pending]
+        
+        for idx, result in zip(pending, generated):
+            results[idx] = result
+            if "error" not in result:
+                self.last_batch_stats["generated"] += 1
+        
+        for idx, head in representatives.items():
+            if "error" not in results[head]:
+                results[idx] = self._patch_near_duplicate(results[head], scenes[idx], scenes)
+                self.last_batch_stats["deduplicated"] += 1
+            else:
+                # 代表生成失败时成员单独生成（与串行生成一致）
+                results[idx] = self._generate_one(scenes[idx], scenes)
+                if "error" not in results[idx]:
+                    self.last_batch_stats["generated"] += 1
+        return results
+    
+    def generate_iter(self, scenes: List[Dict[str, Any]],
+                      previous_prompts: List[Dict[str, Any]] = None,
+                      progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+                      ) -> Iterator[Dict[str, Any]]:
+        """
+        逐个生成提示词，每完成一个分镜就立即返回其结果（按分镜顺序）
+        
+        适合在界面上显示实时进度、边生成边预览；中途停止时已返回的结果不会丢失
+        
+        Args:
+            scenes: 分镜列表
+            previous_prompts: 之前生成的提示词列表（可选，用于增量生成）
+            progress_callback: 进度回调（可选），每完成一个分镜调用一次，参数为字典：
+                - done: 已完成的分镜数
+                - total: 分镜总数
+                - elapsed: 已用时间（秒）
+                - eta: 预计剩余时间（秒）
+                - errors: 生成失败的分镜数
+                - reused: 直接复用的分镜数
+                - deduplicated: 按近似重复修补的分镜数
+                - scene_number: 刚完成的分镜编号
+            
+        Yields:
+            Dict: 单个分镜的提示词结果（与 generate_batch 返回的元素相同）
+        """
+        reusable = self._index_reusable(previous_prompts)
+        self.last_batch_stats = self._new_batch_stats()
+        self._prefetched_extractions.clear()
+        batch_extraction = self.use_llm and self.llm_service and self.llm_batch_size > 1
+        total = len(scenes)
+        errors = 0
+        start_time = time.perf_counter()
+        
+        # 内容未变化、可直接复用的结果（None 表示需要生成）
+        reused_results = [self._find_reusable(reusable, scene, scenes) for scene in scenes]
+        # 近似重复分镜下标 -> 簇代表下标（代表总在成员之前）
+        representatives = self._cluster_near_duplicates(scenes, reused_results)
+        cluster_heads = set(representatives.values())
+        head_results: Dict[int, Dict[str, Any]] = {}
+        
+        for idx, scene in enumerate(scenes):
+            result = reused_results[idx]
+            head_result = head_results.get(representatives.get(idx))
+            if result is not None:
+                self.last_batch_stats["reused"] += 1
+            elif head_result is not None and "error" not in head_result:
+                # 近似重复：复用簇代表的提取结果，只修补不同的字段
+                result = self._patch_near_duplicate(head_result, scene, scenes)
+                self.last_batch_stats["deduplicated"] += 1
+            else:
+                if (batch_extraction and id(scene) not in self._prefetched_extractions
+                        and self._needs_llm_extraction(scene)):
+                    # 从当前分镜开始，取接下来 K 个需要完整生成的分镜，一次请求批量提取
+                    window = list(islice(
+                        (
+                            scenes[i] for i in range(idx, total)
+                            if reused_results[i] is None and (i == idx or i not in representatives)
+                            and self._needs_llm_extraction(scenes[i])
+                        ),
+                        self.llm_batch_size
+                    ))
+                    self._prefetch_llm_extractions(window, scenes)
+                
                 # 传递所有分镜作为上下文，让 LLM 能够分析前后分镜
-                result = self.generate_prompt(scene, context_scenes=scenes)
-                results.append(result)
-            except Exception as e:
-                # 如果某个分镜生成失败，记录错误但继续处理其他分镜
-                results.append({
-                    "scene_number": scene.get("scene_number", 0),
-                    "error": str(e),
-                    "prompt_json": None,
-                    "prompt_text": "",
-                    "negative_prompt": ""
+                result = self._generate_one(scene, scenes)
+                if "error" in result:
+                    errors += 1
+                else:
+                    self.last_batch_stats["generated"] += 1
+                if idx in cluster_heads:
+                    head_results[idx] = result
+            
+            if progress_callback:
+                done = idx + 1
+                elapsed = time.perf_counter() - start_time
+                progress_callback({
+                    "done": done,
+                    "total": total,
+                    "elapsed": elapsed,
+                    "eta": elapsed / done * (total - done),
+                    "errors": errors,
+                    "reused": self.last_batch_stats["reused"],
+                    "deduplicated": self.last_batch_stats["deduplicated"],
+                    "scene_number": result.get("scene_number", 0)
                 })
+            yield result
+        
+        self._prefetched_extractions.clear()
+    
+    def _index_reusable(self, previous_prompts: List[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """按内容哈希索引可复用的结果（生成失败的不复用）"""
+        reusable = {}
+        for prompt_data in previous_prompts or []:
+            content_hash = prompt_data.get("content_hash")
+            if content_hash and "error" not in prompt_data:
+                reusable[content_hash] = prompt_data
+        return reusable
+    
+    def _find_reusable(self, reusable: Dict[str, Dict[str, Any]], scene: Dict[str, Any],
+                       context_scenes: List[Dict] = None) -> Optional[Dict[str, Any]]:
+        """查找内容哈希未变化、可以直接复用的结果"""
+        if not reusable:
+            return None
+        try:
+            return reusable.get(self.scene_content_hash(scene, context_scenes=context_scenes))
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _new_batch_stats() -> Dict[str, int]:
+        """
+        新的批量生成统计
+        
+        - generated / reused / deduplicated: 重新生成 / 直接复用 / 按近似重复修补的分镜数
+        - llm_requests: LLM 请求次数
+        - llm_requests_avoided: 混合模式下规则提取已足够、省去的 LLM 提取请求数
+        """
+        return {"generated": 0, "reused": 0, "deduplicated": 0, "llm_requests": 0, "llm_requests_avoided": 0}
+    
+    def _generate_one(self, scene: Dict[str, Any], context_scenes: List[Dict] = None) -> Dict[str, Any]:
+        """生成单个分镜的提示词，失败时返回带 error 字段的结果（不中断批量处理）"""
+        try:
+            return self.generate_prompt(scene, context_scenes=context_scenes)
+        except Exception as e:
+            # 如果某个分镜生成失败，记录错误但继续处理其他分镜
+            return {
+                "scene_number": scene.get("scene_number", 0),
+                "error": str(e),
+                "prompt_json": None,
+                "prompt_text": "",
+                "negative_prompt": ""
+            }
+    
+    def _resolve_workers(self, workers: Optional[int], count: int) -> int:
+        """确定实际使用的进程数（LLM 模式或分镜太少时为 1）"""
+        if self.use_llm:
+            return 1
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return max(1, min(workers, count // PARALLEL_MIN_CHUNK_SIZE))
+    
+    def _generate_parallel(self, scenes: List[Dict[str, Any]], workers: int) -> List[Dict[str, Any]]:
+        """
+        多进程生成（仅规则模式）
+        
+        把配置和按顺序切分的分镜块发送到子进程，按原顺序收集结果
+        """
+        # 每个进程分几块，让先完成的进程可以继续领取，避免负载不均
+        chunk_size = max(PARALLEL_MIN_CHUNK_SIZE // 2, -(-len(scenes) // (workers * 4)))
+        chunks = [scenes[i:i + chunk_size] for i in range(0, len(scenes), chunk_size)]
+        
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_results in executor.map(_generate_chunk, repeat(self.config), repeat(self.registry), chunks):
+                results.extend(chunk_results)
         return results
     
     def _extract_visual_elements(self, scene: Dict, context_scenes: List[Dict] = None) -> Dict:
@@ -157,8 +859,10 @@ class ImagePromptGenerator:
         description = scene.get("scene_description", "")
         characters = scene.get("characters", [])
         
-        # 如果启用 LLM，尝试使用 LLM 提取（带上下文）
-        if self.use_llm and self.llm_service:
+        # 如果启用 LLM，尝试使用 LLM 提取（带上下文）；混合模式下规则提取已足够的分镜跳过 LLM
+        if self.use_llm and self.llm_service and not self._needs_llm_extraction(scene):
+            self.last_batch_stats["llm_requests_avoided"] += 1
+        elif self.use_llm and self.llm_service:
             try:
                 return self._extract_visual_elements_with_llm(scene, context_scenes)
             except Exception as e:
@@ -176,37 +880,72 @@ class ImagePromptGenerator:
             "dialogue": scene.get("dialogue_text", "")
         }
     
+    def _needs_llm_extraction(self, scene: Dict) -> bool:
+        """是否需要调用 LLM 提取视觉元素（非混合模式、或阈值为 1 时总是需要）"""
+        if self.llm_mode != "hybrid" or self.llm_confidence_threshold >= 1:
+            return True
+        return self._rule_extraction_confidence(scene) < self.llm_confidence_threshold
+    
+    def _rule_extraction_confidence(self, scene: Dict) -> float:
+        """
+        评估规则提取结果的完整度和可信度（0-1）
+        
+        动作、姿势、表情分别评分：直接命中关键词为 1，间接推断为 0.5，只能使用默认值为 0；
+        纯空镜不需要主体信息，直接视为可信
+        """
+        description = scene.get("scene_description", "")
+        characters = scene.get("characters", [])
+        if self._is_empty_scene(description, characters):
+            return 1.0
+        
+        # 动作：关键词命中 > 动词模式 > 默认值
+        if RULE_KEYWORD_MATCHER.first(description, "action"):
+            action_score = 1.0
+        else:
+            action_score = 0.5 if self._extract_action(description) != "动作" else 0.0
+        
+        # 姿势：描述中明确写出 > 根据动作 / 情绪 / 景别推断 > 默认姿势
+        if self._extract_pose(description):
+            pose_score = 1.0
+        else:
+            action = self._extract_action(description)
+            inferred = self._infer_pose_from_context(description, action, scene)
+            pose_score = 0.5 if inferred != "自然站立、双手自然下垂" else 0.0
+        
+        # 表情：描述中明确写出，或有情绪可供推断
+        if RULE_KEYWORD_MATCHER.first(description, "expression"):
+            expression_score = 1.0
+        else:
+            expression_score = 0.5 if scene.get("mood") else 0.0
+        
+        return 0.4 * action_score + 0.3 * pose_score + 0.3 * expression_score
+    
     def _extract_visual_elements_with_llm(self, scene: Dict, context_scenes: List[Dict] = None) -> Dict:
         """使用 LLM 提取视觉元素（支持上下文分析）"""
         description = scene.get("scene_description", "")
         characters = scene.get("characters", [])
         
+        # 已经在批量请求中提取过（批量提取失败的条目为 None，继续单独请求重试）
+        extracted_data = self._prefetched_extractions.pop(id(scene), None)
+        if extracted_data is not None:
+            return {
+                "description": description,
+                "characters": characters,
+                "location": scene.get("location", ""),
+                "time": scene.get("time", ""),
+                "mood": scene.get("mood", ""),
+                "dialogue": scene.get("dialogue_text", ""),
+                "llm_extracted": extracted_data
+            }
+        
         # 获取上下文信息
-        previous_scene = None
-        next_scene = None
-        if context_scenes:
-            current_index = None
-            for idx, s in enumerate(context_scenes):
-                if s.get("scene_number") == scene.get("scene_number"):
-                    current_index = idx
-                    break
-            
-            if current_index is not None:
-                # 获取前一个分镜
-                if current_index > 0:
-                    prev_scene = context_scenes[current_index - 1]
-                    previous_scene = prev_scene.get("scene_description", "")
-                
-                # 获取下一个分镜
-                if current_index < len(context_scenes) - 1:
-                    next_scene_obj = context_scenes[current_index + 1]
-                    next_scene = next_scene_obj.get("scene_description", "")
+        previous_scene, next_scene = self._find_neighbor_descriptions(scene, context_scenes)
         
         # 构建 LLM 提示词
         user_prompt = get_visual_elements_extraction_prompt(
             description,
             characters,
-            self.language,
+            self._extraction_language(),
             previous_scene=previous_scene,
             next_scene=next_scene
         )
@@ -217,6 +956,7 @@ class ImagePromptGenerator:
         ]
         
         # 调用 LLM
+        self.last_batch_stats["llm_requests"] += 1
         response = self.llm_service._call_llm(messages, temperature=0.3)  # 使用较低温度以获得更准确的结果
         
         # 提取 JSON
@@ -253,11 +993,126 @@ class ImagePromptGenerator:
             "dialogue": scene.get("dialogue_text", "")
         }
     
-    def _build_subject(self, visual_elements: Dict, scene: Dict) -> Dict:
+    def _prefetch_llm_extractions(self, window: List[Dict], context_scenes: List[Dict] = None):
+        """
+        一次 LLM 请求批量提取连续多个分镜的视觉元素（结果按 id(分镜) 暂存）
+        
+        返回的 JSON 数组中缺失或格式不对的条目记为 None，生成该分镜时会单独请求重试
+        
+        Args:
+            window: 连续的待提取分镜
+            context_scenes: 上下文分镜列表
+        """
+        for scene in window:
+            self._prefetched_extractions[id(scene)] = None
+        if len(window) < 2:
+            return
+        
+        previous_scene, _ = self._find_neighbor_descriptions(window[0], context_scenes)
+        _, next_scene = self._find_neighbor_descriptions(window[-1], context_scenes)
+        user_prompt = get_batch_visual_elements_extraction_prompt(
+            [
+                {
+                    "index": index,
+                    "description": scene.get("scene_description", ""),
+                    "characters": scene.get("characters", [])
+                }
+                for index, scene in enumerate(window, 1)
+            ],
+            self._extraction_language(),
+            previous_scene=previous_scene,
+            next_scene=next_scene
+        )
+        messages = [
+            {"role": "system", "content": PROMPT_GENERATION_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+        
+        try:
+            self.last_batch_stats["llm_requests"] += 1
+            response = self.llm_service._call_llm(messages, temperature=0.3)
+            json_start = response.find('[')
+            json_end = response.rfind(']') + 1
+            if json_start < 0 or json_end <= json_start:
+                raise ValueError("响应中没有 JSON 数组")
+            entries = json.loads(response[json_start:json_end])
+            if not isinstance(entries, list):
+                raise ValueError("响应不是 JSON 数组")
+        except Exception as e:
+            import warnings
+            warnings.warn(f"LLM 批量提取失败，将逐个分镜重试: {str(e)}")
+            return
+        
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict) or not isinstance(entry.get("subject"), dict):
+                continue
+            # 优先按 index 对应分镜，没有 index 时按数组顺序
+            index = entry.pop("index", position + 1)
+            if isinstance(index, int) and 1 <= index <= len(window):
+                self._prefetched_extractions[id(window[index - 1])] = entry
+    
+    def _extraction_language(self) -> str:
+        """LLM 提取使用的语言（多语言输出时要求双语结果，各语言版本从中取对应部分）"""
+        return "bilingual" if self.multilingual else self.language
+    
+    def _find_neighbor_descriptions(self, scene: Dict, context_scenes: List[Dict] = None):
+        """
+        在上下文分镜列表中查找前后分镜的描述
+        
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (前一个分镜描述, 下一个分镜描述)
+        """
+        previous_scene = None
+        next_scene = None
+        if context_scenes:
+            current_index = None
+            for idx, s in enumerate(context_scenes):
+                if s.get("scene_number") == scene.get("scene_number"):
+                    current_index = idx
+                    break
+            
+            if current_index is not None:
+                # 获取前一个分镜
+                if current_index > 0:
+                    prev_scene = context_scenes[current_index - 1]
+                    previous_scene = prev_scene.get("scene_description", "")
+                
+                # 获取下一个分镜
+                if current_index < len(context_scenes) - 1:
+                    next_scene_obj = context_scenes[current_index + 1]
+                    next_scene = next_scene_obj.get("scene_description", "")
+        
+        return previous_scene, next_scene
+    
+    def _memoized_section(self, name: str, builder, scene: Dict):
+        """
+        按 (分区名, 语言, 枚举字段值) 缓存分区构建结果
+        
+        缓存的分区在多个分镜之间共享，因此冻结为只读；需要修改时先 copy()
+        """
+        key = (name, self.language) + tuple(scene.get(field) for field in MEMOIZED_SECTION_FIELDS[name])
+        return SECTION_MEMO.get_or_build(key, lambda: builder(scene).freeze())
+    
+    @staticmethod
+    def section_cache_stats() -> Dict[str, Any]:
+        """
+        分区缓存统计
+        
+        Returns:
+            Dict: hits, misses, size, maxsize, hit_rate
+        """
+        return SECTION_MEMO.stats()
+    
+    def _build_subject(self, visual_elements: Dict, scene: Dict) -> SubjectSection:
         """构建主体信息（支持 LLM 辅助）"""
         characters = visual_elements.get("characters", [])
         description = visual_elements.get("description", "")
         
+        # 登记表中有主角的标准服装时直接使用，不再逐个分镜提取和翻译
+        registry_clothing = self._registry_entry_text(
+            self.registry.character(characters[0]) if self.registry and characters else None, "clothing"
+        )
+        
         # 如果 LLM 已提取数据，优先使用
         full_description = description  # 默认值
         if "llm_extracted" in visual_elements:
@@ -287,7 +1142,7 @@ class ImagePromptGenerator:
                     pose = self._infer_pose_from_context(description, action_detail, scene)
             if not expression:
                 expression = self._extract_expression(description)
-            if not clothing:
+            if not clothing and not registry_clothing:
                 clothing = self._extract_clothing(description)
             if not props:
                 props = self._extract_props(description)
@@ -301,7 +1156,7 @@ class ImagePromptGenerator:
             if not pose and not self._is_empty_scene(description, characters):
                 pose = self._infer_pose_from_context(description, action_detail, scene)
             expression = self._extract_expression(description)
-            clothing = self._extract_clothing(description)
+            clothing = "" if registry_clothing else self._extract_clothing(description)
             props = self._extract_props(description)
         
         # 构建双语描述（如果 LLM 已提供翻译，直接使用；否则使用规则翻译）
@@ -355,6 +1210,9 @@ class ImagePromptGenerator:
                 clothing_text = clothing if clothing else ""
                 props_text = props if props else ""
         
+        if registry_clothing:
+            clothing_text = registry_clothing
+        
         # 最终确保姿势字段被填充（除非是空镜）
         # 注意：这里只检查 pose_text 是否为空，如果为空且不是空镜才推断
         # 前面的逻辑已经处理了 pose 的提取和推断，这里只是确保最终输出不为空
@@ -375,14 +1233,14 @@ class ImagePromptGenerator:
                 else:
                     pose_text = inferred_pose
         
-        result = {
-            "main_character": main_character,
-            "action": action_text,
-            "pose": pose_text,
-            "expression": expression_text,
-            "clothing": clothing_text,
-            "props": props_text
-        }
+        result = SubjectSection(
+            main_character=main_character,
+            action=action_text,
+            pose=pose_text,
+            expression=expression_text,
+            clothing=clothing_text,
+            props=props_text
+        )
         
         # 如果 LLM 提供了完整描述，添加它
         if "llm_extracted" in visual_elements and full_description:
@@ -390,7 +1248,7 @@ class ImagePromptGenerator:
         
         return result
     
-    def _build_scene(self, visual_elements: Dict, scene: Dict) -> Dict:
+    def _build_scene(self, visual_elements: Dict, scene: Dict) -> SceneSection:
         """构建场景信息"""
         location = visual_elements.get("location", "")
         description = visual_elements.get("description", "")
@@ -400,8 +1258,12 @@ class ImagePromptGenerator:
         # 获取时间映射
         time_info = TIME_MAPPING.get(time, TIME_MAPPING["白天"])
         
-        # 提取场景细节和人物与背景的关系
-        scene_details = self._extract_scene_details(description, location)
+        # 提取场景细节和人物与背景的关系（登记表中有该地点的标准环境时直接使用）
+        location_entry = self.registry.location(location) if self.registry else None
+        if location_entry:
+            scene_details = location_entry["environment"]["chinese"]
+        else:
+            scene_details = self._extract_scene_details(description, location)
         character_background_relation = self._extract_character_background_relation(description, characters, location)
         weather = self._extract_weather(description)
         
@@ -415,7 +1277,10 @@ class ImagePromptGenerator:
         elif location:
             env_parts.append(location)
         
-        if env_parts:
+        if location_entry and env_parts == [scene_details]:
+            # 环境描述就是登记表中的标准环境，直接使用已有的翻译
+            environment_text = self._registry_entry_text(location_entry, "environment")
+        elif env_parts:
             env_combined = "，".join(env_parts)
             if self.language == "bilingual":
                 environment_text = f"{env_combined} / {self._translate_to_english(env_combined)}"
@@ -426,31 +1291,48 @@ class ImagePromptGenerator:
         else:
             environment_text = ""
         
-        if self.language == "bilingual":
+        if location_entry:
+            location_text = self._registry_entry_text(location_entry, "location")
+        elif self.language == "bilingual":
             location_text = f"{location} / {self._translate_to_english(location)}" if location else ""
+        elif self.language == "english":
+            location_text = self._translate_to_english(location) if location else ""
+        else:
+            location_text = location
+        
+        if self.language == "bilingual":
             time_text = f"{time_info['chinese']} / {time_info['english']}"
             background_text = environment_text
             weather_text = f"{weather} / {self._translate_to_english(weather)}" if weather else ""
         elif self.language == "english":
-            location_text = self._translate_to_english(location) if location else ""
             time_text = time_info["english"]
             background_text = environment_text
             weather_text = self._translate_to_english(weather) if weather else ""
         else:
-            location_text = location
             time_text = time_info["chinese"]
             background_text = environment_text
             weather_text = weather if weather else ""
         
-        return {
-            "location": location_text,
-            "environment": environment_text,
-            "background": background_text,
-            "time_of_day": time_text,
-            "weather": weather_text
-        }
+        return SceneSection(
+            location=location_text,
+            environment=environment_text,
+            background=background_text,
+            time_of_day=time_text,
+            weather=weather_text
+        )
+    
+    def _registry_entry_text(self, entry: Optional[Dict], field: str) -> str:
+        """按当前语言格式化登记表中的双语字段（没有登记时返回空字符串）"""
+        value = entry.get(field) if entry else None
+        if not value:
+            return ""
+        if self.language == "bilingual":
+            return f"{value['chinese']} / {value['english']}"
+        elif self.language == "english":
+            return value["english"]
+        return value["chinese"]
     
-    def _build_composition(self, scene: Dict) -> Dict:
+    def _build_composition(self, scene: Dict) -> CompositionSection:
         """构建构图信息"""
         shot_size = scene.get("shot_size", "中景")
         camera_angle = scene.get("camera_angle", "视平")
@@ -499,15 +1381,15 @@ class ImagePromptGenerator:
             angle_text = angle_info["chinese"]
             tension_text = composition_tension if composition_tension else ""
         
-        return {
-            "shot_size": shot_text,
-            "camera_angle": angle_text,
-            "composition_tension": tension_text,
-            "rule_of_thirds": "遵循三分法则 / rule of thirds",
-            "leading_lines": ""  # 可以从描述中提取
-        }
+        return CompositionSection(
+            shot_size=shot_text,
+            camera_angle=angle_text,
+            composition_tension=tension_text,
+            rule_of_thirds="遵循三分法则 / rule of thirds",
+            leading_lines=""  # 可以从描述中提取
+        )
     
-    def _build_lighting(self, scene: Dict) -> Dict:
+    def _build_lighting(self, scene: Dict) -> LightingSection:
         """构建光照信息"""
         time = scene.get("time", "白天")
         mood = scene.get("mood", "")
@@ -528,15 +1410,15 @@ class ImagePromptGenerator:
             time_light = time_info["chinese"]
             mood_light = mood_info.get("chinese", "") if mood_info else ""
         
-        return {
-            "type": time_light,
-            "direction": "",  # 可以从描述中提取
-            "intensity": mood_light if mood_light else "自然 / natural",
-            "color_temperature": time_light,
-            "mood": mood_light if mood_light else ""
-        }
+        return LightingSection(
+            type=time_light,
+            direction="",  # 可以从描述中提取
+            intensity=mood_light if mood_light else "自然 / natural",
+            color_temperature=time_light,
+            mood=mood_light if mood_light else ""
+        )
     
-    def _build_camera_technical(self, scene: Dict) -> Dict:
+    def _build_camera_technical(self, scene: Dict) -> CameraTechnicalSection:
         """构建技术参数"""
         camera = scene.get("camera", "ARRI Alexa")
         lens = scene.get("lens", "ARRI Master Primes")
@@ -564,15 +1446,15 @@ class ImagePromptGenerator:
             aperture_text = aperture_info["chinese"]
             focal_text = lens_focal
         
-        return {
-            "camera_model": camera_text,
-            "lens": lens_text,
-            "aperture": aperture_text,
-            "focal_length": focal_text,
-            "depth_of_field": aperture_info["visual"]
-        }
+        return CameraTechnicalSection(
+            camera_model=camera_text,
+            lens=lens_text,
+            aperture=aperture_text,
+            focal_length=focal_text,
+            depth_of_field=aperture_info["visual"]
+        )
     
-    def _build_visual_style(self, scene: Dict) -> Dict:
+    def _build_visual_style(self, scene: Dict) -> VisualStyleSection:
         """构建视觉风格"""
         camera = scene.get("camera", "ARRI Alexa")
         mood = scene.get("mood", "")
@@ -593,12 +1475,12 @@ class ImagePromptGenerator:
             color_grading = "电影级调色"
             atmosphere = mood_info.get("visual", "电影感氛围") if mood_info else "电影感氛围"
         
-        return {
-            "cinematic_style": cinematic,
-            "color_grading": color_grading,
-            "texture": "电影质感 / film texture",
-            "atmosphere": atmosphere
-        }
+        return VisualStyleSection(
+            cinematic_style=cinematic,
+            color_grading=color_grading,
+            texture="电影质感 / film texture",
+            atmosphere=atmosphere
+        )
     
     def _build_spatial_anchors(self, scene: Dict) -> List[Dict]:
         """构建空间锚点"""
@@ -643,8 +1525,8 @@ class ImagePromptGenerator:
         
         return constraints
     
-    def _format_prompt_text(self, prompt_json: Dict, scene_description: str = "") -> str:
-        """将 JSON 格式转换为文本格式（用于显示和复制）"""
+    def _format_prompt_text(self, prompt_json: NanoBananaPrompt, scene_description: str = "") -> str:
+        """将结构化提示词转换为文本格式（用于显示和复制）"""
         parts = []
         
         # 首先添加完整的分镜描述（作为核心内容）
@@ -727,13 +1609,25 @@ class ImagePromptGenerator:
         
         return ", ".join(parts)
     
+    def _shared_translation(self, kind: str, text: str, translate: Callable[[str], str]) -> str:
+        """多语言输出时，同一分镜的各语言版本共享翻译结果（其余情况直接翻译）"""
+        if self._translation_cache is None:
+            return translate(text)
+        key = (kind, text)
+        if key not in self._translation_cache:
+            self._translation_cache[key] = translate(text)
+        return self._translation_cache[key]
+    
     def _translate_scene_description(self, description: str) -> str:
         """翻译分镜描述（支持 LLM 辅助和字典翻译）"""
         if not description or not description.strip():
             return description
-        
-        # 如果启用 LLM，优先使用 LLM 翻译
-        if self.use_llm and self.llm_service:
+        return self._shared_translation("description", description, self._translate_description_uncached)
+    
+    def _translate_description_uncached(self, description: str) -> str:
+        """翻译分镜描述（不经过多语言共享缓存）"""
+        # 如果启用 LLM，优先使用 LLM 翻译（混合模式下词典能完整覆盖的描述直接字典翻译）
+        if self.use_llm and self.llm_service and not self._dict_covers_description(description):
             try:
                 return self._translate_with_llm(description)
             except Exception as e:
@@ -744,45 +1638,29 @@ class ImagePromptGenerator:
         # 使用字典进行基础翻译
         return self._translate_with_dict(description)
     
+    def _dict_covers_description(self, description: str) -> bool:
+        """混合模式下，描述中的汉字是否全部被字典词条覆盖（字典翻译不会留下未翻译的中文）"""
+        return self.llm_mode == "hybrid" and TRANSLATION_SEGMENTER.coverage(description) == 1
+    
     def _translate_with_dict(self, text: str) -> str:
-        """使用字典进行翻译（智能匹配）"""
+        """使用字典进行翻译（双向最大匹配分词后逐词翻译，未登录片段整体保留原文）"""
         if not text or not text.strip():
             return text
-        
-        translations = self._get_basic_translations()
-        result = text
-        
-        # 按长度排序，优先匹配长词
-        sorted_keys = sorted(translations.keys(), key=len, reverse=True)
-        
-        # 替换所有匹配的词汇
-        for chinese in sorted_keys:
-            english = translations[chinese]
-            if chinese in result:
-                # 替换所有出现的位置
-                result = result.replace(chinese, english)
-        
-        # 如果完全没有匹配到，返回原文本
-        # 如果部分匹配，返回混合结果（保留未匹配的部分）
-        if result == text:
-            # 尝试简单的逐词翻译
-            words = text.split()
-            translated_words = []
-            for word in words:
-                if word in translations:
-                    translated_words.append(translations[word])
-                else:
-                    translated_words.append(word)
-            result = " ".join(translated_words)
-        
-        return result
+        return DICT_TRANSLATION_MEMO.get_or_build(text, lambda: _translate_description_with_dict(text))
     
     def _translate_with_llm(self, text: str) -> str:
-        """使用 LLM 进行翻译"""
+        """使用 LLM 进行翻译（先查询翻译记忆库；只有精确命中才直接复用，近似命中作为参考译文交给 LLM）"""
         if not text or not text.strip():
             return text
         
-        user_prompt = get_translation_prompt(text, "english")
+        reference = None
+        if self.translation_memory is not None:
+            remembered = self.translation_memory.lookup(text)
+            if remembered is not None:
+                return remembered
+            reference = self.translation_memory.suggest(text)
+        
+        user_prompt = get_translation_prompt(text, "english", reference=reference)
         
         messages = [
             {"role": "system", "content": "你是一个专业的翻译专家，擅长将中文电影术语准确翻译成英文。"},
@@ -790,6 +1668,7 @@ class ImagePromptGenerator:
         ]
         
         # 调用 LLM
+        self.last_batch_stats["llm_requests"] += 1
         response = self.llm_service._call_llm(messages, temperature=0.3)
         
         # 清理响应（移除可能的说明文字）
@@ -800,6 +1679,9 @@ class ImagePromptGenerator:
         elif translation.startswith("'") and translation.endswith("'"):
             translation = translation[1:-1]
         
+        if translation and self.translation_memory is not None:
+            self.translation_memory.add(text, translation)
+        
         return translation if translation else text
     
     def _format_negative_prompt(self, scene: Dict) -> str:
@@ -809,35 +1691,14 @@ class ImagePromptGenerator:
     
     def _extract_action(self, description: str) -> str:
         """从描述中提取动作关键词"""
-        # 扩展的动作关键词
-        action_keywords = [
-            "坐", "站", "走", "跑", "看", "说", "笑", "哭", "转身", "抬头", "低头",
-            "推", "拉", "拿", "放", "举", "握", "抓", "扔", "踢", "跳",
-            "进入", "离开", "靠近", "远离", "跟随", "追逐", "躲避",
-            "环顾", "张望", "凝视", "注视", "扫视", "瞥见",
-            "点头", "摇头", "挥手", "摆手", "指向", "指向",
-            "蹲下", "站起", "躺下", "趴下", "跪下", "弯腰",
-            "拥抱", "握手", "拍", "打", "推门", "开门", "关门",
-            "拿起", "放下", "递给", "接过", "翻开", "合上"
-        ]
-        
-        # 按长度排序，优先匹配长词
-        action_keywords.sort(key=len, reverse=True)
-        
-        for keyword in action_keywords:
-            if keyword in description:
-                return keyword
-        
-        # 如果没有找到，尝试提取动词
-        import re
-        # 匹配常见的中文动词模式
-        verb_patterns = [
-            r"([^，。！？\s]+(?:着|了|过|在))",  # 带助词的动词
-            r"([^，。！？\s]+(?:中|时))",  # 进行时
-        ]
-        
-        for pattern in verb_patterns:
-            matches = re.findall(pattern, description)
+        # 优先匹配长词（优先级已在 ACTION_KEYWORDS 中按长度排好）
+        keyword = RULE_KEYWORD_MATCHER.first(description, "action")
+        if keyword:
+            return keyword
+        
+        # 如果没有找到，尝试提取动词（匹配常见的中文动词模式）
+        for pattern in VERB_PATTERNS:
+            matches = pattern.findall(description)
             if matches:
                 return matches[0]
         
@@ -902,42 +1763,21 @@ class ImagePromptGenerator:
         if not description or len(description.strip()) == 0:
             return True
         
-        # 检查描述中是否包含人物相关词汇（去重并优化）
-        person_keywords = [
-            "人物", "角色", "人", "主角", "演员", "他", "她", "他们", "她们",
-            "配角", "反派", "英雄", "主角", "人物", "角色", "主角",
-            "主角", "主角", "主角", "主角", "主角", "主角", "主角", "主角",  # 移除重复
-            "主角", "主角", "主角", "主角", "主角", "主角", "主角", "主角"
-        ]
-        # 去重
-        person_keywords = list(set(person_keywords))
-        
-        description_lower = description.lower()
-        for keyword in person_keywords:
-            if keyword in description or keyword in description_lower:
-                return False
+        # 检查描述中是否包含人物相关词汇
+        hits = RULE_KEYWORD_MATCHER.scan(description)
+        if "person" in hits:
+            return False
         
         # 检查动作词汇（如果有明显的动作，通常不是空镜）
-        action_keywords = ["走", "跑", "坐", "站", "看", "说", "笑", "哭", "转身", "抬头", "低头"]
-        for keyword in action_keywords:
-            if keyword in description:
-                return False
-        
-        # 检查是否是纯环境描述（只包含环境、风景、建筑等词汇）
-        environment_keywords = [
-            "风景", "环境", "建筑", "天空", "云", "山", "海", "树", "街道", "城市", "房屋",
-            "空镜", "空景", "空镜头", "空场景", "无人物", "没有人", "纯环境", "纯风景"
-        ]
-        has_environment = any(keyword in description for keyword in environment_keywords)
-        has_person = any(keyword in description for keyword in person_keywords)
+        if "empty_scene_action" in hits:
+            return False
         
         # 如果明确标注为空镜相关词汇，直接返回 True
-        empty_scene_keywords = ["空镜", "空景", "空镜头", "空场景", "无人物", "没有人", "纯环境", "纯风景"]
-        if any(keyword in description for keyword in empty_scene_keywords):
+        if "empty_scene_marker" in hits:
             return True
         
         # 如果只有环境词汇，没有人物词汇和动作词汇，可能是空镜
-        if has_environment and not has_person:
+        if "environment" in hits:
             # 进一步检查：如果描述很短且只包含环境词汇，更可能是空镜
             if len(description.strip()) < 20:
                 return True
@@ -958,145 +1798,54 @@ class ImagePromptGenerator:
         """
         # 根据动作推断姿势
         if action:
-            action_lower = action.lower()
-            if "跑" in action or "奔跑" in action or "running" in action_lower:
-                return "身体前倾、双腿交替、手臂摆动"
-            elif "走" in action or "步行" in action or "walking" in action_lower:
-                return "自然站立、双腿交替、手臂自然摆动"
-            elif "停" in action or "停下" in action or "stop" in action_lower:
-                return "急停、身体前倾、双手撑膝"
-            elif "坐" in action or "sitting" in action_lower:
-                return "盘腿而坐、身体前倾"
-            elif "站" in action or "站立" in action or "standing" in action_lower:
-                return "昂首站立、双手自然下垂"
-            elif "蹲" in action or "crouching" in action_lower:
-                return "蹲下、身体前倾、双手撑地"
-            elif "躺" in action or "lying" in action_lower:
-                return "平躺、身体放松"
-            elif "转身" in action or "turn" in action_lower:
-                return "转身、背对镜头、肩膀紧绷"
-            elif "看" in action or "look" in action_lower or "凝视" in action:
-                return "站立、头部转向、眼神专注"
-            elif "握" in action or "grip" in action_lower or "握拳" in action:
-                return "握拳、挺胸、身体前倾"
+            pose = _match_pose_rule(action.lower(), "pose_by_action", POSE_BY_ACTION_RULES)
+            if pose:
+                return pose
         
         # 根据情绪推断姿势
         mood = scene.get("mood", "")
         if mood:
-            mood_lower = mood.lower()
-            if "愤怒" in mood or "angry" in mood_lower or "愤怒" in mood:
-                return "握拳、挺胸、身体前倾"
-            elif "悲伤" in mood or "sad" in mood_lower or "悲伤" in mood:
-                return "低头、肩膀下垂、双手无力"
-            elif "紧张" in mood or "nervous" in mood_lower or "紧张" in mood:
-                return "身体紧绷、双手握拳、肩膀高耸"
-            elif "放松" in mood or "relaxed" in mood_lower or "放松" in mood:
-                return "身体放松、双手自然下垂、肩膀放松"
+            pose = _match_pose_rule(mood.lower(), "pose_by_mood", POSE_BY_MOOD_RULES)
+            if pose:
+                return pose
         
         # 根据景别推断姿势
         shot_size = scene.get("shot_size", "")
         if shot_size:
-            if "特写" in shot_size or "close" in shot_size.lower():
-                return "头部特写、颈部以上"
-            elif "近景" in shot_size or "close shot" in shot_size.lower():
-                return "肩部以上、头部和肩膀"
-            elif "中景" in shot_size or "medium" in shot_size.lower():
-                return "腰部以上、上半身"
-            elif "全景" in shot_size or "full" in shot_size.lower():
-                return "全身站立、双手自然下垂"
+            pose = _match_pose_rule(shot_size.lower(), "pose_by_shot_size", POSE_BY_SHOT_SIZE_RULES)
+            if pose:
+                return pose
         
         # 默认姿势
         return "自然站立、双手自然下垂"
     
     def _extract_pose(self, description: str) -> str:
         """从描述中提取姿势"""
-        pose_keywords = [
-            "坐", "站", "蹲", "跪", "躺", "趴", "靠", "倚",
-            "弯腰", "挺胸", "抬头", "低头", "侧身", "转身",
-            "双手叉腰", "双手抱胸", "双手背后", "单手扶墙",
-            "双腿交叉", "单腿站立", "盘腿", "翘腿"
-        ]
-        
-        # 按长度排序
-        pose_keywords.sort(key=len, reverse=True)
-        
-        for keyword in pose_keywords:
-            if keyword in description:
-                return keyword
-        
-        # 从动作中推断姿势
-        if "坐" in description:
-            return "坐着"
-        elif "站" in description:
-            return "站着"
-        elif "躺" in description:
-            return "躺着"
+        keyword = RULE_KEYWORD_MATCHER.first(description, "pose")
+        if keyword:
+            return keyword
         
         return ""
     
     def _extract_expression(self, description: str) -> str:
         """从描述中提取表情"""
-        expression_keywords = [
-            "焦虑", "紧张", "轻松", "悲伤", "高兴", "愤怒", "疑惑", "微笑",
-            "严肃", "冷漠", "兴奋", "恐惧", "惊讶", "失望", "满意", "不满",
-            "痛苦", "快乐", "忧郁", "开朗", "疲惫", "精神", "专注", "分心",
-            "面无表情", "眉头紧锁", "嘴角上扬", "眼神坚定", "眼神闪烁",
-            "如释重负", "愁眉苦脸", "喜笑颜开", "怒目而视"
-        ]
-        
-        # 按长度排序
-        expression_keywords.sort(key=len, reverse=True)
-        
-        for keyword in expression_keywords:
-            if keyword in description:
-                return keyword
-        
-        return "自然表情"
+        return RULE_KEYWORD_MATCHER.first(description, "expression") or "自然表情"
     
     def _extract_clothing(self, description: str) -> str:
         """从描述中提取服装信息"""
-        clothing_keywords = [
-            "西装", "衬衫", "T恤", "裙子", "裤子", "外套", "大衣", "风衣",
-            "制服", "工作服", "运动服", "休闲服", "正装", "便装",
-            "红色", "蓝色", "黑色", "白色", "灰色", "彩色"
-        ]
-        
-        for keyword in clothing_keywords:
-            if keyword in description:
-                return keyword
-        
-        return ""
+        return RULE_KEYWORD_MATCHER.first(description, "clothing") or ""
     
     def _extract_props(self, description: str) -> str:
         """从描述中提取道具信息"""
-        props_keywords = [
-            "手机", "电脑", "书", "笔", "杯子", "包", "钥匙", "钱包",
-            "文件", "文件夹", "报纸", "杂志", "相机", "眼镜",
-            "门", "窗", "桌子", "椅子", "沙发", "床",
-            "车", "自行车", "摩托车", "包", "行李箱"
-        ]
-        
-        for keyword in props_keywords:
-            if keyword in description:
-                return keyword
-        
-        return ""
+        return RULE_KEYWORD_MATCHER.first(description, "props") or ""
     
     def _extract_scene_details(self, description: str, location: str) -> str:
         """提取场景细节"""
         # 提取描述中关于场景的详细信息
         # 移除人物相关的描述，保留环境描述
         
-        # 场景特征关键词
-        scene_features = [
-            "宽敞", "狭窄", "明亮", "昏暗", "整洁", "凌乱", "安静", "嘈杂",
-            "现代", "古典", "豪华", "简陋", "温馨", "冷清", "热闹", "空旷"
-        ]
-        
-        details = []
-        for feature in scene_features:
-            if feature in description:
-                details.append(feature)
+        # 场景特征关键词（按 SCENE_FEATURE_KEYWORDS 的顺序）
+        details = RULE_KEYWORD_MATCHER.all(description, "scene_feature")
         
         # 如果有位置信息，结合位置和特征
         if details and location:
@@ -1116,14 +1865,6 @@ class ImagePromptGenerator:
         main_char = characters[0]
         import re
         
-        # 位置关系关键词（按优先级排序，长词优先）
-        position_keywords = [
-            "坐在", "站在", "躺在", "靠在", "倚在", "位于",
-            "窗边", "桌边", "门口", "角落", "中央", "中间",
-            "旁边", "前方", "后方", "左侧", "右侧", "边缘",
-            "面对", "背对", "面向", "背向", "靠近", "远离"
-        ]
-        
         # 尝试提取完整的位置关系短语
         # 模式：人物 + 位置动词 + 位置描述
         patterns = [
@@ -1149,42 +1890,35 @@ class ImagePromptGenerator:
                             return f"{main_char}在{cleaned}"
         
         # 如果没有找到，尝试简单匹配
-        for keyword in sorted(position_keywords, key=len, reverse=True):
-            if keyword in description:
-                idx = description.find(keyword)
-                # 检查前面是否有人物名称
-                char_start = max(0, idx - 10)
-                char_snippet = description[char_start:idx]
-                
-                if main_char in char_snippet:
-                    # 提取位置描述（向后15个字符）
-                    pos_end = min(len(description), idx + len(keyword) + 15)
-                    pos_snippet = description[idx:pos_end]
-                    # 清理位置描述
-                    pos_cleaned = re.sub(r'[，。！？、]', '', pos_snippet).strip()
-                    if pos_cleaned and len(pos_cleaned) <= 20:
-                        return pos_cleaned
+        for keyword in RULE_KEYWORD_MATCHER.all(description, "position"):
+            idx = description.find(keyword)
+            # 检查前面是否有人物名称
+            char_start = max(0, idx - 10)
+            char_snippet = description[char_start:idx]
+            
+            if main_char in char_snippet:
+                # 提取位置描述（向后15个字符）
+                pos_end = min(len(description), idx + len(keyword) + 15)
+                pos_snippet = description[idx:pos_end]
+                # 清理位置描述
+                pos_cleaned = re.sub(r'[，。！？、]', '', pos_snippet).strip()
+                if pos_cleaned and len(pos_cleaned) <= 20:
+                    return pos_cleaned
         
         return ""
     
     def _extract_weather(self, description: str) -> str:
         """从描述中提取天气信息"""
-        weather_keywords = [
-            "晴天", "阴天", "雨天", "雪天", "雾天", "大风", "微风",
-            "阳光", "月光", "星光", "灯光", "霓虹灯"
-        ]
-        
-        for keyword in weather_keywords:
-            if keyword in description:
-                return keyword
-        
-        return ""
+        return RULE_KEYWORD_MATCHER.first(description, "weather") or ""
     
     def _translate_to_english(self, text: str) -> str:
         """中文到英文翻译（支持 LLM 辅助）"""
         if not text or not text.strip():
             return text
-        
+        return self._shared_translation("term", text, self._translate_term_uncached)
+    
+    def _translate_term_uncached(self, text: str) -> str:
+        """翻译短语（不经过多语言共享缓存）"""
         # 如果启用 LLM 且文本较长或不在字典中，使用 LLM 翻译
         if self.use_llm and self.llm_service and (len(text) > 5 or text not in self._get_basic_translations()):
             try:
@@ -1193,81 +1927,19 @@ class ImagePromptGenerator:
                 # LLM 翻译失败，回退到字典
                 pass
         
-        # 规则处理（字典映射）
-        translations = self._get_basic_translations()
-        return translations.get(text, text)
+        # 规则处理（字典映射；不是完整词条时分词后逐词翻译，
+        # 仍有未登录的中文片段时保留原文，不输出中英混杂的半翻译结果）
+        translation = self._get_basic_translations().get(text)
+        if translation is not None:
+            return translation
+        translation = DICT_TRANSLATION_MEMO.get_or_build(
+            ("term", text), lambda: TRANSLATION_SEGMENTER.translate_complete(text)
+        )
+        return translation if translation is not None else text
     
     def _get_basic_translations(self) -> Dict[str, str]:
-        """获取基础翻译字典（扩展版）"""
-        return {
-            # 基础动作
-            "坐": "sitting", "站": "standing", "走": "walking", "跑": "running",
-            "看": "looking", "说": "speaking", "笑": "smiling", "哭": "crying",
-            "转身": "turning", "抬头": "looking up", "低头": "looking down",
-            "蹲": "crouching", "跪": "kneeling", "躺": "lying", "趴": "lying face down",
-            "靠": "leaning", "倚": "leaning against", "弯腰": "bending over",
-            "挺胸": "chest out", "侧身": "sideways", "转身": "turning around",
-            "推": "pushing", "拉": "pulling", "拿": "holding", "放": "placing",
-            "举": "raising", "握": "gripping", "抓": "grabbing", "扔": "throwing",
-            "踢": "kicking", "跳": "jumping", "进入": "entering", "离开": "leaving",
-            "靠近": "approaching", "远离": "moving away", "跟随": "following",
-            "追逐": "chasing", "躲避": "avoiding", "环顾": "looking around",
-            "张望": "peering", "凝视": "gazing", "注视": "staring", "扫视": "scanning",
-            "瞥见": "glimpsing", "点头": "nodding", "摇头": "shaking head",
-            "挥手": "waving", "摆手": "gesturing", "指向": "pointing",
-            "蹲下": "squatting", "站起": "standing up", "躺下": "lying down",
-            "趴下": "lying face down", "跪下": "kneeling", "弯腰": "bending",
-            "拥抱": "hugging", "握手": "shaking hands", "拍": "patting",
-            "打": "hitting", "推门": "pushing door", "开门": "opening door",
-            "关门": "closing door", "拿起": "picking up", "放下": "putting down",
-            "递给": "handing", "接过": "receiving", "翻开": "opening", "合上": "closing",
-            
-            # 表情和情绪
-            "焦虑": "anxious", "紧张": "tense", "轻松": "relaxed", "悲伤": "sad",
-            "高兴": "happy", "愤怒": "angry", "疑惑": "confused", "微笑": "smiling",
-            "严肃": "serious", "冷漠": "indifferent", "兴奋": "excited", "恐惧": "fearful",
-            "惊讶": "surprised", "失望": "disappointed", "满意": "satisfied", "不满": "dissatisfied",
-            "痛苦": "painful", "快乐": "joyful", "忧郁": "melancholic", "开朗": "cheerful",
-            "疲惫": "tired", "精神": "energetic", "专注": "focused", "分心": "distracted",
-            "面无表情": "expressionless", "眉头紧锁": "frowning", "嘴角上扬": "smiling",
-            "眼神坚定": "determined eyes", "眼神闪烁": "shifty eyes", "如释重负": "relieved",
-            "愁眉苦脸": "worried", "喜笑颜开": "beaming", "怒目而视": "glaring",
-            
-            # 姿势相关
-            "双手叉腰": "hands on hips", "双手抱胸": "arms crossed", "双手背后": "hands behind back",
-            "单手扶墙": "one hand on wall", "双腿交叉": "legs crossed", "单腿站立": "standing on one leg",
-            "盘腿": "cross-legged", "翘腿": "legs crossed", "身体前倾": "leaning forward",
-            "身体后仰": "leaning back", "肩膀下垂": "shoulders drooping", "肩膀高耸": "shoulders raised",
-            "双手撑膝": "hands on knees", "双手撑地": "hands on ground", "握拳": "clenched fists",
-            "自然站立": "standing naturally", "双手自然下垂": "arms hanging naturally",
-            
-            # 服装相关
-            "西装": "suit", "衬衫": "shirt", "T恤": "T-shirt", "裙子": "skirt",
-            "裤子": "pants", "外套": "jacket", "大衣": "coat", "风衣": "trench coat",
-            "制服": "uniform", "工作服": "work clothes", "运动服": "sportswear",
-            "休闲服": "casual wear", "正装": "formal wear", "便装": "casual clothes",
-            
-            # 场景和环境
-            "宽敞": "spacious", "狭窄": "narrow", "明亮": "bright", "昏暗": "dim",
-            "整洁": "tidy", "凌乱": "messy", "安静": "quiet", "嘈杂": "noisy",
-            "现代": "modern", "古典": "classical", "豪华": "luxurious", "简陋": "simple",
-            "温馨": "cozy", "冷清": "desolate", "热闹": "lively", "空旷": "empty",
-            
-            # 时间和天气
-            "白天": "daytime", "夜晚": "night", "黄昏": "dusk", "黎明": "dawn",
-            "中午": "noon", "下午": "afternoon", "早晨": "morning", "傍晚": "evening",
-            "晴天": "sunny", "雨天": "rainy", "阴天": "cloudy", "雪天": "snowy",
-            "大风": "windy", "雾天": "foggy", "雷雨": "thunderstorm",
-            
-            # 通用词汇
-            "动作": "action", "自然表情": "natural expression", "人物": "character",
-            "主角": "protagonist", "角色": "character", "场景": "scene", "环境": "environment",
-            "背景": "background", "地点": "location", "氛围": "atmosphere", "情绪": "emotion",
-            "表情": "expression", "姿势": "pose", "服装": "clothing", "道具": "props",
-            "特写": "close-up", "中景": "medium shot", "远景": "wide shot", "全景": "full shot",
-            "镜头": "shot", "画面": "frame", "构图": "composition", "光影": "lighting",
-            "色彩": "color", "色调": "tone", "质感": "texture", "风格": "style"
-        }
+        """获取基础翻译字典（扩展版，模块级共享字典，不要修改）"""
+        return BASIC_TRANSLATIONS
     
     def _translate_focal_length(self, focal: str) -> str:
         """翻译镜头焦段"""
@@ -1280,3 +1952,10 @@ class ImagePromptGenerator:
             "超长焦(200mm+)": "super telephoto 200mm+"
         }
         return translations.get(focal, focal)
+
+
+def _generate_chunk(config: Dict, registry: Optional[VisualRegistry],
+                    scenes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """子进程入口：用相同配置创建规则模式生成器，依次生成一块分镜的提示词"""
+    generator = ImagePromptGenerator(config, registry=registry)
+    return [generator._generate_one(scene, scenes) for scene in scenes]
@@ -0,0 +1,368 @@
+"""
+Nano Banana Pro 提示词结构（紧凑对象版）
+使用 __slots__ 对象代替 JSON 深拷贝的字典模板，减少每个分镜的内存占用和分配开销
+"""
+
+from typing import Dict, List, Any, Optional
+
+
+class PromptSection:
+    """
+    提示词分区基类
+
+    字段值为 None 表示该字段不存在（序列化时省略），
+    同时提供 get / [] 等字典式访问，兼容原有按字典读取 prompt_json 的代码
+
+    freeze() 之后分区变为只读（用于在多个分镜之间共享的缓存结果），需要修改时先 copy()
+    """
+
+    __slots__ = ("extras", "_frozen")
+
+    FIELDS: tuple = ()
+
+    def __init__(self, **fields):
+        object.__setattr__(self, "_frozen", False)
+        self.extras = None
+        for name in self.FIELDS:
+            object.__setattr__(self, name, None)
+        for key, value in fields.items():
+            self[key] = value
+
+    def to_json(self) -> Dict[str, Any]:
+        """序列化为普通字典（按模板字段顺序，省略未设置的字段）"""
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        if self.extras:
+            data.update(self.extras)
+        return data
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, Any]]) -> "PromptSection":
+        """从普通字典构建（未知字段保存在 extras 中，保证不丢失）"""
+        if isinstance(data, cls):
+            return data.copy()
+        section = cls()
+        for key, value in (data or {}).items():
+            section[key] = value
+        return section
+
+    def freeze(self) -> "PromptSection":
+        """将分区设为只读并返回自身"""
+        object.__setattr__(self, "_frozen", True)
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def copy(self) -> "PromptSection":
+        """复制分区（可修改的独立副本，只读分区复制后也可修改）"""
+        section = self.__class__()
+        for name in self.FIELDS:
+            object.__setattr__(section, name, getattr(self, name))
+        section.extras = dict(self.extras) if self.extras else None
+        return section
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is None else value
+
+    def keys(self) -> List[str]:
+        return list(self.to_json().keys())
+
+    def items(self):
+        return self.to_json().items()
+
+    def _lookup(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extras:
+            return self.extras.get(key)
+        return None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setattr__(self, name: str, value: Any):
+        if self._frozen:
+            raise TypeError(f"{self.__class__.__name__} 是共享的只读对象，请先 copy() 再修改")
+        object.__setattr__(self, name, value)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._frozen:
+                raise TypeError(f"{self.__class__.__name__} 是共享的只读对象，请先 copy() 再修改")
+            if self.extras is None:
+                self.extras = {}
+            self.extras[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not None
+
+    def __bool__(self) -> bool:
+        return any(getattr(self, name) is not None for name in self.FIELDS) or bool(self.extras)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (PromptSection, dict)):
+            other_json = other.to_json() if isinstance(other, PromptSection) else other
+            return self.to_json() == other_json
+        return NotImplemented
+
+    def __reduce__(self):
+        # 按字典序列化（支持 pickle 到子进程，只读状态一并保留）
+        return _rebuild_section, (self.__class__, self.to_json(), self._frozen)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_json()!r})"
+
+
+def _rebuild_section(section_type: type, data: Dict[str, Any], frozen: bool) -> PromptSection:
+    """pickle 反序列化入口"""
+    section = section_type.from_json(data)
+    return section.freeze() if frozen else section
+
+
+class SubjectSection(PromptSection):
+    """主体信息"""
+    FIELDS = ("main_character", "action", "pose", "expression", "clothing", "props", "full_description")
+    __slots__ = FIELDS
+
+
+class SceneSection(PromptSection):
+    """场景信息"""
+    FIELDS = ("location", "environment", "background", "time_of_day", "weather", "full_description")
+    __slots__ = FIELDS
+
+
+class CompositionSection(PromptSection):
+    """构图信息"""
+    FIELDS = ("shot_size", "camera_angle", "framing", "composition_tension", "rule_of_thirds", "leading_lines")
+    __slots__ = FIELDS
+
+
+class LightingSection(PromptSection):
+    """光照信息"""
+    FIELDS = ("type", "direction", "intensity", "color_temperature", "mood")
+    __slots__ = FIELDS
+
+
+class CameraTechnicalSection(PromptSection):
+    """技术参数"""
+    FIELDS = ("camera_model", "lens", "aperture", "focal_length", "depth_of_field")
+    __slots__ = FIELDS
+
+
+class VisualStyleSection(PromptSection):
+    """视觉风格"""
+    FIELDS = ("cinematic_style", "color_grading", "texture", "atmosphere",
+              "protagonist_type", "emotion_design", "performance_style")
+    __slots__ = FIELDS
+
+
+class NanoBananaPrompt:
+    """
+    Nano Banana Pro 结构化提示词
+
+    与 NANO_BANANA_PROMPT_TEMPLATE 的顶层结构一一对应；
+    section 为 None 表示该分区被省略（例如不包含技术参数时的 camera_technical）
+    """
+
+    SECTION_TYPES = {
+        "subject": SubjectSection,
+        "scene": SceneSection,
+        "composition": CompositionSection,
+        "lighting": LightingSection,
+        "camera_technical": CameraTechnicalSection,
+        "visual_style": VisualStyleSection,
+    }
+    LIST_FIELDS = ("spatial_anchors", "negative_constraints")
+    FIELDS = ("subject", "scene", "composition", "lighting", "camera_technical",
+              "visual_style", "spatial_anchors", "negative_constraints")
+
+    __slots__ = FIELDS + ("extras",)
+
+    def __init__(self, subject: SubjectSection = None, scene: SceneSection = None,
+                 composition: CompositionSection = None, lighting: LightingSection = None,
+                 camera_technical: CameraTechnicalSection = None,
+                 visual_style: VisualStyleSection = None,
+                 spatial_anchors: List = None, negative_constraints: List = None):
+        self.subject = subject
+        self.scene = scene
+        self.composition = composition
+        self.lighting = lighting
+        self.camera_technical = camera_technical
+        self.visual_style = visual_style
+        self.spatial_anchors = spatial_anchors if spatial_anchors is not None else []
+        self.negative_constraints = negative_constraints if negative_constraints is not None else []
+        self.extras = None
+
+    def to_json(self) -> Dict[str, Any]:
+        """序列化为普通字典（用于导出、保存项目、显示 JSON）"""
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if isinstance(value, PromptSection):
+                value = value.to_json()
+            else:
+                value = list(value)
+            data[name] = value
+        if self.extras:
+            data.update(self.extras)
+        return data
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, Any]]) -> "NanoBananaPrompt":
+        """从普通字典（例如已保存的项目文件）构建"""
+        if isinstance(data, cls):
+            return data.copy()
+        prompt = cls()
+        for key, value in (data or {}).items():
+            prompt[key] = value
+        return prompt
+
+    @classmethod
+    def coerce(cls, data: Any) -> Optional["NanoBananaPrompt"]:
+        """将字典或对象统一为 NanoBananaPrompt（None 保持为 None）"""
+        if data is None or isinstance(data, cls):
+            return data
+        return cls.from_json(data)
+
+    def copy(self) -> "NanoBananaPrompt":
+        """深复制（各分区和列表都是独立副本，可安全编辑）"""
+        prompt = self.__class__()
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, PromptSection):
+                value = value.copy()
+            elif value is not None:
+                value = list(value)
+            setattr(prompt, name, value)
+        prompt.extras = dict(self.extras) if self.extras else None
+        return prompt
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is None else value
+
+    def keys(self) -> List[str]:
+        return list(self.to_json().keys())
+
+    def _lookup(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extras:
+            return self.extras.get(key)
+        return None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        section_type = self.SECTION_TYPES.get(key)
+        if section_type is not None:
+            if value is not None and not isinstance(value, section_type):
+                value = section_type.from_json(value)
+            setattr(self, key, value)
+        elif key in self.LIST_FIELDS:
+            setattr(self, key, list(value) if value is not None else [])
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not None
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if key in self.FIELDS:
+            setattr(self, key, None)
+        elif self.extras:
+            self.extras.pop(key, None)
+        return default if value is None else value
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (NanoBananaPrompt, dict)):
+            other_json = other.to_json() if isinstance(other, NanoBananaPrompt) else other
+            return self.to_json() == other_json
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"NanoBananaPrompt({self.to_json()!r})"
+
+
+def json_default(obj: Any) -> Any:
+    """
+    json.dump 的 default 钩子：序列化带 to_json() 方法的对象
+
+    用法：json.dump(data, f, ensure_ascii=False, default=json_default)
+    """
+    to_json = getattr(obj, "to_json", None)
+    if callable(to_json):
+        return to_json()
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def restore_prompt_objects(image_prompts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将（从项目文件加载的）提示词列表中的 prompt_json 字典转换为 NanoBananaPrompt 对象
+
+    Args:
+        image_prompts: 提示词列表
+
+    Returns:
+        List[Dict]: 同一列表（原地转换）
+    """
+    for prompt_data in image_prompts or []:
+        if isinstance(prompt_data, dict) and prompt_data.get("prompt_json"):
+            prompt_data["prompt_json"] = NanoBananaPrompt.coerce(prompt_data["prompt_json"])
+        for variant in ((prompt_data or {}).get("variants") or {}).values():
+            if isinstance(variant, dict) and variant.get("prompt_json"):
+                variant["prompt_json"] = NanoBananaPrompt.coerce(variant["prompt_json"])
+    return image_prompts
+
+
+def prompt_variant(prompt_data: Dict[str, Any], language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    取提示词结果的指定语言版本（多语言输出时结果中带有 variants）
+
+    Args:
+        prompt_data: 单个分镜的提示词结果
+        language: "chinese", "english", "bilingual"；为 None、就是生成时的主语言或没有该版本时原样返回
+
+    Returns:
+        Dict: prompt_json / prompt_text / negative_prompt 替换为指定语言版本的浅拷贝（或原结果）
+    """
+    variants = prompt_data.get("variants") or {}
+    if not language or language == prompt_data.get("language") or language not in variants:
+        return prompt_data
+    view = dict(prompt_data)
+    view.update(variants[language])
+    view["language"] = language
+    return view
+
+
+def update_prompt_variant(prompt_data: Dict[str, Any], language: Optional[str], **fields: Any):
+    """
+    修改提示词结果中指定语言版本的 prompt_json / prompt_text / negative_prompt（原地修改）
+
+    主语言（或单语言输出）同时修改顶层字段，保持与 variants 一致
+    """
+    variants = prompt_data.get("variants") or {}
+    if language in variants:
+        variants[language].update(fields)
+    if not language or language == prompt_data.get("language") or language not in variants:
+        prompt_data.update(fields)
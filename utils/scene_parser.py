@@ -2,7 +2,13 @@
 分镜头解析工具（简化版）
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
+
+from utils.keyword_matcher import KeywordMatcher
+from utils.scene_schema import Scene
+
+# 每个字段最多缓存的原始值个数（枚举字段的取值很少，上限只是防止异常输入占用过多内存）
+NORMALIZE_CACHE_SIZE = 4096
 
 class SceneParser:
     """分镜头解析器"""
@@ -43,8 +49,44 @@ class SceneParser:
         # 表演风格选项
         self.valid_performance_styles = ["内敛表演", "外放表演", "反差表演", "细节表演"]
         self.valid_times = ["白天", "夜晚", "黄昏", "黎明", "中午", "下午"]
+        
+        # 需要规范化的字段 -> (有效选项, 默认值)；选项顺序即子串匹配的优先级
+        self._field_specs = {
+            "shot_size": (self.valid_shot_sizes, "中景"),
+            "camera_angle": (self.valid_camera_angles_new, "视平"),
+            "camera_movement": (self.valid_camera_movements, "固定"),
+            "camera_equipment": (self.valid_camera_equipments, "固定"),
+            "lens_focal_length": (self.valid_lens_focals, "标准(35-50mm)"),
+            "camera": (self.valid_cameras, "ARRI Alexa"),
+            "lens": (self.valid_lenses, "ARRI Master Primes"),
+            "aperture": (self.valid_apertures, "f/2.8"),
+            "scene_type": (self.valid_scene_types, "普通"),
+            "composition_tension": (self.valid_composition_tensions, "引导"),
+            "axis_crossing": (self.valid_axis_crossings, "维持轴线"),
+            "shot_transition": (self.valid_shot_transitions, "流畅型衔接"),
+            "protagonist_type": (self.valid_protagonist_types, ""),
+            "emotion_design": (self.valid_emotion_designs, ""),
+            "performance_style": (self.valid_performance_styles, ""),
+            "time": (self.valid_times, "白天"),
+        }
+        self._compile_normalizers()
+    
+    def _compile_normalizers(self):
+        """
+        预编译规范化查找表（修改 valid_* 选项列表后需要重新调用）
+        
+        每个字段一张精确匹配哈希表 + 一个多模式子串匹配器（一次扫描得到所有命中的选项），
+        规范化结果按 (字段, 原始值) 缓存
+        """
+        self._exact_options = {field: frozenset(options) for field, (options, _) in self._field_specs.items()}
+        self._option_matcher = KeywordMatcher(
+            {field: options for field, (options, _) in self._field_specs.items()}
+        )
+        self._normalized = {field: {} for field in self._field_specs}
+        self._legacy_camera_angles = frozenset(self.valid_camera_angles)
+        self._legacy_aesthetics_techniques = frozenset(self.valid_aesthetics_techniques)
     
-    def validate_scenes(self, scenes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def validate_scenes(self, scenes: List[Dict[str, Any]]) -> List[Scene]:
         """
         验证和规范化分镜头数据
         
@@ -52,172 +94,162 @@ class SceneParser:
             scenes: 原始分镜头列表
         
         Returns:
-            List[Dict]: 验证后的分镜头列表
+            List[Scene]: 验证后的分镜记录列表（支持字典式访问，to_json() 转换为普通字典）
         """
         if not isinstance(scenes, list):
             raise ValueError("分镜头数据应该是列表格式")
         
-        validated_scenes = []
+        return self.validator().extend(scenes)
+    
+    def validator(self, start_number: int = 1) -> "SceneValidator":
+        """
+        创建增量校验器（逐个或分块校验分镜，连续编号，共享本解析器的规范化缓存）
+        
+        Args:
+            start_number: 第一个分镜的编号
+        
+        Returns:
+            SceneValidator: 增量校验器
+        """
+        return SceneValidator(self, start_number)
+    
+    def _validate_scene(self, scene: Dict[str, Any], scene_number: int) -> Scene:
+        """
+        验证和规范化单个分镜头
+        
+        Args:
+            scene: 原始分镜头
+            scene_number: 分镜编号
         
-        for i, scene in enumerate(scenes):
+        Returns:
+            Scene: 验证后的分镜记录
+        """
+        normalize = self._normalize_field
+        
+        # 兼容旧格式：如果提供了组合格式的 camera_angle（景别/角度/运镜/装备/焦段），拆分一次后解析
+        camera_angle_raw = scene.get("camera_angle", "")
+        parts = str(camera_angle_raw).split("/") if "/" in str(camera_angle_raw) else None
+        if parts is not None and len(parts) == 5:
+            shot_size = normalize("shot_size", parts[0])
+            camera_angle = normalize("camera_angle", parts[1])
+            camera_movement = normalize("camera_movement", parts[2])
+            camera_equipment = normalize("camera_equipment", parts[3])
+            lens_focal_length = normalize("lens_focal_length", parts[4])
+        else:
             # 处理独立字段（新格式）
-            shot_size = self._normalize_value(
-                scene.get("shot_size", ""),
-                self.valid_shot_sizes,
-                "中景"
-            )
-            camera_angle = self._normalize_value(
-                scene.get("camera_angle", ""),
-                self.valid_camera_angles_new,
-                "视平"
-            )
-            camera_movement = self._normalize_value(
-                scene.get("camera_movement", ""),
-                self.valid_camera_movements,
-                "固定"
-            )
-            camera_equipment = self._normalize_value(
-                scene.get("camera_equipment", ""),
-                self.valid_camera_equipments,
-                "固定"
-            )
-            lens_focal_length = self._normalize_value(
-                scene.get("lens_focal_length", ""),
-                self.valid_lens_focals,
-                "标准(35-50mm)"
-            )
-            
-            # 相机、镜头、光圈（必选字段）
-            camera = self._normalize_value(
-                scene.get("camera", ""),
-                self.valid_cameras,
-                "ARRI Alexa"
-            )
-            lens = self._normalize_value(
-                scene.get("lens", ""),
-                self.valid_lenses,
-                "ARRI Master Primes"
-            )
-            aperture = self._normalize_value(
-                scene.get("aperture", ""),
-                self.valid_apertures,
-                "f/2.8"
-            )
+            shot_size = normalize("shot_size", scene.get("shot_size", ""))
+            camera_angle = normalize("camera_angle", camera_angle_raw)
+            camera_movement = normalize("camera_movement", scene.get("camera_movement", ""))
+            camera_equipment = normalize("camera_equipment", scene.get("camera_equipment", ""))
+            lens_focal_length = normalize("lens_focal_length", scene.get("lens_focal_length", ""))
             
-            # 兼容旧格式：如果提供了组合格式的 camera_angle，尝试解析
-            camera_angle_raw = scene.get("camera_angle", "")
-            if "/" in str(camera_angle_raw) and len(str(camera_angle_raw).split("/")) == 5:
-                parts = str(camera_angle_raw).split("/")
-                shot_size = self._normalize_value(parts[0], self.valid_shot_sizes, "中景")
-                camera_angle = self._normalize_value(parts[1], self.valid_camera_angles_new, "视平")
-                camera_movement = self._normalize_value(parts[2], self.valid_camera_movements, "固定")
-                camera_equipment = self._normalize_value(parts[3], self.valid_camera_equipments, "固定")
-                lens_focal_length = self._normalize_value(parts[4], self.valid_lens_focals, "标准(35-50mm)")
             # 兼容更旧的格式：单个 camera_angle 值
-            elif camera_angle_raw and camera_angle_raw not in self.valid_camera_angles_new and camera_angle_raw in self.valid_camera_angles:
+            if (camera_angle_raw and isinstance(camera_angle_raw, str)
+                    and camera_angle_raw not in self._exact_options["camera_angle"]
+                    and camera_angle_raw in self._legacy_camera_angles):
                 shot_size_map = {
                     "特写": "特写", "近景": "近景", "中景": "中景", 
                     "远景": "远景", "全景": "全景"
                 }
                 shot_size = shot_size_map.get(camera_angle_raw, "中景")
                 camera_angle = "视平"
-            
-            # 验证新增的特殊场景字段
-            scene_type = self._normalize_value(
-                scene.get("scene_type", "普通"),
-                self.valid_scene_types,
-                "普通"
-            )
-            composition_tension = self._normalize_value(
-                scene.get("composition_tension", "引导"),
-                self.valid_composition_tensions,
-                "引导"
-            )
-            axis_crossing = self._normalize_value(
-                scene.get("axis_crossing", "维持轴线"),
-                self.valid_axis_crossings,
-                "维持轴线"
-            )
-            shot_transition = self._normalize_value(
-                scene.get("shot_transition", "流畅型衔接"),
-                self.valid_shot_transitions,
-                "流畅型衔接"
-            )
-            # 验证新增的创作维度字段
-            protagonist_type = self._normalize_value(
-                scene.get("protagonist_type", ""),
-                self.valid_protagonist_types,
-                ""
-            )
-            emotion_design = self._normalize_value(
-                scene.get("emotion_design", ""),
-                self.valid_emotion_designs,
-                ""
-            )
-            performance_style = self._normalize_value(
-                scene.get("performance_style", ""),
-                self.valid_performance_styles,
-                ""
-            )
-            # 审美技法可以多选，验证每个技法是否有效
-            aesthetics_technique_raw = scene.get("aesthetics_technique", "精细")
-            if isinstance(aesthetics_technique_raw, str):
-                # 如果是字符串，可能是逗号分隔的多个技法
-                techniques = [t.strip() for t in aesthetics_technique_raw.split(",")]
-                valid_techniques = [t for t in techniques if t in self.valid_aesthetics_techniques]
-                aesthetics_technique = ",".join(valid_techniques) if valid_techniques else "精细"
-            else:
-                aesthetics_technique = "精细"
-            
-            validated_scene = {
-                "scene_number": i + 1,
-                "scene_description": scene.get("scene_description", f"分镜头 {i + 1}"),
-                "shot_size": shot_size,
-                "camera_angle": camera_angle,
-                "camera_movement": camera_movement,
-                "camera_equipment": camera_equipment,
-                "lens_focal_length": lens_focal_length,
-                "camera": camera,
-                "lens": lens,
-                "aperture": aperture,
-                "characters": scene.get("characters", []) if isinstance(scene.get("characters"), list) else [],
-                "location": scene.get("location", "未知"),
-                "time": self._normalize_value(
-                    scene.get("time", "白天"),
-                    self.valid_times,
-                    "白天"
-                ),
-                "mood": scene.get("mood", "中性"),
-                "dialogue_text": scene.get("dialogue_text", ""),
-                "voiceover_text": scene.get("voiceover_text", ""),
-                "sound_effects": scene.get("sound_effects", ""),
-                # 新增的特殊场景字段
-                "scene_type": scene_type,
-                "composition_tension": composition_tension,
-                "axis_crossing": axis_crossing,
-                "shot_transition": shot_transition,
-                "aesthetics_technique": aesthetics_technique,
-                # 新增的创作维度字段
-                "protagonist_type": protagonist_type,
-                "emotion_design": emotion_design,
-                "performance_style": performance_style
-            }
-            
-            # 保留其他可选的创作指导字段（如果AI生成了这些字段，保留它们但不强制要求）
-            optional_fields = [
-                "fight_scene_type", "confrontation_type", "chase_type",
-                "ultimate_skill_stage", "ending_type"
-            ]
-            for field in optional_fields:
-                if field in scene:
-                    validated_scene[field] = scene[field]
-            
-            validated_scenes.append(validated_scene)
         
-        return validated_scenes
+        # 相机、镜头、光圈（必选字段）
+        camera = normalize("camera", scene.get("camera", ""))
+        lens = normalize("lens", scene.get("lens", ""))
+        aperture = normalize("aperture", scene.get("aperture", ""))
+        
+        # 验证新增的特殊场景字段
+        scene_type = normalize("scene_type", scene.get("scene_type", "普通"))
+        composition_tension = normalize("composition_tension", scene.get("composition_tension", "引导"))
+        axis_crossing = normalize("axis_crossing", scene.get("axis_crossing", "维持轴线"))
+        shot_transition = normalize("shot_transition", scene.get("shot_transition", "流畅型衔接"))
+        # 验证新增的创作维度字段
+        protagonist_type = normalize("protagonist_type", scene.get("protagonist_type", ""))
+        emotion_design = normalize("emotion_design", scene.get("emotion_design", ""))
+        performance_style = normalize("performance_style", scene.get("performance_style", ""))
+        # 审美技法可以多选，验证每个技法是否有效
+        aesthetics_technique_raw = scene.get("aesthetics_technique", "精细")
+        if isinstance(aesthetics_technique_raw, str):
+            # 如果是字符串，可能是逗号分隔的多个技法
+            techniques = [t.strip() for t in aesthetics_technique_raw.split(",")]
+            valid_techniques = [t for t in techniques if t in self._legacy_aesthetics_techniques]
+            aesthetics_technique = ",".join(valid_techniques) if valid_techniques else "精细"
+        else:
+            aesthetics_technique = "精细"
+        
+        validated_scene = Scene({
+            "scene_number": scene_number,
+            "scene_description": scene.get("scene_description", f"分镜头 {scene_number}"),
+            "shot_size": shot_size,
+            "camera_angle": camera_angle,
+            "camera_movement": camera_movement,
+            "camera_equipment": camera_equipment,
+            "lens_focal_length": lens_focal_length,
+            "camera": camera,
+            "lens": lens,
+            "aperture": aperture,
+            "characters": scene.get("characters", []) if isinstance(scene.get("characters"), list) else [],
+            "location": scene.get("location", "未知"),
+            "time": normalize("time", scene.get("time", "白天")),
+            "mood": scene.get("mood", "中性"),
+            "dialogue_text": scene.get("dialogue_text", ""),
+            "voiceover_text": scene.get("voiceover_text", ""),
+            "sound_effects": scene.get("sound_effects", ""),
+            # 新增的特殊场景字段
+            "scene_type": scene_type,
+            "composition_tension": composition_tension,
+            "axis_crossing": axis_crossing,
+            "shot_transition": shot_transition,
+            "aesthetics_technique": aesthetics_technique,
+            # 新增的创作维度字段
+            "protagonist_type": protagonist_type,
+            "emotion_design": emotion_design,
+            "performance_style": performance_style
+        })
+        
+        # 保留其他可选的创作指导字段（如果AI生成了这些字段，保留它们但不强制要求）
+        optional_fields = [
+            "fight_scene_type", "confrontation_type", "chase_type",
+            "ultimate_skill_stage", "ending_type"
+        ]
+        for field in optional_fields:
+            if field in scene:
+                validated_scene[field] = scene[field]
+        
+        return validated_scene
+    
+    def _normalize_field(self, field: str, value: Any) -> str:
+        """
+        按预编译的查找表规范化字段值（与 _normalize_value 结果相同）
+        
+        先查精确匹配哈希表，再用子串匹配器一次扫描取优先级最高的选项；结果按原始值缓存
+        """
+        if not value:
+            return self._field_specs[field][1]
+        cache = self._normalized[field]
+        try:
+            return cache[value]
+        except KeyError:
+            pass
+        except TypeError:
+            # 不可哈希的异常输入（如列表）走逐个匹配
+            options, default = self._field_specs[field]
+            return self._normalize_value(value, options, default)
+        
+        if value in self._exact_options[field]:
+            result = value
+        elif isinstance(value, str):
+            result = self._option_matcher.first(value, field) or self._field_specs[field][1]
+        else:
+            options, default = self._field_specs[field]
+            result = self._normalize_value(value, options, default)
+        if len(cache) < NORMALIZE_CACHE_SIZE:
+            cache[value] = result
+        return result
     
     def _normalize_value(self, value: str, valid_options: List[str], default: str) -> str:
-        """规范化值"""
+        """规范化值（逐个选项匹配，用于未预编译的选项列表）"""
         if not value:
             return default
         
@@ -232,3 +264,46 @@ class SceneParser:
         
         return default
 
+
+class SceneValidator:
+    """
+    增量分镜校验器
+    
+    逐个或分块接收分镜（例如流式 / 分段划分剧本的结果），按到达顺序连续编号，
+    每个分镜校验后立即返回，下游（提示词生成等）无需等待全部划分完成
+    """
+    
+    def __init__(self, parser: SceneParser, start_number: int = 1):
+        """
+        初始化校验器
+        
+        Args:
+            parser: 分镜解析器（共享其预编译查找表和规范化缓存）
+            start_number: 第一个分镜的编号
+        """
+        self.parser = parser
+        self.next_number = start_number
+        self.count = 0
+    
+    def add(self, scene: Dict[str, Any]) -> Scene:
+        """校验单个分镜并分配下一个编号"""
+        validated_scene = self.parser._validate_scene(scene, self.next_number)
+        self.next_number += 1
+        self.count += 1
+        return validated_scene
+    
+    def extend(self, scenes: List[Dict[str, Any]]) -> List[Scene]:
+        """
+        校验一块分镜（例如一段剧本的划分结果）
+        
+        Returns:
+            List[Scene]: 本块校验后的分镜记录（编号接续之前的分镜）
+        """
+        if not isinstance(scenes, list):
+            raise ValueError("分镜头数据应该是列表格式")
+        return [self.add(scene) for scene in scenes]
+    
+    def stream(self, scenes: Iterable[Dict[str, Any]]) -> Iterator[Scene]:
+        """逐个校验任意可迭代对象（包括生成器）中的分镜，每校验一个立即返回"""
+        for scene in scenes:
+            yield self.add(scene)
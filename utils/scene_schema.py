@@ -0,0 +1,218 @@
+"""
+分镜记录（紧凑对象版）
+使用 __slots__ 对象代替约 25 个字符串键的字典，枚举字段的字符串值驻留（intern）后在所有分镜之间共享；
+项目文件、LLM 输出等边界处与普通字典无损互转
+"""
+
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 分镜字段（顺序与 SceneParser.validate_scenes 的输出一致，也是序列化顺序）
+SCENE_FIELDS = (
+    "scene_number", "scene_description",
+    "shot_size", "camera_angle", "camera_movement", "camera_equipment", "lens_focal_length",
+    "camera", "lens", "aperture",
+    "characters", "location", "time", "mood",
+    "dialogue_text", "voiceover_text", "sound_effects",
+    "scene_type", "composition_tension", "axis_crossing", "shot_transition", "aesthetics_technique",
+    "protagonist_type", "emotion_design", "performance_style"
+)
+_FIELD_SET = frozenset(SCENE_FIELDS)
+
+# 取值来自固定选项（或在分镜之间大量重复）的字段，字符串值驻留共享
+INTERNED_FIELDS = frozenset({
+    "shot_size", "camera_angle", "camera_movement", "camera_equipment", "lens_focal_length",
+    "camera", "lens", "aperture", "location", "time", "mood",
+    "scene_type", "composition_tension", "axis_crossing", "shot_transition", "aesthetics_technique",
+    "protagonist_type", "emotion_design", "performance_style"
+})
+
+# 字段为空时使用的默认值（与 SceneParser 规范化时的默认值一致）
+SCENE_DEFAULTS = {
+    "shot_size": "中景",
+    "camera_angle": "视平",
+    "camera_movement": "固定",
+    "camera_equipment": "固定",
+    "lens_focal_length": "标准(35-50mm)",
+    "camera": "ARRI Alexa",
+    "lens": "ARRI Master Primes",
+    "aperture": "f/2.8",
+    "scene_type": "普通",
+    "composition_tension": "引导",
+    "axis_crossing": "维持轴线",
+    "shot_transition": "流畅型衔接",
+    "aesthetics_technique": "精细",
+    "time": "白天",
+}
+
+_intern = sys.intern
+
+
+class Scene:
+    """
+    分镜记录
+
+    未设置的字段不占用字典槽位（与字典中不存在该键等价），未知字段保存在 extras 中，
+    同时提供 get / [] / keys / items 等字典式访问，兼容原有按字典读写分镜的代码
+    """
+
+    __slots__ = SCENE_FIELDS + ("extras",)
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **fields):
+        self.extras = None
+        for source in (data, fields):
+            if not source:
+                continue
+            for key, value in source.items():
+                if key in _FIELD_SET:
+                    if key in INTERNED_FIELDS and type(value) is str:
+                        value = _intern(value)
+                    setattr(self, key, value)
+                else:
+                    if self.extras is None:
+                        self.extras = {}
+                    self.extras[key] = value
+
+    @classmethod
+    def coerce(cls, data: Any) -> "Scene":
+        """转换为分镜记录（已经是记录时原样返回）"""
+        if isinstance(data, cls):
+            return data
+        return cls(data)
+
+    def to_json(self) -> Dict[str, Any]:
+        """序列化为普通字典（按字段顺序，未设置的字段省略，extras 附在最后）"""
+        data = {}
+        for name in SCENE_FIELDS:
+            try:
+                data[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        if self.extras:
+            data.update(self.extras)
+        return data
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, Any]]) -> "Scene":
+        """从普通字典构建"""
+        return cls(data)
+
+    def copy(self) -> "Scene":
+        """复制记录（列表等可变字段值与原记录共享，与 dict.copy() 相同）"""
+        return self.__class__(self.to_json())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        if self.extras:
+            return self.extras.get(key, default)
+        return default
+
+    def get_or_default(self, key: str) -> Any:
+        """字段值；字段不存在或为空时返回 SCENE_DEFAULTS 中的默认值"""
+        value = self.get(key)
+        if value:
+            return value
+        return SCENE_DEFAULTS.get(key, value)
+
+    def keys(self) -> List[str]:
+        return list(self)
+
+    def values(self) -> List[Any]:
+        return list(self.to_json().values())
+
+    def items(self):
+        return self.to_json().items()
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, other: Any = None, **fields):
+        for source in (other, fields):
+            if source:
+                for key, value in source.items():
+                    self[key] = value
+
+    def pop(self, key: str, *default: Any) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extras and key in self.extras:
+            return self.extras[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELD_SET:
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = _intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[key] = value
+
+    def __delitem__(self, key: str):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extras and key in self.extras:
+            del self.extras[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return bool(self.extras) and key in self.extras
+
+    def __iter__(self) -> Iterator[str]:
+        for name in SCENE_FIELDS:
+            if hasattr(self, name):
+                yield name
+        if self.extras:
+            yield from self.extras
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (Scene, dict)):
+            other_json = other.to_json() if isinstance(other, Scene) else other
+            return self.to_json() == other_json
+        return NotImplemented
+
+    def __reduce__(self):
+        # 按字典序列化（支持 pickle 到子进程）
+        return self.__class__, (self.to_json(),)
+
+    def __repr__(self) -> str:
+        return f"Scene({self.to_json()!r})"
+
+
+def to_scene_records(scenes: Optional[Iterable[Any]]) -> List[Scene]:
+    """
+    将（从项目文件加载的）分镜字典列表转换为分镜记录列表
+
+    Args:
+        scenes: 分镜列表（字典或记录）
+
+    Returns:
+        List[Scene]: 新的记录列表（已经是记录的元素原样保留）
+    """
+    return [Scene.coerce(scene) for scene in scenes or []]
@@ -1,30 +1,200 @@
 """
 剧本分割工具
-智能将剧本分割成每部分500字以内的片段，保持内容完整性，并在批次间保留衔接部分
+智能将剧本分割成每部分500字以内的片段，保持内容完整性，并在批次间保留衔接部分；
+结构感知模式下优先在场景标题、人物台词块处分割，片段按场景彼此独立
 """
 
-from typing import List, Tuple
+from bisect import bisect_left
+from functools import cached_property
+from typing import IO, Iterator, List, Optional, Tuple, Union
+import codecs
+import mmap
+import os
 import re
 
+# 句子结束符
+SENTENCE_END_CHARS = frozenset("。！？.!?")
+
+_NEWLINE_PATTERN = re.compile(r'\n')
+_SENTENCE_END_PATTERN = re.compile(r'[。！？.!?]')
+_DIALOGUE_PATTERN = re.compile(r'[：:]\s*\n')
+_PAUSE_PATTERN = re.compile(r'[，；,;]\s*')
+_SPACE_PATTERN = re.compile(r' ')
+_NON_SPACE_PATTERN = re.compile(r'\S')
+
+# 流式分割时每次读取的字符数（字节输入为字节数）
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# 流式分割的输入：文件路径、文本 / 二进制文件对象或 mmap
+ScriptSource = Union[str, "os.PathLike[str]", IO, mmap.mmap]
+
+_NUMERALS = "0-9０-９零一二三四五六七八九十百千两"
+_TIMES_OF_DAY = "日|夜|晨|昏|清晨|早晨|白天|黄昏|傍晚|夜晚|深夜|凌晨"
+
+# 场景标题行：第X场 / 第X幕 / 场景X、INT. / EXT. / 内景 / 外景、地点 / 时间 / 人物说明、
+# 「1-1 客厅 日 内」式的地点时间行
+_SCENE_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?:'
+    rf'第[{_NUMERALS}]+[场幕集]'
+    rf'|场景[{_NUMERALS}]*[ \t：:]'
+    r'|(?:INT|EXT|I/E)\.?(?:/(?:INT|EXT)\.?)?[ \t]'
+    r'|[内外]景[ \t：:]'
+    r'|(?:地点|时间|人物)[：:]'
+    rf'|(?:[0-9]+(?:[-.][0-9]+)*[ \t.、]+)?[^\s，。！？：:]{{1,15}}[ \t]+(?:{_TIMES_OF_DAY})(?:[ \t]*[内外]景?)?[ \t]*$'
+    r')',
+    re.MULTILINE
+)
+
+# 人物台词块的起始行：「张三：」「张三（低声）：」，或英文剧本中单独一行的大写人物名
+_CHARACTER_CUE_PATTERN = re.compile(
+    r'^[ \t]*(?:'
+    r'[^\s，。！？、：:“”"（）()]{1,8}(?:[（(][^）)\n]{0,10}[）)])?[：:]'
+    r"|[A-Z][A-Z0-9 .'\-]{1,30}(?:[ \t]*\([^)\n]*\))?[ \t]*$"
+    r')',
+    re.MULTILINE
+)
+
+
+class SplitBoundaries:
+    """
+    剧本的候选分割点（对整个剧本各扫描一次，各窗口通过二分查找取用）
+    
+    每类分割点在第一次用到时才扫描整个剧本（多数窗口在段落或句末处就能分割，停顿、对话、空格很少用到）；
+    位置数组均为升序的绝对位置：
+        newlines / sentence_ends / spaces: 换行 / 句末标点 / 空格的位置
+        double_newlines: 双换行的起始位置（允许重叠，连续三个换行记为两处）
+        dialogues, dialogue_ends: 后面的空白中含换行的冒号位置，及该空白中最后一个换行之后的位置
+        pauses, pause_ends: 逗号 / 分号的位置，及其后连续空白结束的位置
+        scene_headings: 场景标题块的行首位置（连续多行标题只记第一行）
+        character_cues: 人物台词块的行首位置
+    """
+    
+    def __init__(self, script: str):
+        self.script = script
+    
+    @cached_property
+    def newlines(self) -> List[int]:
+        return [m.start() for m in _NEWLINE_PATTERN.finditer(self.script)]
+    
+    @cached_property
+    def double_newlines(self) -> List[int]:
+        newlines = self.newlines
+        return [pos for pos, next_pos in zip(newlines, newlines[1:]) if next_pos == pos + 1]
+    
+    @cached_property
+    def sentence_ends(self) -> List[int]:
+        return [m.start() for m in _SENTENCE_END_PATTERN.finditer(self.script)]
+    
+    @cached_property
+    def spaces(self) -> List[int]:
+        return [m.start() for m in _SPACE_PATTERN.finditer(self.script)]
+    
+    @cached_property
+    def _dialogue_matches(self) -> Tuple[List[int], List[int]]:
+        starts, ends = [], []
+        for m in _DIALOGUE_PATTERN.finditer(self.script):
+            starts.append(m.start())
+            ends.append(m.end())
+        return starts, ends
+    
+    @property
+    def dialogues(self) -> List[int]:
+        return self._dialogue_matches[0]
+    
+    @property
+    def dialogue_ends(self) -> List[int]:
+        return self._dialogue_matches[1]
+    
+    @cached_property
+    def _pause_matches(self) -> Tuple[List[int], List[int]]:
+        starts, ends = [], []
+        for m in _PAUSE_PATTERN.finditer(self.script):
+            starts.append(m.start())
+            ends.append(m.end())
+        return starts, ends
+    
+    @property
+    def pauses(self) -> List[int]:
+        return self._pause_matches[0]
+    
+    @property
+    def pause_ends(self) -> List[int]:
+        return self._pause_matches[1]
+    
+    @cached_property
+    def scene_headings(self) -> List[int]:
+        headings = []
+        heading_line_end = -2
+        for m in _SCENE_HEADING_PATTERN.finditer(self.script):
+            line_start = m.start()
+            # 紧接在上一行标题之后的标题行（如「第3场」下面的「地点：客厅」）属于同一标题块
+            if line_start != heading_line_end + 1:
+                headings.append(line_start)
+            heading_line_end = self.script.find("\n", line_start)
+        return headings
+    
+    @cached_property
+    def character_cues(self) -> List[int]:
+        return [m.start() for m in _CHARACTER_CUE_PATTERN.finditer(self.script)]
+    
+    @staticmethod
+    def last_index_before(positions: List[int], start: int, end: int) -> Optional[int]:
+        """positions 中位于 [start, end) 的最后一个元素的下标（没有则返回 None）"""
+        index = bisect_left(positions, end) - 1
+        if index >= 0 and positions[index] >= start:
+            return index
+        return None
+    
+    def last_before(self, positions: List[int], start: int, end: int) -> Optional[int]:
+        """positions 中位于 [start, end) 的最后一个位置（没有则返回 None）"""
+        index = self.last_index_before(positions, start, end)
+        return None if index is None else positions[index]
+    
+    def last_dialogue_end(self, start: int, end: int) -> Optional[int]:
+        """
+        窗口 [start, end) 内最后一处对话分割点（冒号后空白中的最后一个换行之后）
+        
+        冒号后的空白被窗口截断时，只计算窗口内的换行；窗口内没有换行则该冒号不算
+        """
+        index = self.last_index_before(self.dialogues, start, end)
+        while index is not None:
+            colon = self.dialogues[index]
+            dialogue_end = self.dialogue_ends[index]
+            if dialogue_end <= end:
+                return dialogue_end
+            # 空白被窗口截断：取窗口内该空白中的最后一个换行
+            newline = self.last_before(self.newlines, colon + 1, end)
+            if newline is not None:
+                return newline + 1
+            index = index - 1 if index > 0 and self.dialogues[index - 1] >= start else None
+        return None
+
+
 
 class ScriptSplitter:
     """剧本分割器"""
     
-    def __init__(self, max_chars: int = 500, overlap_chars: int = 100):
+    def __init__(self, max_chars: int = 500, overlap_chars: int = 100, structure_aware: bool = False):
         """
         初始化分割器
         
         Args:
             max_chars: 每个片段的最大字符数，默认500
             overlap_chars: 批次间的重叠字符数（用于保留衔接部分），默认100
+            structure_aware: 是否优先在场景标题（第X场、场景、INT./EXT.、地点时间行）和人物台词块处分割；
+                             片段按场景切开后语义上彼此独立，可以并行拆分，基本不需要重叠
         """
         self.max_chars = max_chars
         self.overlap_chars = overlap_chars
+        self.structure_aware = structure_aware
     
     def split_script(self, script: str) -> List[Tuple[str, int, int]]:
         """
         分割剧本
         
+        先一次性预计算整个剧本的所有候选分割点（段落、换行、句末、对话、停顿、空格），
+        每个窗口的分割点通过二分查找确定，总耗时与剧本长度成线性关系
+        
         Args:
             script: 完整的剧本文本
         
@@ -38,6 +208,7 @@ class ScriptSplitter:
         if len(script) <= self.max_chars:
             return [(script, 0, len(script))]
         
+        boundaries = SplitBoundaries(script)
         segments = []
         current_pos = 0
         script_len = len(script)
@@ -48,8 +219,7 @@ class ScriptSplitter:
             
             # 如果不是最后一段，尝试找到最佳的分割点
             if end_pos < script_len:
-                segment = script[current_pos:end_pos]
-                best_split_pos = self._find_best_split_point(segment, current_pos)
+                best_split_pos = self._split_point_in_window(boundaries, current_pos, end_pos)
                 
                 # 如果找到了好的分割点，使用它
                 if best_split_pos > current_pos:
@@ -69,6 +239,84 @@ class ScriptSplitter:
         
         return segments
     
+    def iter_split(self, source: ScriptSource, encoding: str = "utf-8",
+                   block_size: int = STREAM_BLOCK_SIZE) -> Iterator[Tuple[str, int, int]]:
+        """
+        流式分割剧本文件（生成器）
+        
+        按块读取，只在内存中保留当前窗口及其后的少量预读内容，逐个返回片段，
+        分割规则和结果与 split_script 对整个文本的分割完全相同；
+        预读需要覆盖窗口之后的第一个换行和第一个非空白字符（判断标题行、冒号后的换行），
+        因此只有极长的无换行文本才会整行读入内存
+        
+        Args:
+            source: 文件路径、文件对象（文本或二进制）或 mmap；路径按 encoding 以通用换行模式打开，
+                    二进制输入按 encoding 增量解码，不转换换行符
+            encoding: 文件编码
+            block_size: 每次读取的字符数（二进制输入为字节数）
+        
+        Yields:
+            Tuple[str, int, int]: (片段文本, 起始位置, 结束位置)，位置为解码后文本中的字符位置
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "r", encoding=encoding) as file:
+                yield from self._iter_split_blocks(_read_text_blocks(file, encoding, block_size))
+        else:
+            yield from self._iter_split_blocks(_read_text_blocks(source, encoding, block_size))
+    
+    def _iter_split_blocks(self, blocks: Iterator[str]) -> Iterator[Tuple[str, int, int]]:
+        """对文本块序列做与 split_script 相同的分割（buffer 是从 buffer_start 开始的文本，始终从行首开始）"""
+        buffer = ""
+        buffer_start = 0
+        boundaries = None
+        exhausted = False
+        current_pos = 0
+        # 剧本只有空白时不返回任何片段：遇到第一个非空白字符之前的片段暂缓输出
+        pending: List[Tuple[str, int, int]] = []
+        has_text = False
+        
+        while True:
+            end_pos = current_pos + self.max_chars
+            while not exhausted and not _has_lookahead(buffer, end_pos - buffer_start):
+                block = next(blocks, None)
+                if block is None:
+                    exhausted = True
+                    break
+                # 丢弃已经输出的内容（保留当前位置所在的整行，行首和标题块的判断与整个文本一致），
+                # 分割点需要对新的 buffer 重新计算
+                line_start = buffer.rfind("\n", 0, current_pos - buffer_start) + 1
+                buffer = buffer[line_start:] + block
+                buffer_start += line_start
+                boundaries = None
+            
+            buffer_end = buffer_start + len(buffer)
+            if current_pos >= buffer_end:
+                break
+            
+            if end_pos < buffer_end:
+                if boundaries is None:
+                    boundaries = SplitBoundaries(buffer)
+                split_pos = buffer_start + self._split_point_in_window(
+                    boundaries, current_pos - buffer_start, end_pos - buffer_start
+                )
+                if split_pos <= current_pos:
+                    # 如果没找到好的分割点，强制在当前位置分割
+                    split_pos = end_pos
+            else:
+                # 最后一段
+                split_pos = buffer_end
+            
+            segment = (buffer[current_pos - buffer_start:split_pos - buffer_start], current_pos, split_pos)
+            current_pos = split_pos
+            if has_text:
+                yield segment
+                continue
+            pending.append(segment)
+            if not segment[0].isspace():
+                has_text = True
+                yield from pending
+                pending = []
+    
     def _find_best_split_point(self, segment: str, start_pos: int) -> int:
         """
         在片段中找到最佳的分割点
@@ -80,72 +328,77 @@ class ScriptSplitter:
         Returns:
             int: 最佳分割位置（相对于原剧本的绝对位置）
         """
-        segment_len = len(segment)
+        return start_pos + self._split_point_in_window(SplitBoundaries(segment), 0, len(segment))
+    
+    def _split_point_in_window(self, boundaries: "SplitBoundaries", start: int, end: int) -> int:
+        """
+        在窗口 [start, end) 中找到最佳的分割点
+        
+        优先级：段落分隔（双换行）> 段落结束的换行 > 句末 > 对话 > 停顿 > 空格 > 90% 处强制分割，
+        结构感知模式下场景标题 > 人物台词块 > 上述规则；
+        每一类都只需要窗口内最后一个分割点，通过二分查找预计算的位置数组得到
+        
+        Args:
+            boundaries: 整个剧本的候选分割点
+            start: 窗口起始位置（绝对位置）
+            end: 窗口结束位置（绝对位置，不包含）
+        
+        Returns:
+            int: 最佳分割位置（绝对位置）
+        """
+        segment_len = end - start
         
         # 如果片段很短，直接返回末尾
         if segment_len < self.max_chars * 0.5:
-            return start_pos + segment_len
-        
-        # 尝试找到段落分隔符（双换行）
-        double_newline_pos = segment.rfind('\n\n')
-        if double_newline_pos > segment_len * 0.5:  # 在片段的后半部分
-            return start_pos + double_newline_pos + 2
-        
-        # 尝试找到单换行（段落结束）
-        # 从后往前找，优先选择段落结束的位置
-        newline_pos = segment.rfind('\n')
-        if newline_pos > segment_len * 0.6:  # 在片段的后60%
-            # 检查这是否是段落结束（后面跟着句号、问号、感叹号等）
-            if newline_pos + 1 < len(segment):
-                next_char = segment[newline_pos + 1]
-                if next_char in ['。', '！', '？', '.', '!', '?']:
-                    return start_pos + newline_pos + 1
-        
-        # 尝试找到句子结束符（句号、问号、感叹号）
-        sentence_end_pattern = re.compile(r'[。！？.!?]')
-        matches = list(sentence_end_pattern.finditer(segment))
-        
-        if matches:
-            # 从后往前找，选择在片段后70%位置的句子结束符
-            threshold = segment_len * 0.7
-            for match in reversed(matches):
-                if match.end() >= threshold:
-                    return start_pos + match.end()
+            return end
+        
+        if self.structure_aware:
+            # 在场景标题行之前分割（标题归入下一片段），需要在片段的后70%
+            pos = boundaries.last_before(boundaries.scene_headings, start + 1, end + 1)
+            if pos is not None and pos - start > segment_len * 0.3:
+                return pos
             
-            # 如果后70%没有，选择最后一个句子结束符
-            last_match = matches[-1]
-            if last_match.end() > segment_len * 0.5:  # 至少在片段中间之后
-                return start_pos + last_match.end()
-        
-        # 尝试找到对话结束（冒号后的换行，或人物名后的冒号）
-        dialogue_pattern = re.compile(r'[：:]\s*\n')
-        dialogue_matches = list(dialogue_pattern.finditer(segment))
-        
-        if dialogue_matches:
-            threshold = segment_len * 0.6
-            for match in reversed(dialogue_matches):
-                if match.end() >= threshold:
-                    return start_pos + match.end()
-        
-        # 尝试找到逗号、分号等停顿点
-        pause_pattern = re.compile(r'[，；,;]\s*')
-        pause_matches = list(pause_pattern.finditer(segment))
-        
-        if pause_matches:
-            threshold = segment_len * 0.8
-            for match in reversed(pause_matches):
-                if match.end() >= threshold:
-                    return start_pos + match.end()
+            # 场景超长时，在人物台词块之前分割，需要在片段的后半部分
+            pos = boundaries.last_before(boundaries.character_cues, start + 1, end + 1)
+            if pos is not None and pos - start > segment_len * 0.5:
+                return pos
+        
+        # 尝试找到段落分隔符（双换行），需要在片段的后半部分
+        pos = boundaries.last_before(boundaries.double_newlines, start, end - 1)
+        if pos is not None and pos - start > segment_len * 0.5:
+            return pos + 2
+        
+        # 尝试找到单换行（段落结束）：在片段的后60%，且下一行以句号、问号、感叹号等开头
+        pos = boundaries.last_before(boundaries.newlines, start, end)
+        if pos is not None and pos - start > segment_len * 0.6 and pos + 1 < end:
+            if boundaries.script[pos + 1] in SENTENCE_END_CHARS:
+                return pos + 1
+        
+        # 尝试找到句子结束符：窗口内最后一个句末在片段中间之后即可
+        pos = boundaries.last_before(boundaries.sentence_ends, start, end)
+        if pos is not None and pos + 1 - start > segment_len * 0.5:
+            return pos + 1
+        
+        # 尝试找到对话结束（冒号后的换行，或人物名后的冒号），需要在片段的后60%
+        split_pos = boundaries.last_dialogue_end(start, end)
+        if split_pos is not None and split_pos - start >= segment_len * 0.6:
+            return split_pos
+        
+        # 尝试找到逗号、分号等停顿点（连同后面的空白），需要在片段的后80%
+        index = boundaries.last_index_before(boundaries.pauses, start, end)
+        if index is not None:
+            split_pos = min(boundaries.pause_ends[index], end)
+            if split_pos - start >= segment_len * 0.8:
+                return split_pos
         
         # 如果都没找到合适的点，尝试在空格处分割（英文剧本）
-        space_pos = segment.rfind(' ')
-        if space_pos > segment_len * 0.8:
-            return start_pos + space_pos + 1
+        pos = boundaries.last_before(boundaries.spaces, start, end)
+        if pos is not None and pos - start > segment_len * 0.8:
+            return pos + 1
         
         # 最后，如果实在找不到，就在90%的位置强制分割
         # 这样可以保证至少有一些上下文延续
-        fallback_pos = int(segment_len * 0.9)
-        return start_pos + fallback_pos
+        return start + int(segment_len * 0.9)
     
     def get_split_info(self, script: str) -> dict:
         """
@@ -159,7 +412,7 @@ class ScriptSplitter:
         """
         segments = self.split_script(script)
         
-        return {
+        info = {
             "total_chars": len(script),
             "segment_count": len(segments),
             "segments": [
@@ -173,4 +426,38 @@ class ScriptSplitter:
                 for i, seg in enumerate(segments)
             ]
         }
+        
+        if self.structure_aware:
+            # 以场景标题开头的片段（第一个片段视为场景开头）
+            headings = set(SplitBoundaries(script).scene_headings)
+            for segment in info["segments"]:
+                segment["starts_scene"] = segment["start_pos"] == 0 or segment["start_pos"] in headings
+        
+        return info
+
+
+
+def _has_lookahead(buffer: str, end: int) -> bool:
+    """buffer 在窗口末尾 end 之后是否已有足够的预读（之后的第一个换行和第一个非空白字符都已读入）"""
+    return buffer.find("\n", end) >= 0 and _NON_SPACE_PATTERN.search(buffer, end) is not None
+
 
+def _read_text_blocks(source: Union[IO, mmap.mmap], encoding: str, block_size: int) -> Iterator[str]:
+    """从文件对象或 mmap 中按块读取文本（字节内容增量解码，多字节字符跨块时不会被截断）"""
+    decoder = None
+    while True:
+        data = source.read(block_size)
+        if not data:
+            break
+        if isinstance(data, str):
+            yield data
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(encoding)()
+        text = decoder.decode(data)
+        if text:
+            yield text
+    if decoder is not None:
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
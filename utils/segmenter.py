@@ -0,0 +1,194 @@
+"""
+基于词典的中文最大匹配分词
+用词典构建正向 / 逆向两棵字典树，分别做正向最大匹配和逆向最大匹配，
+按未登录字数、词数、单字词数择优，得到逐词翻译所需的切分结果
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# 字典树中标记词条结束的键（对应的值为词条的译文）
+_END = ""
+
+# 中文句读标点 -> 英文标点（翻译时附在前一个词之后）
+PUNCTUATION_TRANSLATIONS = {
+    "，": ",", "。": ".", "、": ",", "；": ";", "：": ":",
+    "！": "!", "？": "?", "…": "...", "）": ")"
+}
+
+# 词条：(原文, 译文)；未登录片段的译文为 None
+Token = Tuple[str, Optional[str]]
+
+# 中文字符（未登录片段包含中文时视为未翻译）
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+
+
+class MaxMatchSegmenter:
+    """双向最大匹配分词器（词典只读，构建一次后可在多个生成器之间共享）"""
+
+    def __init__(self, lexicon: Dict[str, str]):
+        """
+        初始化分词器
+
+        Args:
+            lexicon: 词条 -> 译文
+        """
+        self.lexicon = lexicon
+        self._forward_trie: Dict = {}
+        self._backward_trie: Dict = {}
+        for word, translation in lexicon.items():
+            if word:
+                self._insert(self._forward_trie, word, translation)
+                self._insert(self._backward_trie, word[::-1], translation)
+
+    @staticmethod
+    def _insert(trie: Dict, word: str, translation: str):
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[_END] = translation
+
+    def forward(self, text: str) -> List[Token]:
+        """正向最大匹配：从左到右，每个位置取最长的词条"""
+        tokens: List[Token] = []
+        unknown_start = None
+        position = 0
+        length = len(text)
+        while position < length:
+            node = self._forward_trie
+            match_end = 0
+            translation = None
+            index = position
+            while index < length:
+                node = node.get(text[index])
+                if node is None:
+                    break
+                index += 1
+                if _END in node:
+                    match_end = index
+                    translation = node[_END]
+            if match_end:
+                if unknown_start is not None:
+                    tokens.append((text[unknown_start:position], None))
+                    unknown_start = None
+                tokens.append((text[position:match_end], translation))
+                position = match_end
+            else:
+                if unknown_start is None:
+                    unknown_start = position
+                position += 1
+        if unknown_start is not None:
+            tokens.append((text[unknown_start:], None))
+        return tokens
+
+    def backward(self, text: str) -> List[Token]:
+        """逆向最大匹配：从右到左，每个位置取最长的词条"""
+        tokens: List[Token] = []
+        unknown_end = None
+        position = len(text)
+        while position > 0:
+            node = self._backward_trie
+            match_start = position
+            translation = None
+            index = position
+            while index > 0:
+                node = node.get(text[index - 1])
+                if node is None:
+                    break
+                index -= 1
+                if _END in node:
+                    match_start = index
+                    translation = node[_END]
+            if match_start < position:
+                if unknown_end is not None:
+                    tokens.append((text[position:unknown_end], None))
+                    unknown_end = None
+                tokens.append((text[match_start:position], translation))
+                position = match_start
+            else:
+                if unknown_end is None:
+                    unknown_end = position
+                position -= 1
+        if unknown_end is not None:
+            tokens.append((text[:unknown_end], None))
+        tokens.reverse()
+        return tokens
+
+    @staticmethod
+    def _score(tokens: List[Token]) -> Tuple[int, int, int]:
+        """切分结果的代价：(未登录字数, 词数, 单字词数)，越小越好"""
+        unknown_chars = sum(len(word) for word, translation in tokens if translation is None)
+        single_chars = sum(1 for word, translation in tokens if translation is not None and len(word) == 1)
+        return unknown_chars, len(tokens), single_chars
+
+    def segment(self, text: str) -> List[Token]:
+        """
+        双向最大匹配分词
+
+        分别做正向和逆向最大匹配，取未登录字数少、词数少、单字词少的结果（相同时取逆向，中文逆向匹配通常更准确）
+
+        Args:
+            text: 待切分文本
+
+        Returns:
+            List[Tuple[str, Optional[str]]]: (词, 译文) 列表，连续的未登录字符合并为一个片段，译文为 None
+        """
+        if not text:
+            return []
+        forward = self.forward(text)
+        backward = self.backward(text)
+        return forward if self._score(forward) < self._score(backward) else backward
+
+    def translate(self, text: str) -> str:
+        """
+        逐词翻译：词典中的词替换为译文，未登录片段保留原文，中文标点替换为英文标点
+        （词典中需要包含 PUNCTUATION_TRANSLATIONS 才会替换标点）
+
+        Returns:
+            str: 以空格分隔的译文（除标点外没有任何词条命中时返回原文）
+        """
+        tokens = self.segment(text)
+        if all(translation is None or word in PUNCTUATION_TRANSLATIONS for word, translation in tokens):
+            return text
+        return self._join(tokens)
+
+    def coverage(self, text: str) -> float:
+        """
+        词典覆盖率：文本中的汉字被词典词条覆盖的比例（没有汉字时为 1）
+
+        覆盖率低的描述字典翻译后仍保留大段原文，可以据此改用 LLM 翻译
+        """
+        tokens = self.segment(text)
+        total = len(_CJK_PATTERN.findall(text))
+        if not total:
+            return 1.0
+        unknown = sum(len(_CJK_PATTERN.findall(word)) for word, translation in tokens if translation is None)
+        return 1 - unknown / total
+
+    def translate_complete(self, text: str) -> Optional[str]:
+        """
+        只在能完整翻译时逐词翻译
+
+        Returns:
+            Optional[str]: 以空格分隔的译文；切分后仍有包含中文的未登录片段时返回 None
+                           （不输出中英混杂的半翻译结果，由调用方决定如何处理）
+        """
+        tokens = self.segment(text)
+        if any(translation is None and _CJK_PATTERN.search(word) for word, translation in tokens):
+            return None
+        return self._join(tokens)
+
+    @staticmethod
+    def _join(tokens: List[Token]) -> str:
+        """拼接译文：未登录片段保留原文，标点附在前一个词之后"""
+        parts: List[str] = []
+        for word, translation in tokens:
+            piece = (word if translation is None else translation).strip()
+            if not piece:
+                continue
+            if word in PUNCTUATION_TRANSLATIONS and parts:
+                # 标点附在前一个词之后
+                parts[-1] += piece
+            else:
+                parts.append(piece)
+        return " ".join(parts)
@@ -0,0 +1,150 @@
+"""
+翻译记忆库
+保存已翻译过的文本（原文 -> 译文），LLM 翻译前先查询记忆库，
+重复出现的地点、动作、情绪等短语精确命中时不必再次调用 API；
+基于 n-gram 的近似匹配只作为参考译文提供给 LLM（相似的原文可能只差一个人名、否定词或数字，不能直接复用译文）
+"""
+
+from collections import Counter
+from typing import Dict, Any, Optional, Set, Tuple
+
+
+class TranslationMemory:
+    """翻译记忆库（精确匹配 + n-gram 近似匹配参考）"""
+
+    def __init__(self, entries: Dict[str, str] = None, glossary: Optional["TranslationMemory"] = None,
+                 ngram_size: int = 2, fuzzy_threshold: float = 0.9):
+        """
+        初始化记忆库
+
+        Args:
+            entries: 原文 -> 译文
+            glossary: 全局术语库（可选，跨项目共享）；本记忆库查不到时再查询术语库，
+                      新增的翻译也会同时写入术语库
+            ngram_size: 近似匹配使用的 n-gram 长度（中文按字切分）
+            fuzzy_threshold: 近似匹配的最低相似度（Dice 系数，0-1）
+        """
+        self.glossary = glossary
+        self.ngram_size = ngram_size
+        self.fuzzy_threshold = fuzzy_threshold
+        self.entries: Dict[str, str] = {}
+        self._ngrams: Dict[str, Set[str]] = {}
+        self._index: Dict[str, Set[str]] = {}
+        # fuzzy: 提供了近似匹配参考译文的次数（仍然需要翻译）
+        self.stats = {"exact": 0, "fuzzy": 0, "glossary": 0, "miss": 0}
+        for source, target in (entries or {}).items():
+            self.add(source, target, to_glossary=False)
+
+    def _split(self, text: str) -> Set[str]:
+        """切分为 n-gram 集合（文本比 n 短时整体作为一个 gram）"""
+        n = self.ngram_size
+        if len(text) <= n:
+            return {text}
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def add(self, source: str, target: str, to_glossary: bool = True):
+        """
+        添加一条翻译
+
+        Args:
+            source: 原文
+            target: 译文
+            to_glossary: 是否同时写入全局术语库
+        """
+        source = (source or "").strip()
+        if not source or not target:
+            return
+        if source not in self.entries:
+            grams = self._split(source)
+            self._ngrams[source] = grams
+            for gram in grams:
+                self._index.setdefault(gram, set()).add(source)
+        self.entries[source] = target
+        if to_glossary and self.glossary is not None:
+            self.glossary.add(source, target)
+
+    def lookup(self, text: str) -> Optional[str]:
+        """
+        查询译文（只精确匹配；本库没有时查询全局术语库）
+
+        Args:
+            text: 原文
+
+        Returns:
+            Optional[str]: 译文，没有记录时返回 None
+        """
+        source = (text or "").strip()
+        if not source:
+            return None
+
+        target = self.entries.get(source)
+        if target is not None:
+            self.stats["exact"] += 1
+            return target
+
+        if self.glossary is not None:
+            target = self.glossary.lookup(source)
+            if target is not None:
+                # 记入本项目，下次直接精确命中
+                self.stats["glossary"] += 1
+                self.add(source, target, to_glossary=False)
+                return target
+
+        self.stats["miss"] += 1
+        return None
+
+    def suggest(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        近似匹配的参考译文（本库没有时查询全局术语库）
+
+        相似的原文之间可能只差一个人名、否定词或数字，结果只能作为翻译时的参考（保持术语一致），
+        不能直接当作译文
+
+        Args:
+            text: 原文
+
+        Returns:
+            Optional[Tuple[str, str]]: (相似的原文, 其译文)，没有足够接近的记录时返回 None
+        """
+        source = (text or "").strip()
+        if not source:
+            return None
+        suggestion = self._lookup_fuzzy(source)
+        if suggestion is None and self.glossary is not None:
+            suggestion = self.glossary._lookup_fuzzy(source)
+        if suggestion is not None:
+            self.stats["fuzzy"] += 1
+        return suggestion
+
+    def _lookup_fuzzy(self, source: str) -> Optional[Tuple[str, str]]:
+        """近似匹配：通过 n-gram 倒排索引找候选，取 Dice 相似度最高且达到阈值的记录"""
+        grams = self._split(source)
+        shared = Counter()
+        for gram in grams:
+            for candidate in self._index.get(gram, ()):
+                shared[candidate] += 1
+
+        best_score = self.fuzzy_threshold
+        best_source = None
+        for candidate, count in shared.items():
+            score = 2 * count / (len(grams) + len(self._ngrams[candidate]))
+            if score >= best_score:
+                best_score = score
+                best_source = candidate
+        return (best_source, self.entries[best_source]) if best_source is not None else None
+
+    def to_json(self) -> Dict[str, Any]:
+        """序列化为普通字典（只包含本库的记录，不包含全局术语库）"""
+        return {"entries": self.entries}
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, Any]],
+                  glossary: Optional["TranslationMemory"] = None) -> "TranslationMemory":
+        """从项目文件 / 术语库文件中的字典恢复"""
+        return cls(entries=(data or {}).get("entries", {}), glossary=glossary)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, text: str) -> bool:
+        return (text or "").strip() in self.entries
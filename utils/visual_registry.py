@@ -0,0 +1,135 @@
+"""
+项目级视觉设定登记表
+一次遍历全部分镜，记录每个人物的标准外观（服装）和每个地点的标准环境（中英双语），
+生成提示词时各分镜直接复用，避免重复提取和翻译，并保持前后画面一致
+"""
+
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+
+class VisualRegistry:
+    """人物 / 地点视觉设定登记表"""
+
+    def __init__(self, characters: Dict[str, Dict] = None, locations: Dict[str, Dict] = None):
+        """
+        初始化登记表
+
+        Args:
+            characters: 人物名 -> {"clothing": {"chinese", "english"} 或 None, "scene_count": int}
+            locations: 地点名 -> {"location": {"chinese", "english"},
+                                  "environment": {"chinese", "english"}, "scene_count": int}
+        """
+        self.characters = characters or {}
+        self.locations = locations or {}
+
+    @classmethod
+    def build(cls, scenes: List[Dict[str, Any]], generator,
+              existing: Optional["VisualRegistry"] = None) -> "VisualRegistry":
+        """
+        遍历全部分镜构建登记表
+
+        每个人物取其作为主角的分镜中出现次数最多的服装，每个地点取出现次数最多的场景细节；
+        已有登记表中的条目保持不变（保证多次生成之间的一致性），只补充新出现的人物和地点
+
+        Args:
+            scenes: 分镜列表
+            generator: ImagePromptGenerator 实例（用于关键词提取和翻译）
+            existing: 已有的登记表（可选）
+
+        Returns:
+            VisualRegistry: 新的登记表
+        """
+        registry = cls(
+            characters=dict(existing.characters) if existing else {},
+            locations=dict(existing.locations) if existing else {}
+        )
+
+        clothing_counts: Dict[str, Counter] = {}
+        character_scenes: Counter = Counter()
+        detail_counts: Dict[str, Counter] = {}
+        location_scenes: Counter = Counter()
+        for scene in scenes:
+            description = scene.get("scene_description", "")
+            characters = scene.get("characters") or []
+            location = scene.get("location", "")
+
+            if characters and isinstance(characters[0], str) and characters[0] not in registry.characters:
+                main_character = characters[0]
+                character_scenes[main_character] += 1
+                clothing = generator._extract_clothing(description)
+                counts = clothing_counts.setdefault(main_character, Counter())
+                if clothing:
+                    counts[clothing] += 1
+
+            if location and isinstance(location, str) and location not in registry.locations:
+                location_scenes[location] += 1
+                details = generator._extract_scene_details(description, location)
+                detail_counts.setdefault(location, Counter())[details] += 1
+
+        # 每个不同的服装 / 环境只翻译一次
+        for name, counts in clothing_counts.items():
+            clothing = counts.most_common(1)[0][0] if counts else ""
+            registry.characters[name] = {
+                "clothing": registry._bilingual(clothing, generator) if clothing else None,
+                "scene_count": character_scenes[name]
+            }
+        for name, counts in detail_counts.items():
+            # 只有地点名、没有场景细节的分镜不参与比较（除非全部都没有细节）
+            detailed = Counter({details: count for details, count in counts.items() if details != name})
+            environment = (detailed or counts).most_common(1)[0][0]
+            registry.locations[name] = {
+                "location": registry._bilingual(name, generator),
+                "environment": registry._bilingual(environment, generator),
+                "scene_count": location_scenes[name]
+            }
+        return registry
+
+    @staticmethod
+    def _bilingual(text: str, generator) -> Dict[str, str]:
+        return {"chinese": text, "english": generator._translate_to_english(text)}
+
+    def character(self, name: str) -> Optional[Dict]:
+        """人物条目（没有登记时返回 None）"""
+        if not isinstance(name, str):
+            return None
+        return self.characters.get(name)
+
+    def location(self, name: str) -> Optional[Dict]:
+        """地点条目（没有登记时返回 None）"""
+        if not isinstance(name, str):
+            return None
+        return self.locations.get(name)
+
+    def entries_for(self, scene: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        分镜用到的登记条目（主角和地点），用于计算分镜的内容哈希
+
+        Returns:
+            Dict: {"character": 条目或 None, "location": 条目或 None}
+        """
+        characters = scene.get("characters") or []
+        return {
+            "character": self.character(characters[0]) if characters else None,
+            "location": self.location(scene.get("location", ""))
+        }
+
+    def to_json(self) -> Dict[str, Any]:
+        """序列化为普通字典（随项目一起保存）"""
+        return {
+            "characters": self.characters,
+            "locations": self.locations
+        }
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, Any]]) -> Optional["VisualRegistry"]:
+        """从项目文件中的字典恢复（没有登记表时返回 None）"""
+        if not data:
+            return None
+        return cls(
+            characters=dict(data.get("characters", {})),
+            locations=dict(data.get("locations", {}))
+        )
+
+    def __len__(self) -> int:
+        return len(self.characters) + len(self.locations)